@@ -265,15 +265,22 @@ export class App extends PureComponent<Props, State> {
     this.setState({ connectionState: newState })
 
     if (newState === ConnectionState.CONNECTED) {
-      logMessage(
-        "Reconnected to server; Requesting a run (which may be preheated)"
-      )
-      this.widgetMgr.sendUpdateWidgetsMessage()
+      if (this.connectionManager?.isResumingSession()) {
+        // If the session can't be resumed, we'll request a run when the
+        // server tells us so. See handleSessionEvent.
+        logMessage("Reconnected to server; Resuming our session")
+      } else {
+        logMessage(
+          "Reconnected to server; Requesting a run (which may be preheated)"
+        )
+        this.widgetMgr.sendUpdateWidgetsMessage()
+      }
       this.setState({ dialog: null })
     } else {
       setCookie("_xsrf", "")
 
-      if (SessionInfo.isSet()) {
+      // Keep our SessionInfo if we'll try to resume the session.
+      if (SessionInfo.isSet() && !this.connectionManager?.canResumeSession()) {
         SessionInfo.clearSession()
       }
     }
@@ -451,7 +458,15 @@ export class App extends PureComponent<Props, State> {
    */
   handleSessionEvent = (sessionEvent: SessionEvent): void => {
     this.sessionEventDispatcher.handleSessionEventMsg(sessionEvent)
-    if (sessionEvent.type === "scriptCompilationException") {
+    if (sessionEvent.type === "sessionResumed") {
+      if (!sessionEvent.sessionResumed) {
+        logMessage("Couldn't resume our session; Requesting a run")
+        if (SessionInfo.isSet()) {
+          SessionInfo.clearSession()
+        }
+        this.widgetMgr.sendUpdateWidgetsMessage()
+      }
+    } else if (sessionEvent.type === "scriptCompilationException") {
       this.setState({ reportRunState: ReportRunState.COMPILATION_ERROR })
       const newDialog: DialogProps = {
         type: DialogType.SCRIPT_COMPILE_ERROR,
@@ -79,6 +79,28 @@ export class ConnectionManager {
     return this.connectionState === ConnectionState.STATIC
   }
 
+  /**
+   * Indicates whether we asked the server to resume our previous session
+   * when we reconnected, and are waiting to hear whether it did.
+   */
+  public isResumingSession(): boolean {
+    return (
+      this.connection instanceof WebsocketConnection &&
+      this.connection.isResumingSession()
+    )
+  }
+
+  /**
+   * Indicates whether we'll ask the server to resume our session if we
+   * reconnect.
+   */
+  public canResumeSession(): boolean {
+    return (
+      this.connection instanceof WebsocketConnection &&
+      this.connection.canResumeSession()
+    )
+  }
+
   /**
    * Return the BaseUriParts for the server we're connected to,
    * if we are connected to a server.
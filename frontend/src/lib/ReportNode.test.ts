@@ -197,6 +197,64 @@ describe("ReportRoot.applyDelta", () => {
     expect(addRowsElement.reportId).toBe("postAddRows")
     expect(addRowsElement.immutableElement).toEqual(expectedData)
   })
+
+  it("keeps the last maxRows rows on 'addRows'", () => {
+    const root = ReportRoot.empty().applyDelta(
+      "preAddRows",
+      makeProto(DeltaProto, { newElement: { dataFrame: mockDataFrameData } }),
+      forwardMsgMetadata([0, 0])
+    )
+
+    // The dataframe has 10 rows. Add 10 more, but only keep 15.
+    const newRoot = root.applyDelta(
+      "postAddRows",
+      makeProto(DeltaProto, {
+        addRows: { data: mockDataFrameData, maxRows: 15 },
+      }),
+      forwardMsgMetadata([0, 0])
+    )
+
+    const addRowsElement = newRoot.main.getIn([0]) as ElementNode
+    const df = addRowsElement.immutableElement.get("dataFrame")
+    expect(df.getIn(["data", "cols", 0, "int64s", "data"]).size).toBe(15)
+    expect(df.getIn(["style", "cols", 0, "styles"]).size).toBe(15)
+  })
+})
+
+describe("ReportRoot.applyDelta 'unchangedCount'", () => {
+  it("keeps the unchanged nodes", () => {
+    const delta = makeProto(DeltaProto, { unchangedCount: 2 })
+    const newRoot = ROOT.applyDelta(
+      "new_report_id",
+      delta,
+      forwardMsgMetadata([0, 0])
+    )
+
+    // The nodes themselves are unchanged
+    expect(newRoot.main.getIn([0])).toBeTextNode("1")
+    expect(newRoot.main.getIn([1, 0])).toBeTextNode("2")
+
+    // Check that our new reportID has been set only on the kept nodes
+    // and their ancestors
+    expect(newRoot.main.reportId).toBe("new_report_id")
+    expect(newRoot.main.getIn([0])?.reportId).toBe("new_report_id")
+    expect(newRoot.main.getIn([1])?.reportId).toBe("new_report_id")
+    expect(newRoot.main.getIn([1, 0])?.reportId).toBe(NO_REPORT_ID)
+    expect(newRoot.sidebar.reportId).toBe(NO_REPORT_ID)
+
+    // The kept block's children survive clearStaleNodes only if they were
+    // kept too
+    const clearedRoot = newRoot.clearStaleNodes("new_report_id")
+    expect(clearedRoot.main.getIn([0])).toBeTextNode("1")
+    expect(clearedRoot.getElements().size).toBe(1)
+  })
+
+  it("throws an error for invalid paths", () => {
+    const delta = makeProto(DeltaProto, { unchangedCount: 3 })
+    expect(() =>
+      ROOT.applyDelta("new_report_id", delta, forwardMsgMetadata([0, 0]))
+    ).toThrow("Can't keep unchanged node: invalid deltaPath: 0,2")
+  })
 })
 
 describe("ReportRoot.clearStaleNodes", () => {
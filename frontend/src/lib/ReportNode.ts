@@ -95,6 +95,12 @@ export interface ReportNode {
    */
   clearStaleNodes(currentReportId: string): ReportNode | undefined
 
+  /**
+   * Return a copy of this node, with its children, that belongs to the
+   * given report.
+   */
+  withReportId(reportId: string): ReportNode
+
   /**
    * Return a Set of all the Elements contained in the tree.
    * If an existing Set is passed in, that Set will be mutated and returned.
@@ -165,6 +171,12 @@ export class ElementNode implements ReportNode {
     return this.reportId === currentReportId ? this : undefined
   }
 
+  public withReportId(reportId: string): ElementNode {
+    const newNode = new ElementNode(this.element, this.metadata, reportId)
+    newNode.lazyImmutableElement = this.lazyImmutableElement
+    return newNode
+  }
+
   public getElements(elements?: Set<Element>): Set<Element> {
     if (elements == null) {
       elements = new Set<Element>()
@@ -272,6 +284,10 @@ export class BlockNode implements ReportNode {
     return new BlockNode(newChildren, this.deltaBlock, currentReportId)
   }
 
+  public withReportId(reportId: string): BlockNode {
+    return new BlockNode(this.children, this.deltaBlock, reportId)
+  }
+
   public getElements(elementSet?: Set<Element>): Set<Element> {
     if (elementSet == null) {
       elementSet = new Set<Element>()
@@ -388,6 +404,14 @@ export class ReportRoot {
         return this.addRows(deltaPath, delta.addRows as NamedDataSet, reportId)
       }
 
+      case "unchangedCount": {
+        return this.keepUnchanged(
+          deltaPath,
+          delta.unchangedCount as number,
+          reportId
+        )
+      }
+
       default:
         throw new Error(`Unrecognized deltaType: '${delta.type}'`)
     }
@@ -455,6 +479,33 @@ export class ReportRoot {
     const elementNode = existingNode.addRows(namedDataSet, reportId)
     return new ReportRoot(this.root.setIn(deltaPath, elementNode, reportId))
   }
+
+  /**
+   * Keep the node at deltaPath, and the (count - 1) siblings that follow
+   * it, as part of the current report. The server sends this instead of
+   * nodes that haven't changed since it last sent them.
+   */
+  private keepUnchanged(
+    deltaPath: number[],
+    count: number,
+    reportId: string
+  ): ReportRoot {
+    const parentPath = deltaPath.slice(0, -1)
+    const firstIndex = deltaPath[deltaPath.length - 1]
+
+    let { root } = this
+    for (let i = 0; i < count; i++) {
+      const path = [...parentPath, firstIndex + i]
+      const existingNode = root.getIn(path)
+      if (existingNode == null) {
+        throw new Error(
+          `Can't keep unchanged node: invalid deltaPath: ${path}`
+        )
+      }
+      root = root.setIn(path, existingNode.withReportId(reportId), reportId)
+    }
+    return new ReportRoot(root)
+  }
 }
 
 function getRootContainerName(deltaPath: number[]): string {
@@ -16,7 +16,13 @@
  */
 
 import styled from "@emotion/styled"
-import { BackMsg, ForwardMsg, IBackMsg } from "autogen/proto"
+import {
+  BackMsg,
+  ForwardMsg,
+  ForwardMsgList,
+  IBackMsg,
+  SessionEvent,
+} from "autogen/proto"
 
 import axios from "axios"
 import { ConnectionState } from "lib/ConnectionState"
@@ -42,6 +48,17 @@ const SERVER_PING_PATH = "healthz"
  */
 const WEBSOCKET_STREAM_PATH = "stream"
 
+/**
+ * Version of the websocket protocol we speak, which we pass to the server
+ * when we connect. From version 2 on, each websocket frame is a
+ * ForwardMsgList rather than a single ForwardMsg. From version 3 on, the
+ * server may send a Delta with unchangedCount instead of elements that
+ * haven't changed since it last sent them.
+ * (See BATCHED_PROTOCOL_VERSION and UNCHANGED_DELTAS_PROTOCOL_VERSION in
+ * server.py.)
+ */
+const PROTOCOL_VERSION = 3
+
 /**
  * Wait this long between pings, in millis.
  */
@@ -93,7 +110,7 @@ interface Args {
 }
 
 interface MessageQueue {
-  [index: number]: any
+  [index: number]: ForwardMsg[]
 }
 
 /**
@@ -144,18 +161,18 @@ export class WebsocketConnection {
 
   /**
    * To guarantee packet transmission order, this is the index of the last
-   * dispatched incoming message.
+   * dispatched incoming websocket frame.
    */
   private lastDispatchedMessageIndex = -1
 
   /**
-   * And this is the index of the next message we recieve.
+   * And this is the index of the next frame we recieve.
    */
   private nextMessageIndex = 0
 
   /**
-   * This dictionary stores recieved messages that we haven't sent out yet
-   * (because we're still decoding previous messages)
+   * This dictionary stores the messages from recieved frames that we haven't
+   * sent out yet (because we're still decoding previous frames)
    */
   private messageQueue: MessageQueue = {}
 
@@ -177,6 +194,25 @@ export class WebsocketConnection {
    */
   private wsConnectionTimeoutId?: number
 
+  /**
+   * The id of our session on the server, once we've been told it. When we
+   * reconnect, we ask the server to resume this session, so that it only
+   * sends us the messages we missed instead of rerunning the script.
+   */
+  private sessionId?: string
+
+  /**
+   * How many of our session's messages we've dispatched. The server sends
+   * the ones after these when it resumes the session.
+   */
+  private dispatchedMsgCount = 0
+
+  /**
+   * True from the time we ask the server to resume our session until it
+   * tells us whether it did.
+   */
+  private resumingSession = false
+
   constructor(props: Args) {
     this.args = props
     this.cache = new ForwardMsgCache(() => this.getBaseUriParts())
@@ -194,6 +230,22 @@ export class WebsocketConnection {
     return undefined
   }
 
+  /**
+   * True if we asked the server to resume our session when we connected,
+   * and are waiting to hear whether it did. If it didn't, a
+   * SessionEvent.sessionResumed=false message will follow.
+   */
+  public isResumingSession(): boolean {
+    return this.resumingSession
+  }
+
+  /**
+   * True if we'll ask the server to resume our session if we reconnect.
+   */
+  public canResumeSession(): boolean {
+    return this.sessionId != null
+  }
+
   // This should only be called inside stepFsm().
   private setFsmState(state: ConnectionState, errMsg?: string): void {
     logMessage(LOG, `New state: ${state}`)
@@ -319,10 +371,16 @@ export class WebsocketConnection {
   }
 
   private connectToWebSocket(): void {
-    const uri = buildWsUri(
+    let uri = `${buildWsUri(
       this.args.baseUriPartsList[this.uriIndex],
       WEBSOCKET_STREAM_PATH
-    )
+    )}?protocolVersion=${PROTOCOL_VERSION}`
+
+    this.resumingSession = this.sessionId != null
+    if (this.sessionId != null) {
+      uri += `&sessionId=${encodeURIComponent(this.sessionId)}`
+      uri += `&lastSeq=${this.dispatchedMsgCount}`
+    }
 
     if (this.websocket != null) {
       // This should never happen. We set the websocket to null in both FSM
@@ -451,7 +509,7 @@ export class WebsocketConnection {
   }
 
   private async handleMessage(data: any): Promise<void> {
-    // Assign this message an index.
+    // Assign this frame an index.
     const messageIndex = this.nextMessageIndex
     this.nextMessageIndex += 1
 
@@ -466,22 +524,56 @@ export class WebsocketConnection {
     }
 
     const resultArray = new Uint8Array(result)
-    const msg = ForwardMsg.decode(resultArray)
-    this.messageQueue[messageIndex] = await this.cache.processMessagePayload(
-      msg
+    const { messages } = ForwardMsgList.decode(resultArray)
+    this.messageQueue[messageIndex] = await Promise.all(
+      messages.map(msg =>
+        this.cache.processMessagePayload(ForwardMsg.fromObject(msg))
+      )
     )
 
     // Dispatch any pending messages in the queue. This may *not* result
-    // in our just-decoded message being dispatched: if there are other
-    // messages that were received earlier than this one but are being
-    // downloaded, our message won't be sent until they're done.
+    // in our just-decoded messages being dispatched: if there are other
+    // messages that were received earlier than these but are being
+    // downloaded, our messages won't be sent until they're done.
     while (this.lastDispatchedMessageIndex + 1 in this.messageQueue) {
       const dispatchMessageIndex = this.lastDispatchedMessageIndex + 1
-      this.args.onMessage(this.messageQueue[dispatchMessageIndex])
+      this.messageQueue[dispatchMessageIndex].forEach(msg => {
+        this.trackSession(msg)
+        this.args.onMessage(msg)
+      })
       delete this.messageQueue[dispatchMessageIndex]
       this.lastDispatchedMessageIndex = dispatchMessageIndex
     }
   }
+
+  /**
+   * Keep track of our session's id, and of how many of its messages we've
+   * dispatched, so that we can resume the session if we reconnect.
+   */
+  private trackSession(msg: ForwardMsg): void {
+    const sessionEvent = msg.sessionEvent as SessionEvent | null | undefined
+    if (
+      msg.type === "sessionEvent" &&
+      sessionEvent != null &&
+      sessionEvent.type === "sessionResumed"
+    ) {
+      // The server doesn't count this message.
+      this.resumingSession = false
+      if (!sessionEvent.sessionResumed) {
+        // We have a new session. We'll learn its id from its first
+        // NewReport message.
+        this.sessionId = undefined
+        this.dispatchedMsgCount = 0
+      }
+      return
+    }
+
+    this.dispatchedMsgCount += 1
+
+    if (msg.type === "newReport" && msg.newReport?.initialize?.sessionId) {
+      this.sessionId = msg.newReport.initialize.sessionId
+    }
+  }
 }
 
 const StyledBashCode = styled.code({
@@ -486,6 +486,16 @@ export function addRows(element: any, namedDataSet: any): any {
       })
   }
 
+  // Keep only the last maxRows rows, like the server does when it combines
+  // add_rows deltas.
+  const maxRows = namedDataSet.get("maxRows")
+  if (maxRows > 0) {
+    newDataFrame = dropHeadRows(
+      newDataFrame,
+      indexLen(newDataFrame.get("index")) - maxRows
+    )
+  }
+
   if (existingDataSet) {
     return setDataFrameInNamedDataSet(
       element,
@@ -496,6 +506,47 @@ export function addRows(element: any, namedDataSet: any): any {
   return setDataFrame(element, newDataFrame)
 }
 
+/**
+ * Removes the first numRows rows of the dataframe, returning a new one.
+ */
+function dropHeadRows(df: any, numRows: number): any {
+  if (numRows <= 0) {
+    return df
+  }
+
+  const sliceAnyArray = (anyArray: any): any =>
+    anyArray.updateIn([anyArray.get("type"), "data"], (array: any) =>
+      array.slice(numRows)
+    )
+  const sliceData = (idx: any): any =>
+    idx.updateIn(["data", "data"], (data: any) => data.slice(numRows))
+
+  return df
+    .update("index", (index: any) =>
+      updateOneOf(index, "type", {
+        plainIndex: (idx: any) => idx.update("data", sliceAnyArray),
+        rangeIndex: (idx: any) =>
+          idx.update("start", (start: any) => start + numRows),
+        multiIndex: (idx: any) =>
+          idx.update("labels", (labels: any) =>
+            labels.map((label: any) =>
+              label.update("data", (data: any) => data.slice(numRows))
+            )
+          ),
+        int_64Index: sliceData,
+        float_64Index: sliceData,
+        datetimeIndex: sliceData,
+        timedeltaIndex: sliceData,
+      })
+    )
+    .updateIn(["data", "cols"], (cols: any) => cols.map(sliceAnyArray))
+    .updateIn(["style", "cols"], (styleCols: any) =>
+      styleCols.map((styleCol: any) =>
+        styleCol.update("styles", (styles: any) => styles.slice(numRows))
+      )
+    )
+}
+
 /**
  * Concatenates the indices and returns a new index.
  */
@@ -284,7 +284,7 @@ def run(script_path, command_line, args):
 
     # (Must come after start(), because this starts a new thread and start()
     # may call sys.exit() which doesn't kill other threads.
-    server.add_preheated_report_session()
+    server.fill_preheated_session_pool()
 
     # Start the ioloop. This function will not return until the
     # server is shut down.
@@ -16,25 +16,33 @@
 
 import ast
 import contextlib
+import copy
 import functools
 import hashlib
 import inspect
+import itertools
 import math
 import os
 import pickle
 import shutil
 import struct
+import sys
 import textwrap
 import threading
 import time
 from collections import namedtuple
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from types import TracebackType
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from cachetools import TTLCache
 
 from streamlit import config
 from streamlit import file_util
+from streamlit import type_util
 from streamlit import util
+from streamlit.errors import StreamlitAPIException
 from streamlit.errors import StreamlitAPIWarning
 from streamlit.errors import StreamlitDeprecationWarning
 from streamlit.hashing import Context
@@ -55,16 +63,93 @@ _CacheEntry = namedtuple("_CacheEntry", ["value", "hash"])
 _DiskCacheEntry = namedtuple("_DiskCacheEntry", ["value"])
 
 
+class _MemCache(TTLCache):
+    """The in-memory cache of one st.cache'd function.
+
+    On top of TTLCache's max_entries and ttl limits, it tells _MemCaches
+    the size of each value it stores and when each value is used, so that
+    the least recently used values can be evicted when the function's
+    max_bytes or global.cacheMaxBytes is exceeded.
+
+    With refresh="background", values don't expire after ttl. They become
+    stale instead, and are served until they're replaced by a background
+    refresh.
+    """
+
+    def __init__(
+        self,
+        mem_caches: "_MemCaches",
+        max_entries: float,
+        ttl: float,
+        max_bytes: Optional[int],
+        refresh: Optional[str],
+    ):
+        super(_MemCache, self).__init__(
+            maxsize=max_entries,
+            ttl=math.inf if refresh == "background" else ttl,
+            timer=_TTLCACHE_TIMER,
+        )
+        self.value_ttl = ttl
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        # The total size of this cache's values, as tracked by _MemCaches.
+        self.size = 0
+        self._mem_caches = mem_caches
+        # Dict[key] -> time at which the value becomes stale
+        self._stale_at = {}  # type: Dict[str, float]
+
+    def is_stale(self, key: str) -> bool:
+        """True if the value for key should be refreshed in the
+        background."""
+        stale_at = self._stale_at.get(key)
+        return stale_at is not None and not (self.timer() < stale_at)
+
+    def __getitem__(self, key):
+        with self._mem_caches._lock:
+            entry = super(_MemCache, self).__getitem__(key)
+            self._mem_caches._touch(self, key)
+            return entry
+
+    def __setitem__(self, key, entry):
+        size = _get_value_size(entry.value)
+        with self._mem_caches._lock:
+            super(_MemCache, self).__setitem__(key, entry)
+            if self.refresh == "background":
+                self._stale_at[key] = self.timer() + self.value_ttl
+            self._mem_caches._add(self, key, size)
+
+    def __delitem__(self, key):
+        with self._mem_caches._lock:
+            try:
+                super(_MemCache, self).__delitem__(key)
+            finally:
+                self._stale_at.pop(key, None)
+                self._mem_caches._remove(self, key)
+
+
 class _MemCaches(object):
     """Manages all in-memory st.cache caches"""
 
     def __init__(self):
         # Contains a cache object for each st.cache'd function
         self._lock = threading.RLock()
-        self._function_caches = {}  # type: Dict[str, TTLCache]
+        self._function_caches = {}  # type: Dict[str, _MemCache]
+
+        # The size of every value in every cache, from least to most
+        # recently used.
+        # OrderedDict[(id(mem_cache), key)] -> (mem_cache, size)
+        self._entries = (
+            OrderedDict()
+        )  # type: OrderedDict[Tuple[int, str], Tuple[_MemCache, int]]
+        self._size = 0
 
     def get_cache(
-        self, key: str, max_entries: Optional[float], ttl: Optional[float]
+        self,
+        key: str,
+        max_entries: Optional[float],
+        ttl: Optional[float],
+        max_bytes: Optional[int] = None,
+        refresh: Optional[str] = None,
     ) -> TTLCache:
         """Return the mem cache for the given key.
 
@@ -80,6 +165,8 @@ class _MemCaches(object):
             raise RuntimeError("max_entries must be an int")
         if not isinstance(ttl, (int, float)):
             raise RuntimeError("ttl must be a float")
+        if max_bytes is not None and not isinstance(max_bytes, int):
+            raise RuntimeError("max_bytes must be an int")
 
         # Get the existing cache, if it exists, and validate that its params
         # haven't changed.
@@ -87,19 +174,27 @@ class _MemCaches(object):
             mem_cache = self._function_caches.get(key)
             if (
                 mem_cache is not None
-                and mem_cache.ttl == ttl
+                and mem_cache.value_ttl == ttl
                 and mem_cache.maxsize == max_entries
+                and mem_cache.max_bytes == max_bytes
+                and mem_cache.refresh == refresh
             ):
                 return mem_cache
 
+            if mem_cache is not None:
+                self._remove_cache(mem_cache)
+
             # Create a new cache object and put it in our dict
             _LOGGER.debug(
-                "Creating new mem_cache (key=%s, max_entries=%s, ttl=%s)",
+                "Creating new mem_cache (key=%s, max_entries=%s, ttl=%s, "
+                "max_bytes=%s, refresh=%s)",
                 key,
                 max_entries,
                 ttl,
+                max_bytes,
+                refresh,
             )
-            mem_cache = TTLCache(maxsize=max_entries, ttl=ttl, timer=_TTLCACHE_TIMER)
+            mem_cache = _MemCache(self, max_entries, ttl, max_bytes, refresh)
             self._function_caches[key] = mem_cache
             return mem_cache
 
@@ -107,12 +202,218 @@ class _MemCaches(object):
         """Clear all caches"""
         with self._lock:
             self._function_caches = {}
+            self._entries.clear()
+            self._size = 0
+
+    def _add(self, mem_cache: _MemCache, key: str, size: int) -> None:
+        """Record the size of a value that was just stored in a cache, and
+        evict values if that takes us over a budget."""
+        self._remove(mem_cache, key)
+        self._entries[(id(mem_cache), key)] = (mem_cache, size)
+        mem_cache.size += size
+        self._size += size
+        self._evict_if_needed(mem_cache)
+
+    def _touch(self, mem_cache: _MemCache, key: str) -> None:
+        entry_key = (id(mem_cache), key)
+        if entry_key in self._entries:
+            self._entries.move_to_end(entry_key)
+
+    def _remove(self, mem_cache: _MemCache, key: str) -> None:
+        entry = self._entries.pop((id(mem_cache), key), None)
+        if entry is not None:
+            mem_cache.size -= entry[1]
+            self._size -= entry[1]
+
+    def _remove_cache(self, mem_cache: _MemCache) -> None:
+        """Stop tracking a cache that's been replaced."""
+        for cache, key in self._get_entries():
+            if cache is mem_cache:
+                self._remove(cache, key)
+
+    def _get_entries(self) -> List[Tuple[_MemCache, str]]:
+        """Return the cache and key of every value, from least to most
+        recently used."""
+        return [(cache, key) for (_, key), (cache, _) in self._entries.items()]
+
+    def _evict_if_needed(self, mem_cache: _MemCache) -> None:
+        """Evict the least recently used values until mem_cache is within
+        its max_bytes, and all caches are within global.cacheMaxBytes."""
+        max_size = config.get_option("global.cacheMaxBytes")
+
+        def is_over_budget():
+            return (
+                mem_cache.max_bytes is not None and mem_cache.size > mem_cache.max_bytes
+            ) or (max_size > 0 and self._size > max_size)
+
+        if not is_over_budget():
+            return
+
+        # Values that TTLCache expired or evicted on its own are still
+        # counted, so forget those before evicting anything that's in use.
+        entries = self._get_entries()
+        for cache in {id(cache): cache for cache, _ in entries}.values():
+            cache.expire()
+        for cache, key in entries:
+            if key not in cache:
+                self._remove(cache, key)
+
+        for cache, key in self._get_entries():
+            if not is_over_budget():
+                break
+
+            # While only mem_cache is over its own budget, its values are
+            # the ones to evict.
+            if cache is not mem_cache and not (max_size > 0 and self._size > max_size):
+                continue
+
+            _LOGGER.debug("Evicting mem_cache value (key=%s)", key)
+            try:
+                del cache[key]
+            except KeyError:
+                pass
 
 
 # Our singleton _MemCaches instance
 _mem_caches = _MemCaches()
 
 
+class _InFlightCall(object):
+    """A call of a cached function that's computing a value other threads
+    may be waiting for."""
+
+    def __init__(self):
+        self.owner = threading.get_ident()
+        self.done = threading.Event()
+        self.value = None  # type: Any
+        self.exception = None  # type: Optional[BaseException]
+        self.traceback = None  # type: Optional[TracebackType]
+
+
+def _copy_exception(e):
+    """Return a copy of e that waiters can raise without sharing e's
+    traceback, context, or cause with the owner and each other."""
+    try:
+        return copy.copy(e)
+    except Exception:
+        # Some exceptions can't be rebuilt from their args.
+        return e
+
+
+class _InFlightCalls(object):
+    """Deduplicates concurrent cache misses for the same value.
+
+    When many sessions miss the same key at once, only the first one calls
+    the cached function. The others wait for its value, or for its
+    exception if it fails.
+    """
+
+    # How often waiting threads wake up, so that a stop or rerun request
+    # can still interrupt their script.
+    WAIT_INTERVAL_SECS = 0.1
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # type: Dict[str, _InFlightCall]
+
+    def call(self, key: str, create_value):
+        """Return create_value(), unless another thread is already creating
+        the value for this key, in which case wait for it and return it
+        instead."""
+        while True:
+            with self._lock:
+                in_flight = self._calls.get(key)
+                if in_flight is None or in_flight.owner == threading.get_ident():
+                    # There's nothing to wait for, or this thread is the
+                    # one computing the value (the function is recursive).
+                    in_flight = _InFlightCall()
+                    self._calls[key] = in_flight
+                    is_owner = True
+                else:
+                    is_owner = False
+
+            if is_owner:
+                return self._create(key, in_flight, create_value)
+
+            _LOGGER.debug("Waiting for in-flight cache miss: %s", key)
+            while not in_flight.done.wait(self.WAIT_INTERVAL_SECS):
+                pass
+
+            if in_flight.exception is None:
+                return in_flight.value
+            if isinstance(in_flight.exception, Exception):
+                raise _copy_exception(in_flight.exception).with_traceback(
+                    in_flight.traceback
+                )
+            # The owner's script was stopped or rerun before the value was
+            # ready. Try again, perhaps as the owner.
+
+    def _create(self, key, in_flight, create_value):
+        try:
+            in_flight.value = create_value()
+            return in_flight.value
+        except BaseException as e:
+            in_flight.exception = e
+            # Grab the traceback before the owner re-raises, which prepends
+            # the owner's own frames to e.__traceback__.
+            in_flight.traceback = e.__traceback__
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is in_flight:
+                    del self._calls[key]
+            in_flight.done.set()
+
+
+# Our singleton _InFlightCalls instance
+_in_flight_calls = _InFlightCalls()
+
+
+class _BackgroundRefreshes(object):
+    """Recomputes the stale values of st.cache(refresh="background")
+    functions on a small pool of threads, while their callers keep getting
+    the stale values."""
+
+    MAX_WORKERS = 4
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None  # type: Optional[ThreadPoolExecutor]
+        # The keys of the values being refreshed.
+        self._keys = set()  # type: Set[str]
+
+    def submit(self, key: str, refresh) -> None:
+        """Call refresh() in the background, unless the value for this key
+        is already being refreshed."""
+        with self._lock:
+            if key in self._keys:
+                return
+            self._keys.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.MAX_WORKERS,
+                    thread_name_prefix="CacheRefresh",
+                )
+            executor = self._executor
+
+        _LOGGER.debug("Refreshing stale value in the background: %s", key)
+        executor.submit(self._refresh, key, refresh)
+
+    def _refresh(self, key, refresh):
+        try:
+            refresh()
+        except Exception:
+            # Keep serving the stale value. The next hit will try again.
+            _LOGGER.warning("Unable to refresh cached value %s", key, exc_info=True)
+        finally:
+            with self._lock:
+                self._keys.discard(key)
+
+
+# Our singleton _BackgroundRefreshes instance
+_background_refreshes = _BackgroundRefreshes()
+
+
 # A thread-local counter that's incremented when we enter @st.cache
 # and decremented when we exit.
 class ThreadLocalCacheInfo(threading.local):
@@ -231,9 +532,14 @@ class _AddCopy(ast.NodeTransformer):
 def _read_from_mem_cache(
     mem_cache, key, allow_output_mutation, func_or_code, hash_funcs
 ):
-    if key in mem_cache:
+    try:
+        # Another thread may evict the entry at any time, so look it up just
+        # once.
         entry = mem_cache[key]
+    except KeyError:
+        entry = None
 
+    if entry is not None:
         if not allow_output_mutation:
             computed_output_hash = _get_output_hash(
                 entry.value, func_or_code, hash_funcs
@@ -258,12 +564,25 @@ def _write_to_mem_cache(
     if allow_output_mutation:
         hash = None
     else:
-        hash = _get_output_hash(value, func_or_code, hash_funcs)
+        hash = _get_output_hash(value, func_or_code, hash_funcs, freeze=True)
 
     mem_cache[key] = _CacheEntry(value=value, hash=hash)
 
 
-def _get_output_hash(value, func_or_code, hash_funcs):
+def _get_output_hash(value, func_or_code, hash_funcs, freeze=False):
+    """Hash a cached function's return value, to tell if it's mutated.
+
+    Unless client.strictCacheMutationCheck is set, arrays and pandas
+    objects are fingerprinted instead of hashed. If freeze is True, which
+    it is when the value is being cached, they're also made read-only so
+    that their data can't be changed in place.
+    """
+    if not config.get_option("client.strictCacheMutationCheck"):
+        fingerprint_funcs = _get_fingerprint_hash_funcs(freeze)
+        # The user's hash_funcs take precedence.
+        fingerprint_funcs.update(hash_funcs or {})
+        hash_funcs = fingerprint_funcs
+
     hasher = hashlib.new("md5")
     update_hash(
         value,
@@ -275,38 +594,246 @@ def _get_output_hash(value, func_or_code, hash_funcs):
     return hasher.digest()
 
 
-def _read_from_disk_cache(key):
-    path = file_util.get_streamlit_file_path("cache", "%s.pickle" % key)
+def _is_ndarray(obj):
+    """True for plain NumPy arrays, and the memmaps that persisted arrays
+    are read as. (Other subclasses, such as masked arrays, carry more than
+    their data buffer.)"""
+    return type_util.is_type(obj, "numpy.ndarray") or type_util.is_type(
+        obj, "numpy.memmap"
+    )
+
+
+def _get_fingerprint_hash_funcs(freeze):
+    """Return hash_funcs that fingerprint NumPy arrays and pandas objects
+    by their data buffers, rather than hashing their data."""
+
+    def get_array_fingerprint(arr):
+        if freeze:
+            arr.flags.writeable = False
+        return (
+            arr.__array_interface__["data"][0],
+            arr.shape,
+            arr.strides,
+            arr.dtype.str,
+            arr.flags.writeable,
+        )
+
+    def get_pandas_fingerprint(obj):
+        if type_util.is_dataframe(obj):
+            labels = tuple(obj.columns)
+        else:
+            labels = obj.name
+
+        try:
+            arrays = [block.values for block in obj._mgr.blocks]
+        except AttributeError:
+            # This pandas version keeps its data elsewhere.
+            arrays = None
+        if arrays is None or not all(_is_ndarray(arr) for arr in arrays):
+            # Extension arrays (categoricals, nullable ints...) don't have a
+            # single data buffer to fingerprint, so hash the data.
+            import pandas as pd
+
+            try:
+                return labels, int(pd.util.hash_pandas_object(obj).sum())
+            except TypeError:
+                return labels, pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+
+        return (
+            labels,
+            id(obj.index),
+            len(obj.index),
+            tuple(get_array_fingerprint(arr) for arr in arrays),
+        )
+
+    return {
+        "numpy.ndarray": get_array_fingerprint,
+        # Persisted arrays are read from disk as memmaps.
+        "numpy.memmap": get_array_fingerprint,
+        "pandas.core.frame.DataFrame": get_pandas_fingerprint,
+        "pandas.core.series.Series": get_pandas_fingerprint,
+    }
+
+
+# How deep _get_value_size walks into nested containers, and how many of
+# each container's elements it looks at. The size of the rest is
+# extrapolated from those.
+_VALUE_SIZE_MAX_DEPTH = 4
+_VALUE_SIZE_MAX_SAMPLES = 100
+
+
+def _get_value_size(value, _depth=0, _seen=None):
+    """Estimate how many bytes of memory a cached value takes up.
+
+    This has to be cheap, so it uses the size of the data buffers of arrays
+    and DataFrames (not counting the Python objects that object columns
+    point to), and sys.getsizeof for everything else. It walks into lists,
+    tuples, sets and dicts, but only _VALUE_SIZE_MAX_DEPTH levels deep, and
+    only into the first _VALUE_SIZE_MAX_SAMPLES elements of each: the other
+    elements are assumed to be the same size on average.
+    """
+    if _seen is None:
+        _seen = set()  # type: Set[int]
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    if isinstance(value, (dict, list, tuple, set, frozenset)):
+        size = sys.getsizeof(value)
+        if not value or _depth >= _VALUE_SIZE_MAX_DEPTH:
+            return size
+
+        if isinstance(value, dict):
+            elements = itertools.chain.from_iterable(value.items())
+            num_elements = 2 * len(value)
+        else:
+            elements = iter(value)
+            num_elements = len(value)
+        sample = list(itertools.islice(elements, _VALUE_SIZE_MAX_SAMPLES))
+        sample_size = sum(
+            _get_value_size(element, _depth + 1, _seen) for element in sample
+        )
+        return size + sample_size * num_elements // len(sample)
+
+    if type_util.is_dataframe(value):
+        return int(value.memory_usage(index=True, deep=False).sum())
+
+    # numpy arrays, pandas Series and Indexes, pyarrow Tables...
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    return sys.getsizeof(value)
+
+
+# The formats of disk cache files, in the order _read_from_disk_cache looks
+# for them. DataFrames are stored as Arrow IPC files, and NumPy arrays as
+# .npy files, so that they can be memory-mapped when they're read. Anything
+# else is pickled.
+_DISK_CACHE_FORMATS = ("arrow", "npy", "pickle")
+
+
+def _get_disk_cache_path(key, disk_format):
+    return file_util.get_streamlit_file_path("cache", "%s.%s" % (key, disk_format))
+
+
+def _read_from_disk_cache(key, allow_output_mutation=True):
+    """Read a value from the disk cache.
+
+    Arrow and .npy files are memory-mapped, so their data is only read
+    from disk when it's used. Unless allow_output_mutation is True, the
+    arrays backed by the mapping are read-only.
+    """
+    for disk_format in _DISK_CACHE_FORMATS:
+        path = _get_disk_cache_path(key, disk_format)
+        if os.path.exists(path):
+            break
+    else:
+        raise CacheKeyNotFoundError("Key not found in disk cache")
+
     try:
-        with file_util.streamlit_read(path, binary=True) as input:
-            entry = pickle.load(input)
-            value = entry.value
-            _LOGGER.debug("Disk cache HIT: %s", type(value))
+        if disk_format == "arrow":
+            value = _read_arrow_file(path, allow_output_mutation)
+        elif disk_format == "npy":
+            import numpy as np
+
+            # Copy-on-write mappings can be mutated without changing the file.
+            mmap_mode = "c" if allow_output_mutation else "r"
+            value = np.load(path, mmap_mode=mmap_mode, allow_pickle=False)
+        else:
+            with file_util.streamlit_read(path, binary=True) as input:
+                entry = pickle.load(input)
+                value = entry.value
+        _LOGGER.debug("Disk cache HIT: %s", type(value))
     except util.Error as e:
         _LOGGER.error(e)
         raise CacheError("Unable to read from cache: %s" % e)
 
     except FileNotFoundError:
         raise CacheKeyNotFoundError("Key not found in disk cache")
+
+    except (OSError, ValueError, EOFError) as e:
+        _LOGGER.error(e)
+        raise CacheError("Unable to read from cache: %s" % e)
     return value
 
 
+def _read_arrow_file(path, allow_output_mutation):
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    if allow_output_mutation:
+        # Consolidating the columns into blocks copies them into memory.
+        return table.to_pandas()
+    # Otherwise, columns that don't need converting (numbers without
+    # nulls...) keep pointing into the mapped file.
+    return table.to_pandas(split_blocks=True)
+
+
+def _get_arrow_table(value):
+    """Return value as an Arrow table if it's a DataFrame that Arrow can
+    store, or None."""
+    if not type_util.is_type(value, "pandas.core.frame.DataFrame"):
+        return None
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+
+    try:
+        return pa.Table.from_pandas(value)
+    except (pa.ArrowException, TypeError, ValueError) as e:
+        # e.g. object columns with mixed types.
+        _LOGGER.debug("Pickling DataFrame that Arrow can't store: %s", e)
+        return None
+
+
 def _write_to_disk_cache(key, value):
-    path = file_util.get_streamlit_file_path("cache", "%s.pickle" % key)
+    table = _get_arrow_table(value)
+    if table is not None:
+        disk_format = "arrow"
+    elif _is_ndarray(value) and not value.dtype.hasobject:
+        disk_format = "npy"
+    else:
+        disk_format = "pickle"
+
+    path = _get_disk_cache_path(key, disk_format)
+    # Write to a temporary file and move it into place, so that values
+    # that are memory-mapped from the previous file can still be read.
+    temp_path = "%s.%s-%s.tmp" % (path, os.getpid(), threading.get_ident())
 
     try:
-        with file_util.streamlit_write(path, binary=True) as output:
-            entry = _DiskCacheEntry(value=value)
-            pickle.dump(entry, output, pickle.HIGHEST_PROTOCOL)
-    except util.Error as e:
+        with file_util.streamlit_write(temp_path, binary=True) as output:
+            if disk_format == "arrow":
+                import pyarrow as pa
+
+                with pa.ipc.new_file(output, table.schema) as writer:
+                    writer.write_table(table)
+            elif disk_format == "npy":
+                import numpy as np
+
+                np.save(output, value, allow_pickle=False)
+            else:
+                entry = _DiskCacheEntry(value=value)
+                pickle.dump(entry, output, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except (util.Error, OSError) as e:
         _LOGGER.debug(e)
         # Clean up file so we don't leave zero byte files.
         try:
-            os.remove(path)
+            os.remove(temp_path)
         except (FileNotFoundError, IOError, OSError):
             pass
         raise CacheError("Unable to write to cache: %s" % e)
 
+    # Don't let a file from an older value of another type shadow this one.
+    for other_format in _DISK_CACHE_FORMATS:
+        if other_format != disk_format:
+            try:
+                os.remove(_get_disk_cache_path(key, other_format))
+            except (FileNotFoundError, IOError, OSError):
+                pass
+
 
 def _read_from_cache(
     mem_cache, key, persist, allow_output_mutation, func_or_code, hash_funcs=None
@@ -328,7 +855,7 @@ def _read_from_cache(
 
     except CacheKeyNotFoundError as e:
         if persist:
-            value = _read_from_disk_cache(key)
+            value = _read_from_disk_cache(key, allow_output_mutation)
             _write_to_mem_cache(
                 mem_cache, key, value, allow_output_mutation, func_or_code, hash_funcs
             )
@@ -355,6 +882,8 @@ def cache(
     hash_funcs=None,
     max_entries=None,
     ttl=None,
+    max_bytes=None,
+    refresh=None,
 ):
     """Function decorator to memoize function executions.
 
@@ -372,6 +901,11 @@ def cache(
 
         If you know what you're doing and would like to override this warning, set this to True.
 
+        Unless this is True, NumPy arrays and pandas DataFrames and Series
+        that are returned are made read-only, so that changing their data
+        in place raises an error. See the client.strictCacheMutationCheck
+        config option.
+
     show_spinner : boolean
         Enable the spinner. Default is True to show a spinner when there is
         a cache miss.
@@ -396,6 +930,21 @@ def cache(
         The maximum number of seconds to keep an entry in the cache, or
         None if cache entries should not expire. The default is None.
 
+    max_bytes : int or None
+        The maximum total size, in bytes, of the values to keep in the
+        cache, or None for no limit. (When it's exceeded, the least recently
+        used entries are removed.) Sizes are estimated: arrays and
+        DataFrames count the size of their data. All cached functions
+        together are also limited by the global.cacheMaxBytes config
+        option. The default is None.
+
+    refresh : "background" or None
+        What to do when an entry's ttl is up. With None, the entry is
+        removed, and the next call with the same arguments runs the function
+        again while the caller waits. With "background", the next call
+        returns the stale value right away, and the function runs again in
+        a background thread to replace it. The default is None.
+
     Example
     -------
     >>> @st.cache
@@ -458,6 +1007,13 @@ def cache(
             hash_funcs=hash_funcs,
             max_entries=max_entries,
             ttl=ttl,
+            max_bytes=max_bytes,
+            refresh=refresh,
+        )
+
+    if refresh not in (None, "background"):
+        raise StreamlitAPIException(
+            'The `refresh` parameter of `st.cache` must be None or "background".'
         )
 
     # Create the unique key for this function's cache. The cache will be
@@ -530,7 +1086,9 @@ def cache(
         def get_or_create_cached_value():
             # First, get the cache that's attached to this function.
             # This cache's key is generated (above) from the function's code.
-            mem_cache = _mem_caches.get_cache(cache_key, max_entries, ttl)
+            mem_cache = _mem_caches.get_cache(
+                cache_key, max_entries, ttl, max_bytes, refresh
+            )
 
             # Next, calculate the key for the value we'll be searching for
             # within that cache. This key is generated from both the function's
@@ -577,26 +1135,56 @@ def cache(
                 )
                 _LOGGER.debug("Cache hit: %s", func)
 
+                if mem_cache.is_stale(value_key):
+                    _background_refreshes.submit(
+                        value_key, lambda: call_func(mem_cache, value_key)
+                    )
+
             except CacheKeyNotFoundError:
                 _LOGGER.debug("Cache miss: %s", func)
 
-                with _calling_cached_function(func):
-                    if suppress_st_warning:
-                        with suppress_cached_st_function_warning():
-                            return_value = func(*args, **kwargs)
-                    else:
-                        return_value = func(*args, **kwargs)
+                # If other sessions miss the same value at the same time,
+                # only one of them calls func.
+                return_value = _in_flight_calls.call(
+                    value_key, lambda: create_value(mem_cache, value_key)
+                )
 
-                _write_to_cache(
+            return return_value
+
+        def create_value(mem_cache, value_key):
+            # Another thread may have created the value while we were
+            # waiting to create it.
+            try:
+                return _read_from_cache(
                     mem_cache=mem_cache,
                     key=value_key,
-                    value=return_value,
-                    persist=persist,
+                    persist=False,
                     allow_output_mutation=allow_output_mutation,
                     func_or_code=func,
                     hash_funcs=hash_funcs,
                 )
+            except CacheKeyNotFoundError:
+                pass
 
+            return call_func(mem_cache, value_key)
+
+        def call_func(mem_cache, value_key):
+            with _calling_cached_function(func):
+                if suppress_st_warning:
+                    with suppress_cached_st_function_warning():
+                        return_value = func(*args, **kwargs)
+                else:
+                    return_value = func(*args, **kwargs)
+
+            _write_to_cache(
+                mem_cache=mem_cache,
+                key=value_key,
+                value=return_value,
+                persist=persist,
+                allow_output_mutation=allow_output_mutation,
+                func_or_code=func,
+                hash_funcs=hash_funcs,
+            )
             return return_value
 
         if show_spinner:
@@ -18,6 +18,7 @@ import os
 import toml
 import collections
 import secrets
+import tempfile
 import urllib
 from typing import Dict
 
@@ -296,6 +297,63 @@ _create_option(
     type_=int,
 )
 
+_create_option(
+    "global.messageCacheStore",
+    description="""Where to keep cached ForwardMsgs. Should be set to one of
+        these values:
+        - "memory" : in the server process's memory.
+        - "file" : in global.messageCacheDir, where every server process on
+          the host can read them. Use this when several server processes
+          are behind one load balancer, so that any of them can serve a
+          cached message.
+        """,
+    visibility="hidden",
+    default_val="memory",
+)
+
+_create_option(
+    "global.messageCacheDir",
+    description="""Directory for cached ForwardMsgs when
+        global.messageCacheStore is "file". Every server process that shares
+        the cache must use the same directory. Point it at a tmpfs, such as
+        /dev/shm, to keep the messages in shared memory.""",
+    visibility="hidden",
+    default_val=os.path.join(tempfile.gettempdir(), "streamlit-message-cache"),
+)
+
+_create_option(
+    "global.messageCacheMaxSizeMB",
+    description="""Max total size, in megabytes, of all the ForwardMsgs
+        cached on the server. (This isn't a limit on each message's size:
+        see global.minCachedMessageSize for that, in bytes.) When it's
+        exceeded, the least recently used messages are evicted, and are sent
+        in full if they're needed again. Set to 0 for no limit.""",
+    visibility="hidden",
+    default_val=500,
+    type_=int,
+)
+
+_create_option(
+    "global.maxReportMemory",
+    description="""Max size, in megabytes, of the messages that each session
+        keeps in memory for its current report run. They're used to save
+        the report. When it's exceeded, the oldest messages are spilled to a
+        temporary file. Set to 0 for no limit.""",
+    visibility="hidden",
+    default_val=0,
+    type_=int,
+)
+
+_create_option(
+    "global.cacheMaxBytes",
+    description="""Max total size, in bytes, of the values kept in memory by
+        all st.cache'd functions. When it's exceeded, the least recently
+        used values are evicted, whichever function they belong to. Set to
+        0 for no limit.""",
+    default_val=0,
+    type_=int,
+)
+
 
 # Config Section: Logger #
 _create_section("logger", "Settings to customize Streamlit log messages.")
@@ -345,6 +403,23 @@ _create_option(
     scriptable=True,
 )
 
+_create_option(
+    "client.strictCacheMutationCheck",
+    description="""How st.cache checks that the values it returns weren't
+        mutated, for functions without allow_output_mutation.
+
+        If false, NumPy arrays and pandas DataFrames and Series are made
+        read-only when they're cached, and a cache hit only checks that
+        their data buffers weren't replaced. This is fast, but changes to
+        mutable objects stored inside them aren't detected.
+
+        If true, the whole value is hashed again on every cache hit.
+        """,
+    default_val=False,
+    type_=bool,
+    scriptable=True,
+)
+
 _create_option(
     "client.displayEnabled",
     description="""If false, makes your Streamlit script not draw to a
@@ -379,6 +454,38 @@ _create_option(
     type_=bool,
 )
 
+_create_option(
+    "runner.asyncInterrupts",
+    description="""
+        Stop or rerun a running script as soon as it's asked to, by raising
+        an exception in its thread, rather than the next time it sends
+        something to the browser. Unlike runner.installTracer, this doesn't
+        slow your script down. A script that's in a long call into native
+        code (e.g. a big pandas operation) is interrupted when the call
+        returns. Has no effect if runner.installTracer is set, or on Python
+        implementations other than CPython.
+
+        The exception can be raised anywhere in the script's thread,
+        including inside Streamlit itself while it's sending a message or
+        writing to st.cache, so this is off by default.
+        """,
+    default_val=False,
+    type_=bool,
+)
+
+_create_option(
+    "runner.processPoolSize",
+    description="""
+        Number of worker processes to run scripts in. With more than one,
+        scripts from different sessions can use more than one CPU core at
+        the same time. Each worker process has its own st.cache, and runs
+        one session's script at a time. Set to 0 to run scripts on threads
+        in the server process.
+        """,
+    default_val=0,
+    type_=int,
+)
+
 _create_option(
     "runner.fixMatplotlib",
     description="""
@@ -558,6 +665,123 @@ def _server_enable_websocket_compression():
     return True
 
 
+@_create_option("server.websocketCompressionLevel", type_=int)
+def _server_websocket_compression_level():
+    """zlib compression level, from 1 (fastest) to 9 (smallest), for
+    compressed websocket messages.
+
+    Default: 6
+    """
+    return 6
+
+
+@_create_option("server.websocketCompressionMinSize", type_=int)
+def _server_websocket_compression_min_size():
+    """Websocket messages smaller than this many bytes are sent
+    uncompressed. (Larger messages are also sent uncompressed if they
+    don't compress well.)
+
+    Default: 1024
+    """
+    return 1024
+
+
+@_create_option("server.maxOutstandingWriteSize", type_=int)
+def _server_max_outstanding_write_size():
+    """Max size, in megabytes, of the messages that can be waiting to be
+    written to a single browser's websocket. When a browser is over this
+    limit, the server holds back new messages for it, and combines them
+    where possible, until the browser catches up. Set to 0 to disable.
+
+    Default: 32
+    """
+    return 32
+
+
+@_create_option("server.slowClientTimeout", type_=int)
+def _server_slow_client_timeout():
+    """How long, in seconds, a browser can stay over
+    server.maxOutstandingWriteSize before the server disconnects it.
+    Set to 0 to never disconnect slow browsers.
+
+    Default: 60
+    """
+    return 60
+
+
+@_create_option("server.sessionResumeGracePeriod", type_=int)
+def _server_session_resume_grace_period():
+    """How long, in seconds, to keep a session around after its browser
+    disconnects. If the browser reconnects within this time, it resumes the
+    session: it's sent the messages it missed, and the app isn't rerun.
+    Set to 0 to end sessions as soon as their browser disconnects.
+
+    Each disconnected session keeps its report, its media files, its
+    widget values and up to server.maxResumeBufferSize of sent messages in
+    memory, and its script keeps running, until the grace period ends. See
+    server.disconnectedSessionHibernateTimeout to release most of that
+    sooner.
+
+    Default: 0
+    """
+    return 0
+
+
+@_create_option("server.maxResumeBufferSize", type_=int)
+def _server_max_resume_buffer_size():
+    """Max size, in megabytes, of the messages kept for each session so that
+    they can be sent again if its browser reconnects. A browser that missed
+    more than this has to rerun the app instead of resuming its session.
+
+    Default: 2
+    """
+    return 2
+
+
+@_create_option("server.preheatedSessionPoolSize", type_=int)
+def _server_preheated_session_pool_size():
+    """How many sessions to keep ready for new browsers. Each of them runs
+    the app ahead of time, with the default widget values, so that a
+    browser that gets one doesn't have to wait for the app to run. The pool
+    is refilled as browsers take sessions from it.
+    Set to 0 to run the app only when a browser connects.
+
+    Each preheated session holds a full report in memory, and every refill
+    runs the app once more, even if no browser ever takes the session.
+
+    Default: 1
+    """
+    return 1
+
+
+@_create_option("server.idleSessionHibernateTimeout", type_=int)
+def _server_idle_session_hibernate_timeout():
+    """How long, in seconds, a session whose browser is connected can go
+    without running the app or receiving messages before it hibernates.
+    A hibernated session releases its report's messages, and keeps its
+    widget values so that its next run uses them. It keeps its media files
+    too, since its browser still shows them.
+    Set to 0 to never hibernate connected sessions.
+
+    Default: 0
+    """
+    return 0
+
+
+@_create_option("server.disconnectedSessionHibernateTimeout", type_=int)
+def _server_disconnected_session_hibernate_timeout():
+    """How long, in seconds, to keep a session's report in memory after its
+    browser disconnects. After this, the session hibernates until its
+    browser reconnects or server.sessionResumeGracePeriod ends it. A browser
+    that reconnects to a hibernated session reruns the app with its widget
+    values instead of being sent the messages it missed.
+    Set to 0 to never hibernate disconnected sessions.
+
+    Default: 0
+    """
+    return 0
+
+
 # Config Section: Browser #
 
 _create_section("browser", "Configuration of browser front-end.")
@@ -29,6 +29,7 @@ from streamlit.proto.RootContainer_pb2 import RootContainer
 from streamlit.logger import get_logger
 
 from streamlit.elements.utils import NoValue
+from streamlit.elements.utils import order_melted_data_by_row
 from streamlit.elements.balloons import BalloonsMixin
 from streamlit.elements.button import ButtonMixin
 from streamlit.elements.markdown import MarkdownMixin
@@ -313,6 +314,7 @@ class DeltaGenerator(
         last_index=None,
         element_width=None,
         element_height=None,
+        max_rows=None,
     ):
         """Create NewElement delta, fill it, and enqueue it.
 
@@ -328,6 +330,9 @@ class DeltaGenerator(
             Desired width for the element
         element_height : int or None
             Desired height for the element
+        max_rows : int or None
+            The number of rows that add_rows() keeps by default, for elements
+            that hold data
 
         Returns
         -------
@@ -375,7 +380,7 @@ class DeltaGenerator(
             # position.
             new_cursor = (
                 dg._cursor.get_locked_cursor(
-                    delta_type=delta_type, last_index=last_index
+                    delta_type=delta_type, last_index=last_index, max_rows=max_rows
                 )
                 if dg._cursor is not None
                 else None
@@ -438,7 +443,7 @@ class DeltaGenerator(
 
         return block_dg
 
-    def add_rows(self, data=None, **kwargs):
+    def add_rows(self, data=None, max_rows=None, **kwargs):
         """Concatenate a dataframe to the bottom of the current one.
 
         Parameters
@@ -447,6 +452,12 @@ class DeltaGenerator(
         or None
             Table to concat. Optional.
 
+        max_rows : int or None
+            If set, only the last max_rows rows of the combined data are kept,
+            both on the server and in the browser. Use this for elements that
+            stream data, so they don't grow without bound. Defaults to the
+            max_rows that the element was created with, if any.
+
         **kwargs : pandas.DataFrame, numpy.ndarray, Iterable, dict, or None
             The named dataset to concat. Optional. You can only pass in 1
             dataset (including the one in the data parameter).
@@ -489,6 +500,12 @@ class DeltaGenerator(
         ... }),
         >>> my_chart.add_rows(some_fancy_name=df2)  # <-- name used as keyword
 
+        To keep a chart that streams data from growing forever, only keep its
+        most recent rows:
+
+        >>> my_chart = st.line_chart(df1, max_rows=1000)
+        >>> my_chart.add_rows(df2)  # <-- keeps the last 1000 rows
+
         """
         if self._root_container is None or self._cursor is None:
             return self
@@ -496,6 +513,13 @@ class DeltaGenerator(
         if not self._cursor.is_locked:
             raise StreamlitAPIException("Only existing elements can `add_rows`.")
 
+        if max_rows is None:
+            max_rows = self._cursor.props.get("max_rows")
+        if max_rows is not None and (not isinstance(max_rows, int) or max_rows < 1):
+            raise StreamlitAPIException(
+                "max_rows must be a positive integer, not %s." % max_rows
+            )
+
         # Accept syntax st.add_rows(df).
         if data is not None and len(kwargs) == 0:
             name = ""
@@ -520,12 +544,16 @@ class DeltaGenerator(
             # match!
             st_method_name = self._cursor.props["delta_type"]
             st_method = getattr(self, st_method_name)
-            st_method(data, **kwargs)
+            st_method(data, max_rows=max_rows, **kwargs)
             return
 
-        data, self._cursor.props["last_index"] = _maybe_melt_data_for_add_rows(
-            data, self._cursor.props["delta_type"], self._cursor.props["last_index"]
+        data, last_index, max_rows = _maybe_melt_data_for_add_rows(
+            data,
+            self._cursor.props["delta_type"],
+            self._cursor.props["last_index"],
+            max_rows,
         )
+        self._cursor.props["last_index"] = last_index
 
         msg = ForwardMsg_pb2.ForwardMsg()
         msg.metadata.delta_path[:] = self._cursor.delta_path
@@ -538,12 +566,20 @@ class DeltaGenerator(
             msg.delta.add_rows.name = name
             msg.delta.add_rows.has_name = True
 
+        if max_rows is not None:
+            msg.delta.add_rows.max_rows = max_rows
+
         _enqueue_message(msg)
 
         return self
 
 
-def _maybe_melt_data_for_add_rows(data, delta_type, last_index):
+def _maybe_melt_data_for_add_rows(data, delta_type, last_index, max_rows=None):
+    """Reshape data for add_rows, if the delta type needs it.
+
+    Returns the data, the element's new last index, and the number of rows of
+    the reshaped data that max_rows corresponds to.
+    """
     import pandas as pd
     import streamlit.elements.data_frame as data_frame
 
@@ -577,9 +613,17 @@ def _maybe_melt_data_for_add_rows(data, delta_type, last_index):
         if index_name is None:
             index_name = "index"
 
+        num_columns = len(data.columns)
         data = pd.melt(data.reset_index(), id_vars=[index_name])
 
-    return data, last_index
+        if max_rows is not None:
+            # Each row became one row per column. Order them row by row, like
+            # generate_chart does when given max_rows, so the oldest rows are the
+            # first ones.
+            data = order_melted_data_by_row(data, num_columns)
+            max_rows *= num_columns
+
+    return data, last_index, max_rows
 
 
 def _get_pandas_index_attr(data, attr):
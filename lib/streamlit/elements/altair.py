@@ -27,10 +27,13 @@ import altair as alt
 import pandas as pd
 
 from .utils import last_index_for_melted_dataframes
+from .utils import order_melted_data_by_row
 
 
 class AltairMixin:
-    def line_chart(self, data=None, width=0, height=0, use_container_width=True):
+    def line_chart(
+        self, data=None, width=0, height=0, use_container_width=True, max_rows=None
+    ):
         """Display a line chart.
 
         This is syntax-sugar around st.altair_chart. The main difference
@@ -57,6 +60,11 @@ class AltairMixin:
             If True, set the chart width to the column width. This takes
             precedence over the width argument.
 
+        max_rows : int or None
+            If set, only the last max_rows rows of data are kept, including
+            when more are added with add_rows(). Use this for charts that
+            stream data, so they don't grow without bound.
+
         Example
         -------
         >>> chart_data = pd.DataFrame(
@@ -72,15 +80,20 @@ class AltairMixin:
         """
         vega_lite_chart_proto = VegaLiteChartProto()
 
-        chart = generate_chart("line", data, width, height)
+        chart = generate_chart("line", data, width, height, max_rows)
         marshall(vega_lite_chart_proto, chart, use_container_width)
         last_index = last_index_for_melted_dataframes(data)
 
         return self.dg._enqueue(
-            "line_chart", vega_lite_chart_proto, last_index=last_index
+            "line_chart",
+            vega_lite_chart_proto,
+            last_index=last_index,
+            max_rows=max_rows,
         )
 
-    def area_chart(self, data=None, width=0, height=0, use_container_width=True):
+    def area_chart(
+        self, data=None, width=0, height=0, use_container_width=True, max_rows=None
+    ):
         """Display an area chart.
 
         This is just syntax-sugar around st.altair_chart. The main difference
@@ -106,6 +119,11 @@ class AltairMixin:
             If True, set the chart width to the column width. This takes
             precedence over the width argument.
 
+        max_rows : int or None
+            If set, only the last max_rows rows of data are kept, including
+            when more are added with add_rows(). Use this for charts that
+            stream data, so they don't grow without bound.
+
         Example
         -------
         >>> chart_data = pd.DataFrame(
@@ -121,15 +139,20 @@ class AltairMixin:
         """
         vega_lite_chart_proto = VegaLiteChartProto()
 
-        chart = generate_chart("area", data, width, height)
+        chart = generate_chart("area", data, width, height, max_rows)
         marshall(vega_lite_chart_proto, chart, use_container_width)
         last_index = last_index_for_melted_dataframes(data)
 
         return self.dg._enqueue(
-            "area_chart", vega_lite_chart_proto, last_index=last_index
+            "area_chart",
+            vega_lite_chart_proto,
+            last_index=last_index,
+            max_rows=max_rows,
         )
 
-    def bar_chart(self, data=None, width=0, height=0, use_container_width=True):
+    def bar_chart(
+        self, data=None, width=0, height=0, use_container_width=True, max_rows=None
+    ):
         """Display a bar chart.
 
         This is just syntax-sugar around st.altair_chart. The main difference
@@ -155,6 +178,11 @@ class AltairMixin:
             If True, set the chart width to the column width. This takes
             precedence over the width argument.
 
+        max_rows : int or None
+            If set, only the last max_rows rows of data are kept, including
+            when more are added with add_rows(). Use this for charts that
+            stream data, so they don't grow without bound.
+
         Example
         -------
         >>> chart_data = pd.DataFrame(
@@ -170,12 +198,15 @@ class AltairMixin:
         """
         vega_lite_chart_proto = VegaLiteChartProto()
 
-        chart = generate_chart("bar", data, width, height)
+        chart = generate_chart("bar", data, width, height, max_rows)
         marshall(vega_lite_chart_proto, chart, use_container_width)
         last_index = last_index_for_melted_dataframes(data)
 
         return self.dg._enqueue(
-            "bar_chart", vega_lite_chart_proto, last_index=last_index
+            "bar_chart",
+            vega_lite_chart_proto,
+            last_index=last_index,
+            max_rows=max_rows,
         )
 
     def altair_chart(self, altair_chart, use_container_width=False):
@@ -252,7 +283,7 @@ def _is_date_column(df, name):
     return isinstance(column[0], date)
 
 
-def generate_chart(chart_type, data, width=0, height=0):
+def generate_chart(chart_type, data, width=0, height=0, max_rows=None):
     if data is None:
         # Use an empty-ish dict because if we use None the x axis labels rotate
         # 90 degrees. No idea why. Need to debug.
@@ -265,7 +296,14 @@ def generate_chart(chart_type, data, width=0, height=0):
     if index_name is None:
         index_name = "index"
 
-    data = pd.melt(data.reset_index(), id_vars=[index_name])
+    if max_rows is not None:
+        data = data.tail(max_rows)
+        num_columns = len(data.columns)
+        data = pd.melt(data.reset_index(), id_vars=[index_name])
+        # So that add_rows can drop the oldest rows from the end.
+        data = order_melted_data_by_row(data, num_columns)
+    else:
+        data = pd.melt(data.reset_index(), id_vars=[index_name])
 
     if chart_type == "area":
         opacity = {"value": 0.7}
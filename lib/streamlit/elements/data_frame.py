@@ -417,6 +417,9 @@ def _marshall_any_array(pandas_array, proto_array):
 def add_rows(delta1, delta2, name=None):
     """Concat the DataFrame in delta2 to the DataFrame in delta1.
 
+    If delta2 is an add_rows delta with max_rows set, only the last max_rows
+    rows of the result are kept.
+
     Parameters
     ----------
     delta1 : Delta
@@ -427,21 +430,35 @@ def add_rows(delta1, delta2, name=None):
     df1 = _get_data_frame(delta1, name)
     df2 = _get_data_frame(delta2, name)
 
+    _concat_data_frame(df1, df2)
+
+    if delta2.WhichOneof("type") == "add_rows" and delta2.add_rows.max_rows > 0:
+        _drop_head_rows(df1, _index_len(df1.index) - delta2.add_rows.max_rows)
+
+
+def _concat_data_frame(df1, df2):
+    """Concat df2 into df1."""
     if len(df1.data.cols) == 0:
         if len(df2.data.cols) == 0:
             return
         df1.CopyFrom(df2)
         return
 
-    # Copy Data
+    # Check everything that can fail before changing df1, so that a failed
+    # add_rows leaves it untouched.
     if len(df1.data.cols) != len(df2.data.cols):
         raise ValueError("Dataframes have incompatible shapes")
     for (col1, col2) in zip(df1.data.cols, df2.data.cols):
-        _concat_any_array(col1, col2)
+        _check_can_concat_any_array(col1, col2)
 
-    # Copy index
+    # Copy index. This raises before changing anything if the indices can't
+    # be concatenated.
     _concat_index(df1.index, df2.index)
 
+    # Copy Data
+    for (col1, col2) in zip(df1.data.cols, df2.data.cols):
+        _concat_any_array(col1, col2)
+
     # Don't concat columns! add_rows should leave the dataframe with the same
     # number of columns as it had before.
     # DON'T DO: _concat_index(df1.columns, df2.columns)
@@ -451,6 +468,30 @@ def add_rows(delta1, delta2, name=None):
         _concat_cell_style_array(style_col1, style_col2)
 
 
+def _drop_head_rows(df, num_rows):
+    """Remove the first num_rows rows of df, if it has that many."""
+    if num_rows <= 0:
+        return
+
+    for col in df.data.cols:
+        del getattr(col, col.WhichOneof("type")).data[:num_rows]
+
+    for style_col in df.style.cols:
+        del style_col.styles[:num_rows]
+
+    index_type = df.index.WhichOneof("type")
+    if index_type == "plain_index":
+        data = df.index.plain_index.data
+        del getattr(data, data.WhichOneof("type")).data[:num_rows]
+    elif index_type == "range_index":
+        df.index.range_index.start += num_rows
+    elif index_type == "multi_index":
+        for labels in df.index.multi_index.labels:
+            del labels.data[:num_rows]
+    elif index_type is not None:
+        del getattr(df.index, index_type).data.data[:num_rows]
+
+
 def _concat_index(index1, index2):
     """Contact index2 into index1."""
     # Special case if index1 is empty.
@@ -492,6 +533,17 @@ def _concat_any_array(any_array_1, any_array_2):
         any_array_1.CopyFrom(any_array_2)
         return
 
+    _check_can_concat_any_array(any_array_1, any_array_2)
+    array_type = any_array_1.WhichOneof("type")
+    getattr(any_array_1, array_type).data.extend(getattr(any_array_2, array_type).data)
+
+
+def _check_can_concat_any_array(any_array_1, any_array_2):
+    """Raise a ValueError if any_array_2 can't be concatenated into
+    any_array_1."""
+    if _any_array_len(any_array_1) == 0:
+        return
+
     type1 = any_array_1.WhichOneof("type")
     type2 = any_array_2.WhichOneof("type")
     if type1 != type2:
@@ -499,7 +551,6 @@ def _concat_any_array(any_array_1, any_array_2):
             "Cannot concatenate %(type1)s with %(type2)s."
             % {"type1": type1, "type2": type2}
         )
-    getattr(any_array_1, type1).data.extend(getattr(any_array_2, type2).data)
 
 
 def _concat_cell_style_array(style_array1, style_array2):
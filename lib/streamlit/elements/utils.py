@@ -147,3 +147,21 @@ def last_index_for_melted_dataframes(data):
             return data.index[-1]
 
     return None
+
+
+def order_melted_data_by_row(data, num_columns):
+    """Reorder a DataFrame returned by pd.melt so that it goes row by row.
+
+    pd.melt puts every value of the first column first, then every value of
+    the second one, and so on. Ordered row by row instead, the last n rows of
+    the original data are the last n * num_columns rows of the melted data,
+    which is what add_rows' max_rows relies on.
+    """
+    import numpy as np
+
+    if num_columns == 0:
+        return data
+
+    num_rows = len(data) // num_columns
+    order = np.arange(len(data)).reshape(num_columns, num_rows).T.ravel()
+    return data.iloc[order].reset_index(drop=True)
@@ -12,11 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import hashlib
 from typing import MutableMapping, TYPE_CHECKING
 from weakref import WeakKeyDictionary
 
 from streamlit import config
+from streamlit import metrics
+from streamlit.forward_msg_store import MemoryForwardMsgStore
 from streamlit.logger import get_logger
 from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
 
@@ -25,8 +28,97 @@ if TYPE_CHECKING:
 
 LOGGER = get_logger(__name__)
 
+# Protobuf wire type for strings, bytes and embedded messages.
+_WIRETYPE_LENGTH_DELIMITED = 2
 
-def populate_hash_if_needed(msg):
+
+def serialize_msg_body(msg):
+    """Serialize a ForwardMsg, leaving out its hash and metadata.
+
+    These bytes are what a ForwardMsg's hash is computed from. Because
+    protobuf messages can be concatenated on the wire, the full message can
+    then be built by appending a serialized ForwardMsg that contains just
+    the hash and metadata. (See server_util.serialize_forward_msg.)
+
+    This doesn't modify msg, so it's safe to call from a thread other than
+    the one that owns the message.
+
+    Parameters
+    ----------
+    msg : ForwardMsg
+
+    Returns
+    -------
+    bytes
+
+    """
+    msg_type = msg.WhichOneof("type")
+    if msg_type is None:
+        return b""
+
+    field = ForwardMsg.DESCRIPTOR.fields_by_name[msg_type]
+    if field.message_type is None:
+        # Scalar payloads are tiny, so copying them is cheap.
+        body_msg = ForwardMsg()
+        setattr(body_msg, msg_type, getattr(msg, msg_type))
+        return body_msg.SerializeToString()
+
+    # The body is just the one payload field, so we encode its tag and
+    # length ourselves instead of copying the (possibly huge) payload into
+    # a new ForwardMsg.
+    payload = getattr(msg, msg_type).SerializeToString()
+    return encode_field_header(field.number, len(payload)) + payload
+
+
+def encode_field_header(field_number, length):
+    """Encode the tag and length that precede a length-delimited protobuf
+    field (a string, bytes, or embedded message) on the wire.
+
+    Parameters
+    ----------
+    field_number : int
+    length : int
+        The length of the field's serialized value, in bytes.
+
+    Returns
+    -------
+    bytes
+
+    """
+    tag = (field_number << 3) | _WIRETYPE_LENGTH_DELIMITED
+    return _encode_varint(tag) + _encode_varint(length)
+
+
+def _encode_varint(value):
+    """Encode a non-negative int as a protobuf varint."""
+    encoded = bytearray()
+    while value > 0x7F:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def hash_msg_body(msg_body):
+    """Compute a ForwardMsg's hash from its serialized body.
+
+    Parameters
+    ----------
+    msg_body : bytes
+        As returned by serialize_msg_body.
+
+    Returns
+    -------
+    string
+
+    """
+    # MD5 is good enough for what we need, which is uniqueness.
+    hasher = hashlib.md5()
+    hasher.update(msg_body)
+    return hasher.hexdigest()
+
+
+def populate_hash_if_needed(msg, msg_body=None):
     """Computes and assigns the unique hash for a ForwardMsg.
 
     If the ForwardMsg already has a hash, this is a no-op.
@@ -34,6 +126,10 @@ def populate_hash_if_needed(msg):
     Parameters
     ----------
     msg : ForwardMsg
+    msg_body : bytes | None
+        The message's serialized body, as returned by serialize_msg_body.
+        If the caller already has it, passing it in avoids serializing the
+        message again.
 
     Returns
     -------
@@ -44,18 +140,9 @@ def populate_hash_if_needed(msg):
 
     """
     if msg.hash == "":
-        # Move the message's metadata aside. It's not part of the
-        # hash calculation.
-        metadata = msg.metadata
-        msg.ClearField("metadata")
-
-        # MD5 is good enough for what we need, which is uniqueness.
-        hasher = hashlib.md5()
-        hasher.update(msg.SerializeToString())
-        msg.hash = hasher.hexdigest()
-
-        # Restore metadata.
-        msg.metadata.CopyFrom(metadata)
+        if msg_body is None:
+            msg_body = serialize_msg_body(msg)
+        msg.hash = hash_msg_body(msg_body)
 
     return msg.hash
 
@@ -92,6 +179,16 @@ class ForwardMsgCache(object):
     rather than the message itself, to a client. Clients can then
     request messages from this cache via another endpoint.
 
+    The messages themselves are kept in a ForwardMsgStore. By default that's
+    in memory, but it can be shared with other server processes; see
+    global.messageCacheStore.
+
+    The total size of the cached messages is capped at
+    global.messageCacheMaxSizeMB megabytes. When it's exceeded, the least recently
+    referenced messages are evicted, even if sessions still reference them;
+    those sessions will be sent the full message again the next time it's
+    needed.
+
     This cache is *not* thread safe. It's intended to only be accessed by
     the server thread.
 
@@ -100,13 +197,13 @@ class ForwardMsgCache(object):
     class Entry(object):
         """Cache entry.
 
-        Stores the cached message, and the set of ReportSessions
+        Stores the cached message's size, and the set of ReportSessions
         that we've sent the cached message to.
 
         """
 
-        def __init__(self, msg):
-            self.msg = msg
+        def __init__(self, size):
+            self.size = size
             self._session_report_run_counts = (
                 WeakKeyDictionary()
             )  # type: MutableMapping[ReportSession, int]
@@ -151,10 +248,31 @@ class ForwardMsgCache(object):
             """
             return len(self._session_report_run_counts) > 0
 
-    def __init__(self):
-        self._entries = {}  # Map: hash -> Entry
+    def __init__(self, store=None):
+        """Constructor.
 
-    def add_message(self, msg, session, report_run_count):
+        Parameters
+        ----------
+        store : ForwardMsgStore | None
+            Where to keep the cached messages. Defaults to this process's
+            memory.
+
+        """
+        if store is None:
+            store = MemoryForwardMsgStore()
+        self._store = store
+
+        # Map: hash -> Entry, from least to most recently referenced.
+        self._entries = collections.OrderedDict()
+
+        # Total size of the cached messages, in bytes.
+        self._size = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def add_message(self, msg, session, report_run_count, msg_body=None):
         """Add a ForwardMsg to the cache.
 
         The cache will also record a reference to the given ReportSession,
@@ -167,18 +285,33 @@ class ForwardMsgCache(object):
         session : ReportSession
         report_run_count : int
             The number of times the session's report has run
+        msg_body : bytes | None
+            The message's body, as returned by serialize_msg_body, if the
+            caller already has it.
 
         """
-        populate_hash_if_needed(msg)
+        populate_hash_if_needed(msg, msg_body)
         entry = self._entries.get(msg.hash, None)
         if entry is None:
-            entry = ForwardMsgCache.Entry(msg)
+            if msg_body is None:
+                msg_body = serialize_msg_body(msg)
+            self._store.add(msg, msg_body)
+            entry = ForwardMsgCache.Entry(len(msg_body))
             self._entries[msg.hash] = entry
+            self._size += entry.size
+        else:
+            self._entries.move_to_end(msg.hash)
         entry.add_session_ref(session, report_run_count)
 
+        self._evict_if_needed()
+        self._update_size_metrics()
+
     def get_message(self, hash):
         """Return the message with the given ID if it exists in the cache.
 
+        If the cache's store is shared with other server processes, this
+        also returns messages that they cached.
+
         Parameters
         ----------
         hash : string
@@ -189,8 +322,7 @@ class ForwardMsgCache(object):
         ForwardMsg | None
 
         """
-        entry = self._entries.get(hash, None)
-        return entry.msg if entry else None
+        return self._store.get(hash)
 
     def has_message_reference(self, msg, session, report_run_count):
         """Return True if a session has a reference to a message.
@@ -210,12 +342,19 @@ class ForwardMsgCache(object):
         populate_hash_if_needed(msg)
 
         entry = self._entries.get(msg.hash, None)
-        if entry is None or not entry.has_session_ref(session):
-            return False
+        has_ref = entry is not None and entry.has_session_ref(session)
+        if has_ref:
+            # Ensure we're not expired
+            age = entry.get_session_ref_age(session, report_run_count)
+            has_ref = age <= config.get_option("global.maxCachedMessageAge")
 
-        # Ensure we're not expired
-        age = entry.get_session_ref_age(session, report_run_count)
-        return age <= config.get_option("global.maxCachedMessageAge")
+        if has_ref:
+            self._hits += 1
+            metrics.Client.get("streamlit_message_cache_hits_total").inc()
+        else:
+            self._misses += 1
+            metrics.Client.get("streamlit_message_cache_misses_total").inc()
+        return has_ref
 
     def remove_expired_session_entries(self, session, report_run_count):
         """Remove any cached messages that have expired from the given session.
@@ -249,8 +388,56 @@ class ForwardMsgCache(object):
                 if not entry.has_refs():
                     # The entry has no more references. Remove it from
                     # the cache completely.
-                    del self._entries[msg_hash]
+                    self._remove_entry(msg_hash)
+
+        self._update_size_metrics()
+
+    def get_stats(self):
+        """Return the cache's size and hit statistics.
+
+        Returns
+        -------
+        dict
+
+        """
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups > 0 else 0.0,
+            "evictions": self._evictions,
+        }
 
     def clear(self):
         """Remove all entries from the cache"""
+        for msg_hash in self._entries:
+            self._store.remove(msg_hash)
         self._entries.clear()
+        self._size = 0
+        self._update_size_metrics()
+
+    def _remove_entry(self, msg_hash):
+        entry = self._entries.pop(msg_hash)
+        self._size -= entry.size
+        self._store.remove(msg_hash)
+
+    def _evict_if_needed(self):
+        """Evict the least recently referenced entries until the cache is
+        within global.messageCacheMaxSizeMB."""
+        max_size_mb = config.get_option("global.messageCacheMaxSizeMB")
+        if max_size_mb <= 0:
+            return
+
+        max_bytes = max_size_mb * 1024 * 1024
+        while self._size > max_bytes:
+            msg_hash = next(iter(self._entries))
+            LOGGER.debug("Evicting entry [hash=%s]", msg_hash)
+            self._remove_entry(msg_hash)
+            self._evictions += 1
+            metrics.Client.get("streamlit_message_cache_evictions_total").inc()
+
+    def _update_size_metrics(self):
+        metrics.Client.get("streamlit_message_cache_entries").set(len(self._entries))
+        metrics.Client.get("streamlit_message_cache_bytes").set(self._size)
@@ -0,0 +1,225 @@
+# Copyright 2018-2021 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Places where a ForwardMsgCache keeps its messages."""
+
+import errno
+import glob
+import os
+import re
+import tempfile
+from typing import Dict
+
+from streamlit import config
+from streamlit.logger import get_logger
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+LOGGER = get_logger(__name__)
+
+# Message hashes are hex digests. Anything else is rejected before it's
+# used in a file path.
+_MSG_HASH_RE = re.compile(r"^[0-9a-f]+$")
+
+
+class ForwardMsgStore(object):
+    """Abstract store for cached ForwardMsgs, keyed by hash.
+
+    A ForwardMsgCache decides which messages are cached, and for how long.
+    The store just holds the messages, so that MessageCacheHandler can
+    serve them.
+
+    Concrete subclasses must implement add(), get() and remove().
+    """
+
+    def add(self, msg, msg_body):
+        """Store a message.
+
+        Parameters
+        ----------
+        msg : ForwardMsg
+            The message to store. Its hash must be populated.
+        msg_body : bytes
+            The message's body, as returned by serialize_msg_body.
+
+        """
+        raise NotImplementedError()
+
+    def get(self, msg_hash):
+        """Return the message with the given hash, or None if the store
+        doesn't have it.
+
+        Parameters
+        ----------
+        msg_hash : str
+
+        Returns
+        -------
+        ForwardMsg | None
+
+        """
+        raise NotImplementedError()
+
+    def remove(self, msg_hash):
+        """Remove a message that was added by this store.
+
+        Parameters
+        ----------
+        msg_hash : str
+
+        """
+        raise NotImplementedError()
+
+
+class MemoryForwardMsgStore(ForwardMsgStore):
+    """Keeps messages in this process's memory."""
+
+    def __init__(self):
+        self._msgs = {}  # type: Dict[str, ForwardMsg]
+
+    def add(self, msg, msg_body):
+        self._msgs[msg.hash] = msg
+
+    def get(self, msg_hash):
+        return self._msgs.get(msg_hash, None)
+
+    def remove(self, msg_hash):
+        self._msgs.pop(msg_hash, None)
+
+
+class FileForwardMsgStore(ForwardMsgStore):
+    """Keeps messages in a directory that's shared by every Streamlit server
+    process on the host.
+
+    Any process can get() a message that any other process added. This
+    lets a server answer /message requests for messages that were sent by
+    one of its siblings behind the same load balancer.
+
+    Each process's reference to a message is a hard link named
+    "<hash>.<pid>" in the directory. Sibling processes that add the same
+    message link to the same file, so its contents are only stored once,
+    and the filesystem frees them when the last link is removed.
+
+    Point the directory at a tmpfs such as /dev/shm to keep messages in
+    shared memory rather than on disk.
+    """
+
+    def __init__(self, directory):
+        self._dir = directory
+        self._pid = os.getpid()
+        os.makedirs(self._dir, exist_ok=True)
+        self._remove_stale_links()
+
+    def add(self, msg, msg_body):
+        own_path = self._get_path(msg.hash)
+        if os.path.exists(own_path):
+            return
+
+        # If a sibling has already stored this message, share its file.
+        for path in self._get_paths(msg.hash):
+            try:
+                os.link(path, own_path)
+                return
+            except OSError:
+                # The sibling removed its link in the meantime.
+                continue
+
+        # Messages can be concatenated on the wire, so this parses as
+        # the full message. (See server_util.serialize_forward_msg.)
+        header = ForwardMsg()
+        header.hash = msg.hash
+        header.metadata.CopyFrom(msg.metadata)
+
+        # Write to a temp file first, so that siblings never read a
+        # partially-written message.
+        fd, temp_path = tempfile.mkstemp(dir=self._dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(msg_body)
+                f.write(header.SerializeToString())
+            os.replace(temp_path, own_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def get(self, msg_hash):
+        if not _MSG_HASH_RE.match(msg_hash):
+            return None
+
+        for path in self._get_paths(msg_hash):
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                # The link's process removed it in the meantime.
+                continue
+
+            msg = ForwardMsg()
+            msg.ParseFromString(data)
+            return msg
+
+        return None
+
+    def remove(self, msg_hash):
+        try:
+            os.unlink(self._get_path(msg_hash))
+        except FileNotFoundError:
+            pass
+
+    def _get_path(self, msg_hash):
+        """The path of this process's link to the given message."""
+        return os.path.join(self._dir, "%s.%s" % (msg_hash, self._pid))
+
+    def _get_paths(self, msg_hash):
+        """The paths of every process's link to the given message."""
+        return glob.glob(os.path.join(self._dir, "%s.*" % msg_hash))
+
+    def _remove_stale_links(self):
+        """Remove the links of processes that have exited, e.g. because they
+        crashed before they could clean up."""
+        for path in glob.glob(os.path.join(self._dir, "*.*")):
+            _, _, pid = os.path.basename(path).rpartition(".")
+            if not pid.isdigit() or _is_process_running(int(pid)):
+                continue
+
+            LOGGER.debug("Removing stale cached message: %s", path)
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+def _is_process_running(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        # EPERM means the process exists, but belongs to someone else.
+        return e.errno == errno.EPERM
+    return True
+
+
+def create_forward_msg_store():
+    """Create the ForwardMsgStore selected by global.messageCacheStore.
+
+    Returns
+    -------
+    ForwardMsgStore
+
+    """
+    store_type = config.get_option("global.messageCacheStore")
+    if store_type == "memory":
+        return MemoryForwardMsgStore()
+    elif store_type == "file":
+        return FileForwardMsgStore(config.get_option("global.messageCacheDir"))
+    else:
+        raise RuntimeError("Unsupported message cache store '%s'" % store_type)
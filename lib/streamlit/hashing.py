@@ -38,6 +38,7 @@ from streamlit import type_util
 from streamlit.errors import StreamlitAPIException, MarkdownFormattedException
 from streamlit.folder_black_list import FolderBlackList
 from streamlit.logger import get_logger
+from streamlit.script_runner import ScriptControlException
 from streamlit.uploaded_file_manager import UploadedFile
 
 _LOGGER = get_logger(__name__)
@@ -354,6 +355,11 @@ class _CodeHasher:
             # Re-raise exceptions we hand-raise internally.
             raise
 
+        except ScriptControlException:
+            # The script is being stopped or rerun, which isn't a hashing
+            # error.
+            raise
+
         except BaseException as e:
             raise InternalHashError(e, obj)
 
@@ -399,6 +405,8 @@ class _CodeHasher:
             hash_func = self._hash_funcs[type_util.get_fqn_type(obj)]
             try:
                 output = hash_func(obj)
+            except ScriptControlException:
+                raise
             except BaseException as e:
                 raise UserHashError(e, obj, hash_func=hash_func)
 
@@ -645,6 +653,8 @@ class _CodeHasher:
             h = hashlib.new("md5")
             try:
                 reduce_data = obj.__reduce__()
+            except ScriptControlException:
+                raise
             except BaseException as e:
                 raise UnhashableTypeError(e, obj)
 
@@ -18,6 +18,8 @@ from typing import Dict, DefaultDict, Set
 import collections
 import hashlib
 
+from blinker import Signal
+
 from streamlit.report_thread import get_report_ctx
 from streamlit.logger import get_logger
 
@@ -116,7 +118,31 @@ class MediaFileManager(object):
             dict
         )  # type: DefaultDict[str, Dict[str, MediaFile]]
 
+        self.on_change = Signal(
+            doc="""Emitted after the files change. Script worker processes
+            use it to make the same changes in the server process, which
+            serves the files. See script_process_pool.
+
+            Parameters
+            ----------
+            sender : str
+                The name of the method that made the change: "add",
+                "clear_session_files" or "del_expired_files".
+            **kwargs
+                The method's arguments. session_id is always passed to
+                add and clear_session_files.
+            """
+        )
+
     def del_expired_files(self):
+        """Delete the files that no session uses anymore.
+
+        Returns
+        -------
+        int
+            The total size of the deleted files, in bytes.
+
+        """
         LOGGER.debug("Deleting expired files...")
 
         # Get a flat set of every file ID in the session ID map.
@@ -126,10 +152,15 @@ class MediaFileManager(object):
             file_ids = map(lambda mf: mf.id, files_by_coord.values())  # type: ignore[no-any-return]
             active_file_ids = active_file_ids.union(file_ids)
 
+        deleted_bytes = 0
         for file_id, mf in list(self._files_by_id.items()):
             if mf.id not in active_file_ids:
                 LOGGER.debug(f"Deleting File: {file_id}")
                 del self._files_by_id[file_id]
+                deleted_bytes += mf.content_size
+
+        self.on_change.send("del_expired_files")
+        return deleted_bytes
 
     def clear_session_files(self, session_id=None):
         """Removes ReportSession-coordinate mapping immediately, and id-file mapping later.
@@ -143,6 +174,7 @@ class MediaFileManager(object):
 
         if session_id in self._files_by_session_and_coord:
             del self._files_by_session_and_coord[session_id]
+        self.on_change.send("clear_session_files", session_id=session_id)
 
         LOGGER.debug(
             "Sessions still active: %r", self._files_by_session_and_coord.keys()
@@ -154,7 +186,7 @@ class MediaFileManager(object):
             len(self._files_by_session_and_coord),
         )
 
-    def add(self, content, mimetype, coordinates):
+    def add(self, content, mimetype, coordinates, session_id=None):
         """Adds new MediaFile with given parameters; returns the object.
 
         If an identical file already exists, returns the existing object
@@ -175,6 +207,9 @@ class MediaFileManager(object):
             Unique string identifying an element's location.
             Prevents memory leak of "forgotten" file IDs when element media
             is being replaced-in-place (e.g. an st.image stream).
+        session_id : str or None
+            The session that uses the file. Defaults to the session whose
+            script is running on this thread.
 
         """
         file_id = _calculate_file_id(content, mimetype)
@@ -186,7 +221,8 @@ class MediaFileManager(object):
         else:
             LOGGER.debug("Overwriting media file %s", file_id)
 
-        session_id = _get_session_id()
+        if session_id is None:
+            session_id = _get_session_id()
         self._files_by_id[mf.id] = mf
         self._files_by_session_and_coord[session_id][coordinates] = mf
 
@@ -196,6 +232,13 @@ class MediaFileManager(object):
             len(self._files_by_session_and_coord),
         )
 
+        self.on_change.send(
+            "add",
+            content=content,
+            mimetype=mimetype,
+            coordinates=coordinates,
+            session_id=session_id,
+        )
         return mf
 
     def get(self, media_filename):
@@ -37,6 +37,9 @@ class MockMetric(object):
     def set(self, *args, **kwargs):
         pass
 
+    def observe(self, *args, **kwargs):
+        pass
+
 
 class Client(object):
 
@@ -64,6 +67,24 @@ class Client(object):
         # yapf: disable
         self._raw_metrics  = [
             ('Counter', 'streamlit_enqueue_deltas_total', 'Total deltas enqueued', ['type']),
+            ('Gauge', 'streamlit_buffered_bytes', 'Bytes waiting to be written to session websockets, in total', []),
+            ('Gauge', 'streamlit_session_buffered_bytes_max', 'Most bytes waiting to be written to any one session websocket', []),
+            ('Counter', 'streamlit_slow_client_disconnects_total', 'Sessions disconnected for not keeping up with their messages', []),
+            ('Counter', 'streamlit_session_resumes_total', 'Reconnecting browsers that asked to resume their session', ['result']),
+            ('Counter', 'streamlit_websocket_compression_seconds_total', 'Time spent compressing websocket messages', []),
+            ('Counter', 'streamlit_websocket_compression_saved_bytes_total', 'Bytes saved by compressing websocket messages', []),
+            ('Counter', 'streamlit_websocket_uncompressed_messages_total', 'Websocket messages sent uncompressed on compressed connections', ['reason']),
+            ('Counter', 'streamlit_unchanged_deltas_total', 'Deltas not sent because the browser already shows them', []),
+            ('Gauge', 'streamlit_preheated_sessions', 'Preheated sessions waiting for a browser', []),
+            ('Counter', 'streamlit_preheated_session_requests_total', 'Browsers that connected and got a preheated session (hit) or a new one (miss)', ['result']),
+            ('Histogram', 'streamlit_session_first_paint_seconds', 'Time from a browser connecting to its first Delta being sent, by whether it got a preheated session', ['result']),
+            ('Gauge', 'streamlit_hibernated_sessions', 'Idle sessions whose report was released', []),
+            ('Counter', 'streamlit_session_hibernation_freed_bytes_total', 'Bytes released by hibernating idle sessions', []),
+            ('Gauge', 'streamlit_message_cache_entries', 'Messages in the ForwardMsg cache', []),
+            ('Gauge', 'streamlit_message_cache_bytes', 'Total size of the messages in the ForwardMsg cache', []),
+            ('Counter', 'streamlit_message_cache_hits_total', 'Messages sent as references to the ForwardMsg cache', []),
+            ('Counter', 'streamlit_message_cache_misses_total', 'Cacheable messages sent in full', []),
+            ('Counter', 'streamlit_message_cache_evictions_total', 'Messages evicted from the ForwardMsg cache to stay under its size limit', []),
         ]
         # yapf: enable
 
@@ -83,11 +83,14 @@ class Report(object):
         # The master queue contains all messages that comprise the report.
         # If the user chooses to share a saved version of the report,
         # we serialize the contents of the master queue.
-        self._master_queue = ReportQueue()
+        self._master_queue = ReportQueue(
+            max_size=config.get_option("global.maxReportMemory") * 1024 * 1024
+        )
 
         # The browser queue contains messages that haven't yet been
-        # delivered to the browser. Periodically, the server flushes
-        # this queue and delivers its contents to the browser.
+        # delivered to the browser. Whenever a message is enqueued, the
+        # server is notified, and it then flushes this queue and delivers
+        # its contents to the browser.
         self._browser_queue = ReportQueue()
 
         self.generate_new_id()
@@ -97,6 +100,13 @@ class Report(object):
     def get_debug(self) -> Dict[str, Dict[str, Any]]:
         return {"master queue": self._master_queue.get_debug()}
 
+    def get_master_queue_stats(self):
+        """Return how many bytes of messages the master queue holds.
+
+        See ReportQueue.get_stats.
+        """
+        return self._master_queue.get_stats()
+
     def enqueue(self, msg):
         self._master_queue.enqueue(msg)
         self._browser_queue.enqueue(msg)
@@ -114,8 +124,8 @@ class Report(object):
     def flush_browser_queue(self):
         """Clears our browser queue and returns the messages it contained.
 
-        The Server calls this periodically to deliver new messages
-        to the browser connected to this report.
+        The Server calls this when it's notified of new messages, to
+        deliver them to the browser connected to this report.
 
         This doesn't affect the master_queue.
 
@@ -18,6 +18,8 @@ Whenever possible, message deltas are combined.
 """
 
 import copy
+import os
+import tempfile
 import threading
 
 from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
@@ -30,9 +32,19 @@ LOGGER = get_logger(__name__)
 class ReportQueue(object):
     """Thread-safe queue that smartly accumulates the report's messages."""
 
-    def __init__(self):
-        """Constructor."""
+    def __init__(self, max_size=0):
+        """Constructor.
+
+        Parameters
+        ----------
+        max_size : int
+            If nonzero, roughly how many bytes of messages to keep in memory.
+            When the queue holds more than that, its oldest messages are
+            spilled to a temporary file, and read back when they're needed.
+
+        """
         self._lock = threading.Lock()
+        self._max_size = max_size
 
         with self._lock:
             self._queue = []
@@ -41,23 +53,59 @@ class ReportQueue(object):
             # where delta_path = (container, parent block path as a string)
             self._delta_index_map = dict()
 
+            # Keys of the messages in _queue that this queue created by
+            # composing deltas, and hasn't handed out yet. Nobody else has a
+            # reference to these, so add_rows can append to them in place.
+            self._owned_delta_keys = set()
+
+            # The approximate serialized size of each message in _queue,
+            # and their total. Spilled messages count as 0.
+            self._sizes = []
+            self._size = 0
+
+            self._spill_file = _SpillFile()
+
+            # Every message in _queue before this index is spilled or
+            # owned, so _spill_if_needed doesn't look at them again. A
+            # message that's read back by _unspill is always owned right
+            # after, so only _release_owned_deltas has to move this back.
+            self._spill_cursor = 0
+
     def get_debug(self):
         from google.protobuf.json_format import MessageToDict
 
         return {
-            "queue": [MessageToDict(m) for m in self._queue],
+            "queue": [MessageToDict(m) for m in self],
             "ids": list(self._delta_index_map.keys()),
+            "stats": self.get_stats(),
         }
 
+    def get_stats(self):
+        """Return how many bytes of messages the queue holds.
+
+        Returns
+        -------
+        dict
+            "bytes" is roughly how much is in memory, and "spilled_bytes" how
+            much was spilled to disk.
+
+        """
+        with self._lock:
+            return {"bytes": self._size, "spilled_bytes": self._spill_file.size}
+
     def __iter__(self):
-        return iter(self._queue)
+        with self._lock:
+            self._release_owned_deltas()
+            return iter([self._load(index) for index in range(len(self._queue))])
 
     def is_empty(self):
         return len(self._queue) == 0
 
     def get_initial_msg(self):
-        if len(self._queue) > 0:
-            return self._queue[0]
+        with self._lock:
+            self._release_owned_deltas()
+            if len(self._queue) > 0:
+                return self._load(0)
         return None
 
     def enqueue(self, msg):
@@ -70,39 +118,134 @@ class ReportQueue(object):
         with self._lock:
             # Optimize only if it's a delta message
             if not msg.HasField("delta"):
-                self._queue.append(msg)
+                self._append(msg)
             else:
                 # Deltas are uniquely identified by their delta_path.
                 delta_key = tuple(msg.metadata.delta_path)
 
                 if delta_key in self._delta_index_map:
-                    # Combine the previous message into the new message.
                     index = self._delta_index_map[delta_key]
-                    old_msg = self._queue[index]
-                    composed_delta = compose_deltas(old_msg.delta, msg.delta)
-                    new_msg = ForwardMsg()
-                    new_msg.delta.CopyFrom(composed_delta)
-                    new_msg.metadata.CopyFrom(msg.metadata)
-                    self._queue[index] = new_msg
+                    old_msg = self._unspill(index)
+
+                    if delta_key in self._owned_delta_keys and msg.delta.HasField(
+                        "add_rows"
+                    ):
+                        import streamlit.elements.data_frame as data_frame
+
+                        # Append the rows to the message we already own.
+                        # Repeated fields are extended in place, so this only
+                        # costs as much as the new rows. Composing a copy
+                        # instead would make a stream of add_rows calls
+                        # quadratic in the number of rows.
+                        data_frame.add_rows(
+                            old_msg.delta, msg.delta, name=msg.delta.add_rows.name
+                        )
+                        old_msg.metadata.CopyFrom(msg.metadata)
+                        # Recomputing the size would cost as much as the
+                        # whole message, so just add the new rows' size.
+                        self._set_size(index, self._sizes[index] + msg.ByteSize())
+                    else:
+                        # Combine the previous message into the new message.
+                        composed_delta = compose_deltas(old_msg.delta, msg.delta)
+                        new_msg = ForwardMsg()
+                        new_msg.delta.CopyFrom(composed_delta)
+                        new_msg.metadata.CopyFrom(msg.metadata)
+                        self._queue[index] = new_msg
+                        self._owned_delta_keys.add(delta_key)
+                        if msg.delta.HasField("add_rows"):
+                            self._set_size(index, self._sizes[index] + msg.ByteSize())
+                        else:
+                            self._set_size(index, msg.ByteSize())
                 else:
                     # Append this message to the queue, and store its index
                     # for future combining.
                     self._delta_index_map[delta_key] = len(self._queue)
-                    self._queue.append(msg)
+                    self._append(msg)
+
+            self._spill_if_needed()
 
     def clone(self):
         """Return the elements of this ReportQueue as a collections.deque."""
         r = ReportQueue()
 
         with self._lock:
-            r._queue = list(self._queue)
+            r._queue = [self._load(index) for index in range(len(self._queue))]
             r._delta_index_map = dict(self._delta_index_map)
+            r._sizes = [msg.ByteSize() for msg in r._queue]
+            r._size = sum(r._sizes)
+            self._release_owned_deltas()
 
         return r
 
+    def _release_owned_deltas(self):
+        """Forget which messages we own, because they're being handed out.
+        They can be spilled now."""
+        self._owned_delta_keys.clear()
+        self._spill_cursor = 0
+
+    def _append(self, msg):
+        size = msg.ByteSize()
+        self._queue.append(msg)
+        self._sizes.append(size)
+        self._size += size
+
+    def _set_size(self, index, size):
+        self._size += size - self._sizes[index]
+        self._sizes[index] = size
+
+    def _load(self, index):
+        """Return the message at the given index, reading it back from the
+        spill file if it was spilled."""
+        entry = self._queue[index]
+        if isinstance(entry, _SpilledMsg):
+            return self._spill_file.read(entry)
+        return entry
+
+    def _unspill(self, index):
+        """Bring the message at the given index back into memory, and
+        return it."""
+        entry = self._queue[index]
+        if not isinstance(entry, _SpilledMsg):
+            return entry
+
+        msg = self._spill_file.read(entry)
+        self._spill_file.release(entry)
+        self._queue[index] = msg
+        self._set_size(index, entry.length)
+        return msg
+
+    def _spill_if_needed(self):
+        """Spill the oldest messages until the queue is within max_size."""
+        if self._max_size <= 0:
+            return
+
+        while self._size > self._max_size and self._spill_cursor < len(self._queue):
+            index = self._spill_cursor
+            self._spill_cursor += 1
+            entry = self._queue[index]
+
+            if isinstance(entry, _SpilledMsg):
+                continue
+
+            if (
+                entry.HasField("delta")
+                and tuple(entry.metadata.delta_path) in self._owned_delta_keys
+            ):
+                # add_rows is probably still appending to this one, and
+                # would just read it back.
+                continue
+
+            self._queue[index] = self._spill_file.write(entry)
+            self._set_size(index, 0)
+
     def _clear(self):
         self._queue = []
         self._delta_index_map = dict()
+        self._owned_delta_keys = set()
+        self._sizes = []
+        self._size = 0
+        self._spill_file.clear()
+        self._spill_cursor = 0
 
     def clear(self):
         """Clear this queue."""
@@ -111,11 +254,72 @@ class ReportQueue(object):
 
     def flush(self):
         with self._lock:
-            queue = self._queue
+            queue = [self._load(index) for index in range(len(self._queue))]
             self._clear()
         return queue
 
 
+class _SpilledMsg(object):
+    """Where a spilled message is in a _SpillFile."""
+
+    def __init__(self, offset, length):
+        self.offset = offset
+        self.length = length
+
+
+class _SpillFile(object):
+    """An append-only temporary file that a ReportQueue spills messages to.
+
+    Space isn't reclaimed until the file is cleared, which happens when the
+    queue is cleared, i.e. on each rerun.
+    """
+
+    def __init__(self):
+        self._file = None
+        # Total length of the spilled messages that haven't been released.
+        self.size = 0
+
+    def write(self, msg):
+        """Write a message to the file.
+
+        Returns
+        -------
+        _SpilledMsg
+
+        """
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix="streamlit-report-")
+
+        data = msg.SerializeToString()
+        offset = self._file.seek(0, os.SEEK_END)
+        self._file.write(data)
+        self.size += len(data)
+        return _SpilledMsg(offset, len(data))
+
+    def read(self, spilled_msg):
+        """Read a message back from the file.
+
+        Returns
+        -------
+        ForwardMsg
+
+        """
+        self._file.seek(spilled_msg.offset)
+        msg = ForwardMsg()
+        msg.ParseFromString(self._file.read(spilled_msg.length))
+        return msg
+
+    def release(self, spilled_msg):
+        """Note that a message is no longer needed."""
+        self.size -= spilled_msg.length
+
+    def clear(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.size = 0
+
+
 def compose_deltas(old_delta, new_delta):
     """Combines new_delta onto old_delta if possible.
 
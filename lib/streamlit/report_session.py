@@ -15,6 +15,7 @@
 import sys
 import uuid
 from enum import Enum
+from typing import Optional
 
 import tornado.gen
 import tornado.ioloop
@@ -22,10 +23,14 @@ import tornado.ioloop
 from streamlit import __version__
 from streamlit import caching
 from streamlit import config
+from streamlit import metrics
 from streamlit import url_util
 from streamlit.media_file_manager import media_file_manager
 from streamlit.metrics_util import Installation
 from streamlit.report import Report
+from streamlit.script_process_pool import ProcessScriptRunner
+from streamlit.script_process_pool import clear_worker_caches
+from streamlit.script_process_pool import close_worker_session
 from streamlit.script_request_queue import RerunData
 from streamlit.script_request_queue import ScriptRequest
 from streamlit.script_request_queue import ScriptRequestQueue
@@ -61,7 +66,14 @@ class ReportSession(object):
     A ReportSession is attached to each thread involved in running its Report.
     """
 
-    def __init__(self, ioloop, script_path, command_line, uploaded_file_manager):
+    def __init__(
+        self,
+        ioloop,
+        script_path,
+        command_line,
+        uploaded_file_manager,
+        message_enqueued_callback=None,
+    ):
         """Initialize the ReportSession.
 
         Parameters
@@ -78,11 +90,18 @@ class ReportSession(object):
         uploaded_file_manager : UploadedFileManager
             The server's UploadedFileManager.
 
+        message_enqueued_callback : Callable[[str], None] | None
+            Called with this session's ID after a ForwardMsg has been
+            enqueued to the browser queue. The Server uses this to know
+            which sessions have messages to deliver. This may be called
+            on any thread.
+
         """
         # Each ReportSession has a unique string ID.
         self.id = str(uuid.uuid4())
 
         self._ioloop = ioloop
+        self._message_enqueued_callback = message_enqueued_callback
         self._report = Report(script_path, command_line)
         self._uploaded_file_mgr = uploaded_file_manager
 
@@ -92,6 +111,10 @@ class ReportSession(object):
         # due to the source code changing we need to pass in the previous client state.
         self._client_state = ClientState()
 
+        # While the session is hibernated, its client state is kept
+        # serialized here instead of in self._client_state.
+        self._hibernated_client_state = None  # type: Optional[bytes]
+
         self._local_sources_watcher = LocalSourcesWatcher(
             self._report, self._on_source_file_changed
         )
@@ -110,8 +133,8 @@ class ReportSession(object):
     def flush_browser_queue(self):
         """Clear the report queue and return the messages it contained.
 
-        The Server calls this periodically to deliver new messages
-        to the browser connected to this report.
+        The Server calls this when it's notified of new messages, to
+        deliver them to the browser connected to this report.
 
         Returns
         -------
@@ -122,6 +145,74 @@ class ReportSession(object):
         """
         return self._report.flush_browser_queue()
 
+    def get_master_queue_stats(self):
+        """Return how many bytes of messages this session's report holds.
+
+        See ReportQueue.get_stats.
+        """
+        return self._report.get_master_queue_stats()
+
+    @property
+    def is_hibernated(self):
+        """True if the session released its memory with hibernate() and
+        hasn't run its script since."""
+        return self._hibernated_client_state is not None
+
+    def hibernate(self, release_media_files=True):
+        """Release the memory this session holds while it's idle: its
+        report's messages and its media files. Its widget values are kept,
+        so that its next run uses them. The session wakes up on its own
+        when its script is next run.
+
+        Parameters
+        ----------
+        release_media_files : bool
+            False to keep the media files, because a browser that's still
+            connected shows them.
+
+        Returns
+        -------
+        int or None
+            About how many bytes were freed, or None if the session can't
+            hibernate because its script is running.
+
+        """
+        if self._state == ReportSessionState.SHUTDOWN_REQUESTED:
+            return None
+        if (
+            self._state == ReportSessionState.REPORT_IS_RUNNING
+            or self._scriptrunner is not None
+        ):
+            return None
+        if self.is_hibernated:
+            return 0
+
+        LOGGER.debug("Hibernating (id=%s)", self.id)
+        freed_bytes = self._report.get_master_queue_stats()["bytes"]
+        self._report.clear()
+        # There's no previous run to reuse anymore.
+        self._maybe_reuse_previous_run = False
+
+        if release_media_files:
+            media_file_manager.clear_session_files(self.id)
+            freed_bytes += media_file_manager.del_expired_files()
+
+        self._hibernated_client_state = self._client_state.SerializeToString()
+        self._client_state = None
+
+        metrics.Client.get("streamlit_hibernated_sessions").inc()
+        metrics.Client.get("streamlit_session_hibernation_freed_bytes_total").inc(
+            freed_bytes
+        )
+        return freed_bytes
+
+    def _wake(self):
+        LOGGER.debug("Waking (id=%s)", self.id)
+        self._client_state = ClientState()
+        self._client_state.ParseFromString(self._hibernated_client_state)
+        self._hibernated_client_state = None
+        metrics.Client.get("streamlit_hibernated_sessions").dec()
+
     def shutdown(self):
         """Shut down the ReportSession.
 
@@ -130,11 +221,15 @@ class ReportSession(object):
         """
         if self._state != ReportSessionState.SHUTDOWN_REQUESTED:
             LOGGER.debug("Shutting down (id=%s)", self.id)
+            if self.is_hibernated:
+                self._wake()
+
             # Clear any unused session files in upload file manager and media
             # file manager
             self._uploaded_file_mgr.remove_session_files(self.id)
             media_file_manager.clear_session_files(self.id)
             media_file_manager.del_expired_files()
+            close_worker_session(self.id)
 
             # Shut down the ScriptRunner, if one is active.
             # self._state must not be set to SHUTDOWN_REQUESTED until
@@ -173,8 +268,16 @@ class ReportSession(object):
             if scriptrunner is not None:
                 scriptrunner.maybe_handle_execution_control_request()
 
+        # Compute the message's size here, on the script thread. Protobuf
+        # caches it, and the Server uses it to decide whether to serialize
+        # the message on the IOLoop or on a worker thread.
+        msg.ByteSize()
+
         self._report.enqueue(msg)
 
+        if self._message_enqueued_callback is not None:
+            self._message_enqueued_callback(self.id)
+
     def enqueue_exception(self, e):
         """Enqueue an Exception message.
 
@@ -313,6 +416,9 @@ class ReportSession(object):
                 # Only clear media files if the script is done running AND the
                 # report session is actually shutting down.
                 media_file_manager.clear_session_files(self.id)
+                # The script may have added files in a worker process
+                # after we first told it that we're closed.
+                close_worker_session(self.id)
 
             def on_shutdown():
                 self._client_state = client_state
@@ -477,6 +583,7 @@ class ReportSession(object):
         # doesn't need to see the results of the command in their
         # terminal.
         caching.clear_cache()
+        clear_worker_caches()
 
     def handle_set_run_on_save_request(self, new_value):
         """Change our run_on_save flag to the given value.
@@ -512,6 +619,9 @@ class ReportSession(object):
             return
 
         self._script_request_queue.enqueue(request, data)
+        if self._scriptrunner is not None:
+            # Don't wait for the running script to notice the request.
+            self._scriptrunner.request_interrupt()
         self._maybe_create_scriptrunner()
 
     def _maybe_create_scriptrunner(self):
@@ -531,8 +641,16 @@ class ReportSession(object):
         ):
             return
 
+        if self.is_hibernated:
+            self._wake()
+
+        if config.get_option("runner.processPoolSize") > 0:
+            scriptrunner_class = ProcessScriptRunner
+        else:
+            scriptrunner_class = ScriptRunner
+
         # Create the ScriptRunner, attach event handlers, and start it
-        self._scriptrunner = ScriptRunner(
+        self._scriptrunner = scriptrunner_class(
             session_id=self.id,
             report=self._report,
             enqueue_forward_msg=self.enqueue,
@@ -0,0 +1,122 @@
+# Copyright 2018-2021 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Provides global ScriptCache object as `script_cache`."""
+
+import os
+import threading
+from typing import Dict, Tuple
+
+from streamlit import magic
+from streamlit import source_util
+from streamlit.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+
+class ScriptCache(object):
+    """Compiled code objects for the scripts that ScriptRunners run, shared
+    by all sessions, so that a rerun doesn't have to parse, add magic to
+    and compile its script again.
+
+    An entry is used as long as its script's modification time and size
+    are unchanged. The file watcher also invalidates a script's entries
+    when it changes, in case an edit doesn't change either of them (some
+    filesystems only keep modification times to the second).
+    """
+
+    def __init__(self):
+        # Dict[(script_path, magic_enabled)] -> ((st_mtime_ns, st_size), code)
+        self._code_by_script = (
+            {}
+        )  # type: Dict[Tuple[str, bool], Tuple[Tuple[int, int], object]]
+        self._lock = threading.Lock()
+
+    def get_code(self, script_path, magic_enabled):
+        """Return the compiled code object for a script.
+
+        This can be called on any thread.
+
+        Parameters
+        ----------
+        script_path : str
+            The path of the script.
+        magic_enabled : bool
+            Whether to add magic to the script before compiling it. See
+            runner.magicEnabled.
+
+        Returns
+        -------
+        code
+            The script's code object, ready to be exec()'d.
+
+        Raises
+        ------
+        Any error raised while reading or compiling the script, such as a
+        SyntaxError. Scripts that fail to compile aren't cached.
+
+        """
+        key = (script_path, magic_enabled)
+        stat = os.stat(script_path)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._code_by_script.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        LOGGER.debug("Compiling script %s", script_path)
+        code = _compile_script(script_path, magic_enabled)
+
+        with self._lock:
+            self._code_by_script[key] = (version, code)
+        return code
+
+    def invalidate(self, script_path):
+        """Forget a script's code objects, so that it's compiled again the
+        next time it's run."""
+        with self._lock:
+            for key in [key for key in self._code_by_script if key[0] == script_path]:
+                del self._code_by_script[key]
+
+    def clear(self):
+        with self._lock:
+            self._code_by_script.clear()
+
+
+def _compile_script(script_path, magic_enabled):
+    with source_util.open_python_file(script_path) as f:
+        filebody = f.read()
+
+    if magic_enabled:
+        filebody = magic.add_magic(filebody, script_path)
+
+    return compile(
+        filebody,
+        # Pass in the file path so it can show up in exceptions.
+        script_path,
+        # We're compiling entire blocks of Python, so we need "exec"
+        # mode (as opposed to "eval" or "single").
+        mode="exec",
+        # Don't inherit any flags or "future" statements.
+        flags=0,
+        dont_inherit=1,
+        # Use the default optimization options.
+        optimize=-1,
+    )
+
+
+# Singleton ScriptCache instance. The Streamlit server shares this instance
+# between all its sessions.
+script_cache = ScriptCache()
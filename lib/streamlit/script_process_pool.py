@@ -0,0 +1,518 @@
+# Copyright 2018-2021 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Runs scripts in a pool of worker processes, so that sessions' scripts can
+use more than one CPU core. See runner.processPoolSize.
+
+Each ReportSession's ProcessScriptRunner stands in for a ScriptRunner. It
+waits for a free worker process, which runs a real ScriptRunner for it. The
+two sides talk over a multiprocessing Pipe:
+
+- The server sends the session's ScriptRequests to the worker.
+- The server tells every worker when a session is closed, so that they
+  can drop the session's media files.
+- The worker sends back the ForwardMsgs and ScriptRunnerEvents its
+  ScriptRunner emits, and the changes its script made to
+  media_file_manager. It asks the server for the files uploaded to the
+  session when its script needs them.
+
+When the worker's ScriptRunner runs out of requests, the worker checks with
+the server that no more are on their way before it lets the session know
+that the ProcessScriptRunner is done, just like a ScriptRunner would.
+"""
+
+import atexit
+import multiprocessing
+import pickle
+import queue
+import threading
+from typing import List, Optional
+
+from blinker import Signal
+
+from streamlit import caching
+from streamlit import config
+from streamlit.logger import get_logger
+from streamlit.media_file_manager import media_file_manager
+from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetStates
+from streamlit.report import Report
+from streamlit.script_request_queue import RerunData
+from streamlit.script_request_queue import ScriptRequest
+from streamlit.script_request_queue import ScriptRequestQueue
+from streamlit.script_runner import ScriptRunner
+from streamlit.script_runner import ScriptRunnerEvent
+
+LOGGER = get_logger(__name__)
+
+
+class ProcessScriptRunner(object):
+    """Runs a session's script in a worker process of the
+    ScriptProcessPool.
+
+    It has the same constructor, on_event signal and public methods as
+    ScriptRunner, so that ReportSession can use either.
+    """
+
+    def __init__(
+        self,
+        session_id,
+        report,
+        enqueue_forward_msg,
+        client_state,
+        request_queue,
+        uploaded_file_mgr=None,
+    ):
+        """Initialize the ProcessScriptRunner.
+
+        See ScriptRunner.__init__ for the parameters.
+        """
+        self._session_id = session_id
+        self._report = report
+        self._enqueue_forward_msg = enqueue_forward_msg
+        self._client_state = client_state
+        self._request_queue = request_queue
+        self._uploaded_file_mgr = uploaded_file_mgr
+
+        self.on_event = Signal(doc="See ScriptRunner.on_event.")
+
+        # The worker process running our requests, once we have one. And
+        # whether it's checking whether we have more requests for it, in
+        # which case we hold on to new requests until it knows. Both are
+        # protected by _lock.
+        self._lock = threading.Lock()
+        self._worker = None  # type: Optional[_Worker]
+        self._worker_is_idle = False
+
+    def start(self):
+        """Wait for a worker process to run our requests on.
+
+        This must be called only once.
+        """
+        get_script_process_pool().submit(self)
+
+    def request_interrupt(self):
+        """Pass the requests that were just enqueued on to our worker
+        process, which interrupts its script if it's running.
+
+        This is called on the main thread.
+        """
+        with self._lock:
+            if self._worker is not None and not self._worker_is_idle:
+                self._send_requests()
+
+    def maybe_handle_execution_control_request(self):
+        # The worker's ScriptRunner does this whenever its script enqueues
+        # a ForwardMsg.
+        pass
+
+    def _dequeue_requests(self):
+        requests = []
+        while True:
+            request, data = self._request_queue.dequeue()
+            if request is None:
+                return requests
+            requests.append(_serialize_request(request, data))
+
+    def _send_requests(self):
+        for request in self._dequeue_requests():
+            self._worker.send(("request", request))
+
+    def _run(self, worker):
+        """Run our requests on a worker process, until it's done with them.
+        This is called on the worker's thread."""
+        with self._lock:
+            self._worker = worker
+            worker.send(
+                (
+                    "start",
+                    self._session_id,
+                    self._report.script_path,
+                    self._report.command_line,
+                    self._client_state.SerializeToString(),
+                    self._dequeue_requests(),
+                )
+            )
+
+        while True:
+            msg = worker.recv()
+            msg_type = msg[0]
+
+            if msg_type == "forward_msg":
+                self._enqueue_forward_msg(ForwardMsg.FromString(msg[1]))
+
+            elif msg_type == "media_file_manager":
+                _, method, kwargs = msg
+                getattr(media_file_manager, method)(**kwargs)
+
+            elif msg_type == "get_files":
+                _, session_id, widget_id = msg
+                files = None
+                if self._uploaded_file_mgr is not None:
+                    files = self._uploaded_file_mgr.get_files(session_id, widget_id)
+                worker.send(("files", files))
+
+            elif msg_type == "idle":
+                with self._lock:
+                    self._worker_is_idle = True
+                worker.send(("check",))
+
+            elif msg_type == "busy":
+                with self._lock:
+                    self._worker_is_idle = False
+                    self._send_requests()
+
+            elif msg_type == "event":
+                _, event_name, kwargs = msg
+                event = ScriptRunnerEvent[event_name]
+                if event == ScriptRunnerEvent.SHUTDOWN:
+                    with self._lock:
+                        self._worker = None
+                    self.on_event.send(
+                        event,
+                        client_state=ClientState.FromString(kwargs["client_state"]),
+                    )
+                    return
+                self.on_event.send(event, **kwargs)
+
+            else:
+                raise RuntimeError("Unrecognized message from worker: %s" % msg_type)
+
+    def _on_worker_died(self, exception):
+        """Stop the script with the given exception and shut down, as if
+        the worker had."""
+        with self._lock:
+            self._worker = None
+        self.on_event.send(
+            ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR, exception=exception
+        )
+        self.on_event.send(ScriptRunnerEvent.SHUTDOWN, client_state=self._client_state)
+
+
+class ScriptProcessPool(object):
+    """A pool of worker processes that ProcessScriptRunners run on, one at
+    a time each."""
+
+    def __init__(self, size):
+        self._runners = (
+            queue.Queue()
+        )  # type: queue.Queue[Optional[ProcessScriptRunner]]
+        self._workers = [_Worker(self._runners) for _ in range(size)]
+        atexit.register(self.shutdown)
+
+    def submit(self, runner):
+        """Run a ProcessScriptRunner on the next free worker process."""
+        self._runners.put(runner)
+
+    def clear_caches(self):
+        """Clear st.cache in every worker process."""
+        for worker in self._workers:
+            worker.send(("clear_cache",))
+
+    def close_session(self, session_id):
+        """Tell every worker process that a session was closed, so that
+        they drop its media files."""
+        for worker in self._workers:
+            worker.send(("session_closed", session_id))
+
+    def shutdown(self):
+        for _ in self._workers:
+            self._runners.put(None)
+        for worker in self._workers:
+            worker.terminate()
+
+
+class _Worker(object):
+    """A worker process, and the thread in the server process that runs
+    ProcessScriptRunners on it."""
+
+    def __init__(self, runners):
+        self._runners = runners
+        self._send_lock = threading.Lock()
+        self._start_process()
+
+        self._thread = threading.Thread(
+            target=self._run, name="ScriptProcessPool.worker", daemon=True
+        )
+        self._thread.start()
+
+    def _start_process(self):
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=_worker_main,
+            args=(child_conn, _get_config_values()),
+            name="ScriptProcessPool.worker",
+        )
+        self._process.start()
+        child_conn.close()
+
+    def send(self, msg):
+        """Send a message to the worker process. This can be called on any
+        thread."""
+        with self._send_lock:
+            self._conn.send(msg)
+
+    def recv(self):
+        return self._conn.recv()
+
+    def terminate(self):
+        self._process.terminate()
+
+    def _run(self):
+        while True:
+            runner = self._runners.get()
+            if runner is None:
+                return
+            try:
+                runner._run(self)
+            except Exception as e:
+                if isinstance(e, (EOFError, OSError)):
+                    LOGGER.error("Script worker process exited. Restarting it.")
+                    exception = RuntimeError(
+                        "The process running the script exited unexpectedly."
+                    )
+                else:
+                    # We don't know where the worker is in its conversation
+                    # with us anymore, so replace it.
+                    LOGGER.exception("Script worker process failed. Restarting it.")
+                    exception = e
+                    self._process.terminate()
+                self._process.join()
+                self._conn.close()
+                self._start_process()
+
+                try:
+                    runner._on_worker_died(exception)
+                except Exception:
+                    LOGGER.exception("Failed to shut down the script's session.")
+
+
+_pool = None  # type: Optional[ScriptProcessPool]
+_pool_lock = threading.Lock()
+
+
+def get_script_process_pool():
+    """Return the ScriptProcessPool, starting its runner.processPoolSize
+    worker processes the first time it's called."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ScriptProcessPool(config.get_option("runner.processPoolSize"))
+        return _pool
+
+
+def clear_worker_caches():
+    """Clear st.cache in every worker process, if any were started."""
+    with _pool_lock:
+        pool = _pool
+    if pool is not None:
+        pool.clear_caches()
+
+
+def close_worker_session(session_id):
+    """Tell every worker process that a session was closed, if any were
+    started."""
+    with _pool_lock:
+        pool = _pool
+    if pool is not None:
+        pool.close_session(session_id)
+
+
+def _get_config_values():
+    """Return the config options that weren't left at their defaults, so
+    that worker processes can use the same."""
+    return {
+        key: (option.value, option.where_defined)
+        for key, option in config._config_options.items()
+        if option.where_defined != option.DEFAULT_DEFINITION
+    }
+
+
+def _serialize_request(request, data):
+    if data is None:
+        return request.name, None, None
+    widget_states = data.widget_states
+    return (
+        request.name,
+        data.query_string,
+        widget_states.SerializeToString() if widget_states is not None else None,
+    )
+
+
+def _deserialize_request(serialized):
+    name, query_string, widget_states = serialized
+    request = ScriptRequest[name]
+    if query_string is None:
+        return request, None
+    if widget_states is not None:
+        widget_states = WidgetStates.FromString(widget_states)
+    return request, RerunData(query_string, widget_states)
+
+
+def _picklable(exception):
+    try:
+        pickle.dumps(exception)
+        return exception
+    except Exception:
+        return RuntimeError(str(exception))
+
+
+# Everything below runs in the worker processes.
+
+
+class _RemoteUploadedFileManager(object):
+    """Gets the files uploaded to a session from the server process."""
+
+    def __init__(self, send):
+        self._send = send
+        self._replies = queue.Queue()  # type: queue.Queue[Optional[List]]
+
+    def get_files(self, session_id, widget_id):
+        self._send(("get_files", session_id, widget_id))
+        return self._replies.get()
+
+    def on_files(self, files):
+        self._replies.put(files)
+
+
+class _WorkerJob(object):
+    """Runs a ProcessScriptRunner's requests in a worker process."""
+
+    def __init__(self, send, session_id, script_path, command_line):
+        self._send = send
+        self._session_id = session_id
+        self._report = Report(script_path, command_line)
+        self._request_queue = ScriptRequestQueue()
+        self.uploaded_file_mgr = _RemoteUploadedFileManager(send)
+        self._checks = queue.Queue()  # type: queue.Queue[bool]
+        self._is_shutting_down = False
+        self._scriptrunner = None  # type: Optional[ScriptRunner]
+
+    def start(self, client_state):
+        scriptrunner = ScriptRunner(
+            session_id=self._session_id,
+            report=self._report,
+            enqueue_forward_msg=self._enqueue,
+            client_state=client_state,
+            request_queue=self._request_queue,
+            uploaded_file_mgr=self.uploaded_file_mgr,
+        )
+        scriptrunner.on_event.connect(self._on_scriptrunner_event, weak=False)
+        self._scriptrunner = scriptrunner
+        scriptrunner.start()
+
+    def enqueue_request(self, request, data):
+        if request == ScriptRequest.SHUTDOWN:
+            self._is_shutting_down = True
+        self._request_queue.enqueue(request, data)
+        scriptrunner = self._scriptrunner
+        if scriptrunner is not None:
+            scriptrunner.request_interrupt()
+
+    def on_check(self):
+        self._checks.put(True)
+
+    def _enqueue(self, msg):
+        self._send(("forward_msg", msg.SerializeToString()))
+        # As ReportSession.enqueue does.
+        if not config.get_option("runner.installTracer"):
+            scriptrunner = self._scriptrunner
+            if scriptrunner is not None:
+                scriptrunner.maybe_handle_execution_control_request()
+
+    def _on_scriptrunner_event(self, event, exception=None, client_state=None):
+        """Called on the ScriptRunner's script thread."""
+        if event != ScriptRunnerEvent.SHUTDOWN:
+            kwargs = {}
+            if exception is not None:
+                kwargs["exception"] = _picklable(exception)
+            self._send(("event", event.name, kwargs))
+            return
+
+        if not self._is_shutting_down:
+            # Stop the server from sending requests, and wait for the
+            # ones it already sent to arrive.
+            self._send(("idle",))
+            self._checks.get()
+            if self._request_queue.has_request:
+                self._send(("busy",))
+                self.start(client_state)
+                return
+
+        self._send(
+            (
+                "event",
+                event.name,
+                {"client_state": client_state.SerializeToString()},
+            )
+        )
+
+
+def _worker_main(conn, config_values):
+    """The main function of a worker process. It runs on the process's main
+    thread, handling the messages the server sends it."""
+    config.parse_config_file()
+    for key, (value, where_defined) in config_values.items():
+        config._set_option(key, value, where_defined)
+
+    send_lock = threading.Lock()
+
+    def send(msg):
+        with send_lock:
+            conn.send(msg)
+
+    # Set on the main thread while it makes changes to media_file_manager
+    # that the server asked for, and so already made itself.
+    handling_server_msg = threading.local()
+
+    def on_media_file_manager_change(method, **kwargs):
+        if not getattr(handling_server_msg, "value", False):
+            send(("media_file_manager", method, kwargs))
+
+    media_file_manager.on_change.connect(on_media_file_manager_change, weak=False)
+
+    job = None  # type: Optional[_WorkerJob]
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            # The server process exited.
+            return
+        msg_type = msg[0]
+
+        if msg_type == "start":
+            _, session_id, script_path, command_line, client_state, requests = msg
+            job = _WorkerJob(send, session_id, script_path, command_line)
+            for request in requests:
+                job.enqueue_request(*_deserialize_request(request))
+            job.start(ClientState.FromString(client_state))
+        elif msg_type == "request":
+            job.enqueue_request(*_deserialize_request(msg[1]))
+        elif msg_type == "check":
+            job.on_check()
+        elif msg_type == "files":
+            job.uploaded_file_mgr.on_files(msg[1])
+        elif msg_type == "clear_cache":
+            caching.clear_cache()
+        elif msg_type == "session_closed":
+            handling_server_msg.value = True
+            try:
+                media_file_manager.clear_session_files(msg[1])
+                media_file_manager.del_expired_files()
+            finally:
+                handling_server_msg.value = False
+        else:
+            raise RuntimeError("Unrecognized message from server: %s" % msg_type)
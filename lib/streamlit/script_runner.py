@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import ctypes
+import platform
 import sys
 import threading
 from contextlib import contextmanager
@@ -20,9 +22,8 @@ from enum import Enum
 from blinker import Signal
 
 from streamlit import config
-from streamlit import magic
-from streamlit import source_util
 from streamlit.media_file_manager import media_file_manager
+from streamlit.script_cache import script_cache
 from streamlit.report_thread import ReportThread
 from streamlit.report_thread import get_report_ctx
 from streamlit.script_request_queue import ScriptRequest
@@ -120,6 +121,13 @@ class ScriptRunner(object):
         # maybe_handle_execution_control_request.
         self._execing = False
 
+        # Set to true while request_interrupt may raise _InterruptException
+        # in the script thread, and whether it did and the exception may
+        # not have been raised yet. See _exec.
+        self._interrupt_lock = threading.Lock()
+        self._interruptible = False
+        self._interrupt_pending = False
+
         # This is initialized in start()
         self._script_thread = None
 
@@ -191,6 +199,13 @@ class ScriptRunner(object):
             # enqueues a new ForwardEvent
             return
 
+        if not self._request_queue.has_request:
+            return
+
+        # Make sure request_interrupt doesn't raise an exception on top of
+        # the one we're about to raise.
+        self._disable_interrupts()
+
         # Pop the next request from our queue.
         request, data = self._request_queue.dequeue()
         if request is None:
@@ -207,6 +222,60 @@ class ScriptRunner(object):
         else:
             raise RuntimeError("Unrecognized ScriptRequest: %s" % request)
 
+    def request_interrupt(self):
+        """Interrupt the script, if it's running, so that it handles the
+        request that was just enqueued now rather than the next time it
+        enqueues a ForwardMsg.
+
+        This is called on the main thread. It only does something when
+        runner.asyncInterrupts is enabled.
+        """
+        with self._interrupt_lock:
+            if not self._interruptible:
+                return
+            # Only one interrupt per run, so that the script thread can
+            # always tell whether one is on its way.
+            self._interruptible = False
+            self._interrupt_pending = True
+            _set_async_exc(self._script_thread.ident, _InterruptException)
+
+    def _exec(self, code, module, interruptible):
+        """exec() the script. If interruptible, request_interrupt can stop
+        it anywhere in its Python code."""
+        try:
+            if interruptible:
+                with self._interrupt_lock:
+                    self._interruptible = True
+            exec(code, module.__dict__)
+
+        except _InterruptException:
+            self._interrupt_pending = False
+            # Raise the StopException or RerunException for the request
+            # that interrupted us.
+            self.maybe_handle_execution_control_request()
+            # Nothing but request_interrupt's caller should have dequeued
+            # the request, but don't let the script go on if it did.
+            raise StopException()
+
+        finally:
+            self._disable_interrupts()
+
+    def _disable_interrupts(self):
+        """Stop request_interrupt from interrupting the script, and cancel
+        an interrupt that hasn't been raised yet."""
+        while True:
+            try:
+                with self._interrupt_lock:
+                    self._interruptible = False
+                    if self._interrupt_pending:
+                        _set_async_exc(self._script_thread.ident, None)
+                        self._interrupt_pending = False
+                return
+            except _InterruptException:
+                # It was raised before we could cancel it. There can't be
+                # another one.
+                self._interrupt_pending = False
+
     def _install_tracer(self):
         """Install function that runs before each line of the script."""
 
@@ -260,29 +329,13 @@ class ScriptRunner(object):
 
         self.on_event.send(ScriptRunnerEvent.SCRIPT_STARTED)
 
-        # Compile the script. Any errors thrown here will be surfaced
-        # to the user via a modal dialog in the frontend, and won't result
-        # in their previous report disappearing.
+        # Compile the script, unless another run already did. Any errors
+        # thrown here will be surfaced to the user via a modal dialog in the
+        # frontend, and won't result in their previous report disappearing.
 
         try:
-            with source_util.open_python_file(self._report.script_path) as f:
-                filebody = f.read()
-
-            if config.get_option("runner.magicEnabled"):
-                filebody = magic.add_magic(filebody, self._report.script_path)
-
-            code = compile(
-                filebody,
-                # Pass in the file path so it can show up in exceptions.
-                self._report.script_path,
-                # We're compiling entire blocks of Python, so we need "exec"
-                # mode (as opposed to "eval" or "single").
-                mode="exec",
-                # Don't inherit any flags or "future" statements.
-                flags=0,
-                dont_inherit=1,
-                # Use the default optimization options.
-                optimize=-1,
+            code = script_cache.get_code(
+                self._report.script_path, config.get_option("runner.magicEnabled")
             )
 
         except BaseException as e:
@@ -302,8 +355,11 @@ class ScriptRunner(object):
         if rerun_data.widget_states is not None:
             self._widgets.set_state(rerun_data.widget_states)
 
+        interruptible = False
         if config.get_option("runner.installTracer"):
             self._install_tracer()
+        elif config.get_option("runner.asyncInterrupts"):
+            interruptible = _ASYNC_EXC_SUPPORTED
 
         # This will be set to a RerunData instance if our execution
         # is interrupted by a RerunException.
@@ -329,7 +385,7 @@ class ScriptRunner(object):
             module.__dict__["__file__"] = self._report.script_path
 
             with modified_sys_path(self._report), self._set_execing_flag():
-                exec(code, module.__dict__)
+                self._exec(code, module, interruptible)
 
         except RerunException as e:
             rerun_with_data = e.rerun_data
@@ -373,6 +429,12 @@ class StopException(ScriptControlException):
     pass
 
 
+class _InterruptException(ScriptControlException):
+    """Raised in the script thread by ScriptRunner.request_interrupt."""
+
+    pass
+
+
 class RerunException(ScriptControlException):
     """Silently stop and rerun the user's script."""
 
@@ -387,6 +449,20 @@ class RerunException(ScriptControlException):
         self.rerun_data = rerun_data
 
 
+# PyThreadState_SetAsyncExc is part of CPython's C API.
+_ASYNC_EXC_SUPPORTED = platform.python_implementation() == "CPython"
+
+
+def _set_async_exc(thread_id, exc_type):
+    """Raise exc_type in a thread the next time it runs Python bytecode.
+    If exc_type is None, cancel the exception that was set before, if it
+    hasn't been raised yet."""
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(
+        ctypes.c_ulong(thread_id),
+        ctypes.py_object(exc_type) if exc_type is not None else None,
+    )
+
+
 def _clean_problem_modules():
     """Some modules are stateful, so we have to clear their state."""
 
@@ -0,0 +1,168 @@
+# Copyright 2018-2021 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+from typing import Dict, Set, Tuple
+
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+DeltaPath = Tuple[int, ...]
+
+
+class SentDeltaTracker(object):
+    """Keeps track of the elements and blocks a browser is showing, so that
+    the server can tell it to keep the ones that a rerun didn't change
+    instead of sending them again.
+
+    The tracker mirrors what the browser does with the messages it's sent:
+    a Delta replaces the node at its delta_path, and when a report finishes
+    successfully, the browser removes the nodes that the run didn't touch,
+    and the blocks that were left empty.
+
+    Every message written to the session's websocket must be passed to
+    on_msg_sent, in order, except for the deltas that keep_if_unchanged
+    returned True for.
+    """
+
+    class _SentDelta(object):
+        def __init__(self, key, is_block, allow_empty):
+            # The message's hash and dimensions. Deltas with the same key
+            # display the same thing.
+            self.key = key
+            self.is_block = is_block
+            self.allow_empty = allow_empty
+
+    def __init__(self):
+        # Map: delta_path -> _SentDelta, for the nodes the browser has
+        # that we know the contents of.
+        self._sent = {}  # type: Dict[DeltaPath, SentDeltaTracker._SentDelta]
+
+        # The delta_paths that the current run has sent or kept, and their
+        # ancestors.
+        self._touched = set()  # type: Set[DeltaPath]
+
+    def keep_if_unchanged(self, msg):
+        """If the browser already shows this delta, note that the current
+        run touched it, and return True.
+
+        Parameters
+        ----------
+        msg : ForwardMsg
+            A message whose hash has been populated.
+
+        Returns
+        -------
+        bool
+            True if the message doesn't need to be sent. The browser must
+            instead be sent a Delta with unchanged_count that covers its
+            delta_path.
+
+        """
+        if not _is_element_or_block(msg):
+            return False
+
+        delta_path = tuple(msg.metadata.delta_path)
+        sent = self._sent.get(delta_path)
+        if sent is None or sent.key != _get_key(msg):
+            return False
+
+        self._touch(delta_path)
+        return True
+
+    def on_msg_sent(self, msg):
+        """Update the tracker with a message that was sent to the browser.
+
+        Parameters
+        ----------
+        msg : ForwardMsg
+            A message whose hash has been populated.
+
+        """
+        msg_type = msg.WhichOneof("type")
+        if msg_type == "new_report":
+            self._touched.clear()
+
+        elif msg_type == "report_finished":
+            if msg.report_finished == ForwardMsg.FINISHED_SUCCESSFULLY:
+                self._clear_stale_deltas()
+
+        elif msg_type == "delta":
+            delta_path = tuple(msg.metadata.delta_path)
+            self._touch(delta_path)
+
+            if _is_element_or_block(msg):
+                is_block = msg.delta.HasField("add_block")
+                prev = self._sent.get(delta_path)
+                if prev is not None and prev.is_block and not is_block:
+                    # The browser replaced a block with an element, so the
+                    # block's children are gone. (A block that replaces a
+                    # block inherits its children.)
+                    self._forget_descendants(delta_path)
+
+                self._sent[delta_path] = SentDeltaTracker._SentDelta(
+                    _get_key(msg),
+                    is_block,
+                    is_block and msg.delta.add_block.allow_empty,
+                )
+            else:
+                # add_rows changed the element, and we don't know what it
+                # looks like now.
+                self._sent.pop(delta_path, None)
+
+    def _touch(self, delta_path):
+        for length in range(1, len(delta_path) + 1):
+            self._touched.add(delta_path[:length])
+
+    def _forget_descendants(self, delta_path):
+        depth = len(delta_path)
+        for path in [
+            path
+            for path in self._sent
+            if len(path) > depth and path[:depth] == delta_path
+        ]:
+            del self._sent[path]
+
+    def _clear_stale_deltas(self):
+        """Forget the nodes that the browser removes when a report finishes
+        successfully: those the run didn't touch, and blocks without
+        allow_empty that were left with no children."""
+        self._sent = {
+            path: sent for path, sent in self._sent.items() if path in self._touched
+        }
+
+        num_children = collections.Counter(path[:-1] for path in self._touched)
+        # Deepest first, so that a block whose only children were pruned
+        # blocks is pruned too.
+        blocks = sorted(
+            (path for path, sent in self._sent.items() if sent.is_block),
+            key=len,
+            reverse=True,
+        )
+        for path in blocks:
+            if num_children[path] == 0 and not self._sent[path].allow_empty:
+                del self._sent[path]
+                num_children[path[:-1]] -= 1
+
+
+def _is_element_or_block(msg):
+    return msg.WhichOneof("type") == "delta" and msg.delta.WhichOneof("type") in (
+        "new_element",
+        "add_block",
+    )
+
+
+def _get_key(msg):
+    # The rest of the metadata is the delta_path, which we key on anyway,
+    # and whether the message is cacheable, which depends on its body.
+    return msg.hash, msg.metadata.element_dimension_spec.SerializeToString()
@@ -18,24 +18,32 @@ import threading
 import socket
 import sys
 import errno
+import time
 import traceback
 import click
+import collections
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from typing import Any, Dict, Optional, TYPE_CHECKING
+from typing import Any, Deque, Dict, List, Optional, Set, TYPE_CHECKING
 
 import tornado.concurrent
 import tornado.gen
 import tornado.ioloop
+import tornado.locks
 import tornado.netutil
 import tornado.web
 import tornado.websocket
 
 from streamlit import config
 from streamlit import file_util
+from streamlit import metrics
 from streamlit.config_option import ConfigOption
 from streamlit.forward_msg_cache import ForwardMsgCache
 from streamlit.forward_msg_cache import create_reference_msg
+from streamlit.forward_msg_cache import hash_msg_body
 from streamlit.forward_msg_cache import populate_hash_if_needed
+from streamlit.forward_msg_cache import serialize_msg_body
+from streamlit.forward_msg_store import create_forward_msg_store
 from streamlit.report_session import ReportSession
 from streamlit.uploaded_file_manager import UploadedFileManager
 from streamlit.logger import get_logger
@@ -43,6 +51,8 @@ from streamlit.components.v1.components import ComponentRegistry
 from streamlit.components.v1.components import ComponentRequestHandler
 from streamlit.proto.BackMsg_pb2 import BackMsg
 from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.server.websocket_compression import AdaptiveCompressor
+from streamlit.server.websocket_compression import get_connection_compressor
 from streamlit.server.upload_file_request_handler import (
     UploadFileRequestHandler,
     UPLOAD_FILE_ROUTE,
@@ -55,11 +65,13 @@ from streamlit.server.routes import MediaFileHandler
 from streamlit.server.routes import MessageCacheHandler
 from streamlit.server.routes import MetricsHandler
 from streamlit.server.routes import StaticFileHandler
+from streamlit.server.sent_delta_tracker import SentDeltaTracker
 from streamlit.server.server_util import MESSAGE_SIZE_LIMIT
 from streamlit.server.server_util import is_cacheable_msg
 from streamlit.server.server_util import is_url_from_allowed_origins
 from streamlit.server.server_util import make_url_path_regex
 from streamlit.server.server_util import serialize_forward_msg
+from streamlit.server.server_util import serialize_forward_msg_list
 
 if TYPE_CHECKING:
     from streamlit.report import Report
@@ -75,6 +87,35 @@ TORNADO_SETTINGS = {
 }
 
 
+# The send loop takes turns between sessions that have messages to deliver.
+# In each turn, a session writes messages until it has used up this many
+# bytes.
+SEND_TURN_BYTE_BUDGET = 256 * 1024
+
+# Messages at least this large are bulk payloads. Sessions whose next message
+# is smaller than this get their turn first.
+BULK_MESSAGE_SIZE = 64 * 1024
+
+# Messages at least this large are serialized and hashed on a thread pool,
+# so that the IOLoop can keep serving other sessions in the meantime.
+# Smaller messages are serialized on the IOLoop, where it's quicker than a
+# round trip through the pool.
+THREADED_SERIALIZATION_MIN_SIZE = 1024 * 1024
+
+# Number of threads in that pool.
+_SERIALIZATION_MAX_WORKERS = 2
+
+# Browsers say which version of the websocket protocol they speak in the
+# protocolVersion argument of the /stream URL:
+# 1 (the default): each websocket frame is a single ForwardMsg.
+# 2: each websocket frame is a ForwardMsgList, which holds all the messages
+#    a session sent in one turn of the send loop.
+# 3: in addition, elements that a rerun didn't change aren't sent again.
+#    Instead, the browser is told to keep them, with a Delta whose
+#    unchanged_count covers a range of sibling delta_paths.
+BATCHED_PROTOCOL_VERSION = 2
+UNCHANGED_DELTAS_PROTOCOL_VERSION = 3
+
 # When server.port is not available it will look for the next available port
 # up to MAX_PORT_SEARCH_RETRIES.
 MAX_PORT_SEARCH_RETRIES = 100
@@ -106,6 +147,61 @@ class SessionInfo(object):
         self.ws = ws
         self.report_run_count = 0
 
+        # Number of bytes written to the websocket that haven't been
+        # flushed to the network yet.
+        self.buffered_bytes = 0
+
+        # time.monotonic() at which buffered_bytes went over
+        # server.maxOutstandingWriteSize, or None if it's under the limit.
+        self.over_write_limit_since = None  # type: Optional[float]
+
+        # Messages flushed from the session's browser queue that haven't
+        # been sent yet, and the serialized form of the next ones to go out.
+        self.pending_msgs = collections.deque()  # type: Deque[ForwardMsg]
+        self.pending_frames = collections.deque()  # type: Deque[bytes]
+
+        # True while the next message to go out is being serialized on the
+        # thread pool. Nothing else is sent to the session until it's done,
+        # so that messages stay in order.
+        self.is_serializing = False
+
+        # Number of messages written to the session's websocket(s) so far,
+        # and the most recent of them, serialized, oldest first. They're
+        # kept so that a browser that reconnects can be sent the ones it
+        # missed. See _resume_report_session.
+        self.sent_msg_count = 0
+        self.sent_msgs = collections.deque()  # type: Deque[bytes]
+        self.sent_msgs_bytes = 0
+
+        # time.monotonic() at which the browser disconnected, if the session
+        # is waiting for it to reconnect.
+        self.detached_since = None  # type: Optional[float]
+
+        # time.monotonic() of the session's last activity: a message from
+        # its browser, or one enqueued for it. And the IOLoop timeout that
+        # hibernates the session once it's been idle for
+        # server.idleSessionHibernateTimeout.
+        self.last_active = time.monotonic()
+        self.idle_check = None  # type: Optional[object]
+
+        # time.monotonic() at which a browser connected and got this
+        # session, until the first Delta is sent to it. And whether the
+        # session came from the preheated session pool.
+        self.connected_at = None  # type: Optional[float]
+        self.was_preheated = False
+
+        # True if the session's browser speaks
+        # UNCHANGED_DELTAS_PROTOCOL_VERSION. If so, we keep track of what
+        # it's showing. And of the delta_path of the first of the unchanged
+        # deltas we've skipped but haven't told the browser about yet, and
+        # how many of them there are.
+        self.skips_unchanged_deltas = (
+            ws is not None and ws.protocol_version >= UNCHANGED_DELTAS_PROTOCOL_VERSION
+        )
+        self.sent_deltas = SentDeltaTracker()
+        self.unchanged_deltas_path = None  # type: Optional[List[int]]
+        self.unchanged_deltas_count = 0
+
 
 class State(Enum):
     INITIAL = "INITIAL"
@@ -235,11 +331,35 @@ class Server(object):
         self._must_stop = threading.Event()
         self._state = None
         self._set_state(State.INITIAL)
-        self._message_cache = ForwardMsgCache()
+        self._message_cache = ForwardMsgCache(create_forward_msg_store())
         self._uploaded_file_mgr = UploadedFileManager()
         self._uploaded_file_mgr.on_files_updated.connect(self.on_files_updated)
         self._report = None  # type: Optional[Report]
-        self._preheated_session_id = None  # type: Optional[str]
+
+        # IDs of the preheated sessions that are waiting for a browser,
+        # oldest first.
+        self._preheated_session_ids = collections.deque()  # type: Deque[str]
+
+        # IDs of the ReportSessions that have enqueued ForwardMsgs since
+        # _loop_coroutine last flushed them. Only accessed on the IOLoop
+        # thread.
+        self._dirty_session_ids = set()  # type: Set[str]
+
+        # Set whenever _loop_coroutine has something to do: a session has
+        # new messages, a browser connected, or the server is stopping.
+        self._need_send_data = tornado.locks.Event()
+
+        # The sum and the max of the sessions' SessionInfo.buffered_bytes,
+        # which are exported as metrics instead of each session's.
+        self._buffered_bytes = 0
+        self._max_session_buffered_bytes = 0
+
+        # Serializes large ForwardMsgs off the IOLoop. (Threads are only
+        # started once there's something to serialize.) It's shut down when
+        # _loop_coroutine exits.
+        self._serialization_executor = ThreadPoolExecutor(
+            max_workers=_SERIALIZATION_MAX_WORKERS
+        )
 
     @property
     def script_path(self) -> str:
@@ -280,6 +400,37 @@ class Server(object):
         """
         return self._session_info_by_id.get(session_id, None)
 
+    def _enqueued_some_message(self, session_id):
+        """Callback passed to each ReportSession. Called when the session
+        enqueues a ForwardMsg for its browser.
+
+        This can be called from any thread, so we just schedule the actual
+        work on the IOLoop.
+
+        Parameters
+        ----------
+        session_id : str
+            The ID of the ReportSession that enqueued the message.
+
+        """
+        self._ioloop.add_callback(self._mark_session_dirty, session_id)
+
+    def _mark_session_dirty(self, session_id):
+        """Flag a session as having messages to deliver, and wake up
+        _loop_coroutine. Must be called on the IOLoop thread.
+        """
+        self._mark_session_active(session_id)
+        self._dirty_session_ids.add(session_id)
+        self._need_send_data.set()
+
+    def _mark_session_active(self, session_id):
+        """Note that a session isn't idle: its browser sent a message, or
+        it has messages to deliver. Must be called on the IOLoop thread.
+        """
+        session_info = self._get_session_info(session_id)
+        if session_info is not None:
+            session_info.last_active = time.monotonic()
+
     def start(self, on_started):
         """Start the server.
 
@@ -304,10 +455,22 @@ class Server(object):
 
         self._ioloop.spawn_callback(self._loop_coroutine, on_started)
 
-    def get_debug(self) -> Dict[str, Dict[str, Any]]:
+    def get_debug(self) -> Dict[str, Any]:
+        debug = {
+            "sessions": {
+                session_id: {
+                    "buffered_bytes": session_info.buffered_bytes,
+                    "master_queue": session_info.session.get_master_queue_stats(),
+                    "hibernated": session_info.session.is_hibernated,
+                }
+                for session_id, session_info in self._session_info_by_id.items()
+            },
+            "preheated_sessions": list(self._preheated_session_ids),
+        }  # type: Dict[str, Any]
+        debug["message_cache"] = self._message_cache.get_stats()
         if self._report:
-            return {"report": self._report.get_debug()}
-        return {}
+            debug["report"] = self._report.get_debug()
+        return debug
 
     def _create_app(self):
         """Create our tornado web app.
@@ -421,24 +584,7 @@ class Server(object):
                     pass
 
                 elif self._state == State.ONE_OR_MORE_BROWSERS_CONNECTED:
-
-                    # Shallow-clone our sessions into a list, so we can iterate
-                    # over it and not worry about whether it's being changed
-                    # outside this coroutine.
-                    session_infos = list(self._session_info_by_id.values())
-
-                    for session_info in session_infos:
-                        if session_info.ws is None:
-                            # Preheated.
-                            continue
-                        msg_list = session_info.session.flush_browser_queue()
-                        for msg in msg_list:
-                            try:
-                                self._send_message(session_info, msg)
-                            except tornado.websocket.WebSocketClosedError:
-                                self._close_report_session(session_info.session.id)
-                            yield
-                        yield
+                    yield self._send_queued_messages()
 
                 elif self._state == State.NO_BROWSERS_CONNECTED:
                     pass
@@ -447,12 +593,19 @@ class Server(object):
                     # Break out of the thread loop if we encounter any other state.
                     break
 
-                yield tornado.gen.sleep(0.01)
+                # Sleep until a session enqueues a message, a browser
+                # connects, or the server is stopped.
+                yield self._need_send_data.wait()
+                self._need_send_data.clear()
 
             # Shut down all ReportSessions
             for session_info in list(self._session_info_by_id.values()):
                 session_info.session.shutdown()
 
+            # Release the cached messages. (If they're in a store that's
+            # shared with other processes, they'd otherwise outlive us.)
+            self._message_cache.clear()
+
             self._set_state(State.STOPPED)
 
         except Exception as e:
@@ -467,14 +620,274 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
             )
 
         finally:
+            self._serialization_executor.shutdown(wait=False)
             self._on_stopped()
 
-    def _send_message(self, session_info, msg):
-        """Send a message to a client.
+    @tornado.gen.coroutine
+    def _send_queued_messages(self):
+        """Deliver queued messages, taking turns between sessions.
+
+        In each round, every session that has messages gets one turn, in
+        which it writes up to SEND_TURN_BYTE_BUDGET bytes (and always at
+        least one message). Sessions whose next message is small go before
+        sessions whose next message is a bulk payload, so that one session
+        streaming a huge table doesn't hold up everyone else's widget
+        updates. Messages within a session are always sent in order.
+        """
+        # Sessions that have messages waiting in their pending_msgs.
+        session_infos = []  # type: List[SessionInfo]
+
+        while True:
+            # Swap out the set of dirty sessions, so that sessions that
+            # enqueue messages while we're yielding below will be picked up
+            # in the next round.
+            dirty_session_ids = self._dirty_session_ids
+            self._dirty_session_ids = set()
+
+            for session_id in dirty_session_ids:
+                session_info = self._get_session_info(session_id)
+                if session_info is None:
+                    # The session was closed after it was marked.
+                    continue
+                if session_info.ws is None:
+                    # Preheated, or waiting for its browser to reconnect.
+                    # This session will be marked dirty again when a
+                    # browser claims it.
+                    continue
+                if self._is_over_write_limit(session_info):
+                    # The browser isn't keeping up. Leave its messages
+                    # in the ReportQueue, where new deltas get
+                    # composed with pending ones for the same
+                    # delta_path. The session is marked dirty again
+                    # once its websocket drains.
+                    self._on_write_limit_exceeded(session_info)
+                    continue
+                session_info.pending_msgs.extend(
+                    session_info.session.flush_browser_queue()
+                )
+                if session_info not in session_infos:
+                    session_infos.append(session_info)
+
+            session_infos = [
+                session_info
+                for session_info in session_infos
+                if self._get_session_info(session_info.session.id) is session_info
+                and session_info.ws is not None
+                and self._peek_pending_frame(session_info) is not None
+            ]
+            if not session_infos:
+                return
+
+            # sort() is stable, so sessions otherwise keep their turn order.
+            session_infos.sort(
+                key=lambda session_info: len(session_info.pending_frames[0])
+                >= BULK_MESSAGE_SIZE
+            )
 
-        If the client is likely to have already cached the message, we may
-        instead send a "reference" message that contains only the hash of the
-        message.
+            for session_info in session_infos:
+                if self._is_batching_messages(session_info):
+                    self._send_batch(session_info)
+                    yield
+                    continue
+
+                budget = SEND_TURN_BYTE_BUDGET
+                while budget > 0:
+                    if self._is_over_write_limit(session_info):
+                        self._on_write_limit_exceeded(session_info)
+                        break
+
+                    msg_str = self._peek_pending_frame(session_info)
+                    if msg_str is None:
+                        break
+                    session_info.pending_frames.popleft()
+                    self._remember_sent_msgs(session_info, [msg_str])
+
+                    try:
+                        self._write_message(session_info, msg_str)
+                    except tornado.websocket.WebSocketClosedError:
+                        self._detach_report_session(
+                            session_info.session.id, session_info.ws
+                        )
+                        break
+
+                    budget -= len(msg_str)
+                    yield
+
+            yield
+
+    def _is_batching_messages(self, session_info):
+        """True if a session's messages should be sent in ForwardMsgLists."""
+        return session_info.ws.protocol_version >= BATCHED_PROTOCOL_VERSION
+
+    def _send_batch(self, session_info):
+        """Take a session's turn in _send_queued_messages, writing the
+        messages it sends in a single ForwardMsgList frame.
+
+        A message that doesn't fit in what's left of SEND_TURN_BYTE_BUDGET
+        waits for the session's next turn, unless it's the first one.
+        """
+        if self._is_over_write_limit(session_info):
+            self._on_write_limit_exceeded(session_info)
+            return
+
+        msg_strs = []  # type: List[bytes]
+        budget = SEND_TURN_BYTE_BUDGET
+        while budget > 0:
+            msg_str = self._peek_pending_frame(session_info)
+            if msg_str is None or (msg_strs and len(msg_str) > budget):
+                break
+            session_info.pending_frames.popleft()
+            msg_strs.append(msg_str)
+            budget -= len(msg_str)
+
+        if not msg_strs:
+            return
+
+        self._remember_sent_msgs(session_info, msg_strs)
+        try:
+            self._write_message(session_info, serialize_forward_msg_list(msg_strs))
+        except tornado.websocket.WebSocketClosedError:
+            self._detach_report_session(session_info.session.id, session_info.ws)
+
+    def _peek_pending_frame(self, session_info):
+        """Return the next serialized message to send to a session, or None
+        if it has nothing ready to send.
+
+        The message is serialized the first time this is called for it, and
+        kept in session_info.pending_frames until it's written. Messages of
+        at least THREADED_SERIALIZATION_MIN_SIZE bytes are serialized on the
+        thread pool instead: this returns None until that's done, at which
+        point the session is marked dirty again.
+        """
+        while not session_info.pending_frames and not session_info.is_serializing:
+            if not session_info.pending_msgs:
+                # Nothing else is ready to go out, so don't keep the browser
+                # waiting to hear about the unchanged deltas we skipped.
+                self._flush_unchanged_deltas(session_info)
+                break
+
+            msg = session_info.pending_msgs.popleft()
+            if msg.ByteSize() >= THREADED_SERIALIZATION_MIN_SIZE:
+                session_info.is_serializing = True
+                future = self._ioloop.run_in_executor(
+                    self._serialization_executor, _serialize_and_hash_msg_body, msg
+                )
+                self._ioloop.add_future(
+                    future,
+                    lambda f: self._on_msg_body_serialized(session_info, msg, f),
+                )
+            else:
+                self._add_pending_frame(session_info, msg)
+
+        if not session_info.pending_frames:
+            return None
+        return session_info.pending_frames[0]
+
+    def _on_msg_body_serialized(self, session_info, msg, future):
+        """Called on the IOLoop when a message serialized on the thread pool
+        is ready to be sent."""
+        session_info.is_serializing = False
+        if self._get_session_info(session_info.session.id) is not session_info:
+            # The session was closed in the meantime.
+            return
+
+        try:
+            msg_body, msg_hash = future.result()
+        except Exception:
+            LOGGER.exception("Failed to serialize a message. Closing the session.")
+            if session_info.ws is not None:
+                session_info.ws.close()
+            self._close_report_session(session_info.session.id)
+            return
+
+        if msg.hash == "":
+            msg.hash = msg_hash
+        self._add_pending_frame(session_info, msg, msg_body)
+        self._mark_session_dirty(session_info.session.id)
+
+    def _add_pending_frame(self, session_info, msg, msg_body=None):
+        """Serialize a message into session_info.pending_frames.
+
+        If the session's browser speaks UNCHANGED_DELTAS_PROTOCOL_VERSION
+        and already shows the message's element, the message is skipped
+        instead, and counted in the session's run of unchanged deltas. That
+        run goes out as a single Delta when it ends.
+        """
+        if session_info.connected_at is not None and msg.HasField("delta"):
+            metrics.Client.get("streamlit_session_first_paint_seconds").labels(
+                "hit" if session_info.was_preheated else "miss"
+            ).observe(time.monotonic() - session_info.connected_at)
+            session_info.connected_at = None
+
+        if not session_info.skips_unchanged_deltas:
+            session_info.pending_frames.append(
+                self._serialize_message(session_info, msg, msg_body)
+            )
+            return
+
+        if msg_body is None:
+            msg_body = serialize_msg_body(msg)
+        populate_hash_if_needed(msg, msg_body)
+
+        if session_info.sent_deltas.keep_if_unchanged(msg):
+            metrics.Client.get("streamlit_unchanged_deltas_total").inc()
+            delta_path = list(msg.metadata.delta_path)
+            run_path = session_info.unchanged_deltas_path
+            if (
+                run_path is not None
+                and run_path[:-1] == delta_path[:-1]
+                and run_path[-1] + session_info.unchanged_deltas_count == delta_path[-1]
+            ):
+                session_info.unchanged_deltas_count += 1
+            else:
+                self._flush_unchanged_deltas(session_info)
+                session_info.unchanged_deltas_path = delta_path
+                session_info.unchanged_deltas_count = 1
+            return
+
+        self._flush_unchanged_deltas(session_info)
+        session_info.pending_frames.append(
+            self._serialize_message(session_info, msg, msg_body)
+        )
+        session_info.sent_deltas.on_msg_sent(msg)
+
+    def _flush_unchanged_deltas(self, session_info):
+        """Add a Delta that tells the browser to keep the unchanged deltas
+        we skipped, if there are any, to session_info.pending_frames."""
+        if session_info.unchanged_deltas_path is None:
+            return
+
+        msg = ForwardMsg()
+        msg.metadata.delta_path[:] = session_info.unchanged_deltas_path
+        msg.delta.unchanged_count = session_info.unchanged_deltas_count
+        session_info.pending_frames.append(serialize_forward_msg(msg))
+
+        session_info.unchanged_deltas_path = None
+        session_info.unchanged_deltas_count = 0
+
+    def _remember_sent_msgs(self, session_info, msg_strs):
+        """Count the serialized messages that are about to be written to a
+        session's websocket, and keep the most recent ones for
+        _resume_report_session.
+        """
+        session_info.sent_msg_count += len(msg_strs)
+
+        if config.get_option("server.sessionResumeGracePeriod") <= 0:
+            return
+
+        max_bytes = config.get_option("server.maxResumeBufferSize") * 1024 * 1024
+        for msg_str in msg_strs:
+            session_info.sent_msgs.append(msg_str)
+            session_info.sent_msgs_bytes += len(msg_str)
+        while session_info.sent_msgs_bytes > max_bytes:
+            session_info.sent_msgs_bytes -= len(session_info.sent_msgs.popleft())
+
+    def _serialize_message(self, session_info, msg, msg_body=None):
+        """Serialize a message for a client, updating the message cache.
+
+        If the client is likely to have already cached the message, this
+        serializes a "reference" message that contains only the hash of the
+        message instead.
 
         Parameters
         ----------
@@ -482,30 +895,44 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
             The SessionInfo associated with websocket
         msg : ForwardMsg
             The message to send to the client
+        msg_body : bytes | None
+            The message's body, as returned by serialize_msg_body, if it has
+            already been serialized.
+
+        Returns
+        -------
+        bytes
+            The serialized message, ready to be written to the websocket.
 
         """
-        msg.metadata.cacheable = is_cacheable_msg(msg)
+        # Serialize the message once. Its hash and cacheability are
+        # computed from these bytes, and they're reused for the final frame.
+        if msg_body is None:
+            msg_body = serialize_msg_body(msg)
+        msg.metadata.cacheable = is_cacheable_msg(msg, msg_body)
+        populate_hash_if_needed(msg, msg_body)
+
         msg_to_send = msg
         if msg.metadata.cacheable:
-            populate_hash_if_needed(msg)
-
-            if self._message_cache.has_message_reference(
+            send_reference = self._message_cache.has_message_reference(
                 msg, session_info.session, session_info.report_run_count
-            ):
-
-                # This session has probably cached this message. Send
-                # a reference instead.
-                LOGGER.debug("Sending cached message ref (hash=%s)" % msg.hash)
-                msg_to_send = create_reference_msg(msg)
+            )
 
             # Cache the message so it can be referenced in the future.
             # If the message is already cached, this will reset its
             # age.
             LOGGER.debug("Caching message (hash=%s)" % msg.hash)
             self._message_cache.add_message(
-                msg, session_info.session, session_info.report_run_count
+                msg, session_info.session, session_info.report_run_count, msg_body
             )
 
+            if send_reference:
+                # This session has probably cached this message. Send
+                # a reference instead.
+                LOGGER.debug("Sending cached message ref (hash=%s)" % msg.hash)
+                msg_to_send = create_reference_msg(msg)
+                msg_body = None
+
         # If this was a `report_finished` message, we increment the
         # report_run_count for this session, and update the cache
         if (
@@ -523,13 +950,122 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
                 session_info.session, session_info.report_run_count
             )
 
-        # Ship it off!
-        session_info.ws.write_message(serialize_forward_msg(msg_to_send), binary=True)
+        return serialize_forward_msg(msg_to_send, msg_body)
+
+    def _write_message(self, session_info, msg_str):
+        """Write a serialized ForwardMsg to a session's websocket, keeping
+        track of how many bytes are still waiting to go out.
+
+        Parameters
+        ----------
+        session_info : SessionInfo
+        msg_str : bytes
+
+        """
+        future = session_info.ws.write_message(msg_str, binary=True)
+
+        num_bytes = len(msg_str)
+        self._add_buffered_bytes(session_info, num_bytes)
+
+        future.add_done_callback(
+            lambda f: self._on_message_written(session_info, num_bytes, f)
+        )
+
+    def _on_message_written(self, session_info, num_bytes, future):
+        """Called when a write_message future resolves."""
+        if not future.cancelled():
+            # Retrieve the exception, if any, so that it's not logged as
+            # unhandled. A closed websocket is dealt with in _loop_coroutine.
+            future.exception()
+
+        self._add_buffered_bytes(session_info, -num_bytes)
+
+        if (
+            session_info.over_write_limit_since is not None
+            and not self._is_over_write_limit(session_info)
+        ):
+            # The browser caught up. Send it the messages we held back.
+            session_info.over_write_limit_since = None
+            self._mark_session_dirty(session_info.session.id)
+
+    def _add_buffered_bytes(self, session_info, num_bytes):
+        """Add num_bytes, which may be negative, to a session's
+        buffered_bytes, and update the buffered bytes metrics."""
+        was_max = session_info.buffered_bytes == self._max_session_buffered_bytes
+        session_info.buffered_bytes += num_bytes
+        self._buffered_bytes += num_bytes
+
+        if session_info.buffered_bytes > self._max_session_buffered_bytes:
+            self._max_session_buffered_bytes = session_info.buffered_bytes
+        elif was_max and num_bytes < 0:
+            self._update_max_session_buffered_bytes()
+        self._update_buffered_bytes_metrics()
+
+    def _update_max_session_buffered_bytes(self):
+        """Find the session with the most buffered bytes again, after the
+        one that had the most wrote some or was closed."""
+        self._max_session_buffered_bytes = max(
+            (info.buffered_bytes for info in self._session_info_by_id.values()),
+            default=0,
+        )
+
+    def _update_buffered_bytes_metrics(self):
+        metrics.Client.get("streamlit_buffered_bytes").set(self._buffered_bytes)
+        metrics.Client.get("streamlit_session_buffered_bytes_max").set(
+            self._max_session_buffered_bytes
+        )
+
+    def _is_over_write_limit(self, session_info):
+        max_size_mb = config.get_option("server.maxOutstandingWriteSize")
+        return 0 < max_size_mb * 1024 * 1024 <= session_info.buffered_bytes
+
+    def _on_write_limit_exceeded(self, session_info):
+        """Start the slow-client timer for a session that went over
+        server.maxOutstandingWriteSize, if it isn't already running."""
+        if session_info.over_write_limit_since is not None:
+            return
+
+        session_info.over_write_limit_since = time.monotonic()
+
+        timeout = config.get_option("server.slowClientTimeout")
+        if timeout > 0:
+            self._ioloop.call_later(
+                timeout, self._disconnect_if_slow, session_info.session.id
+            )
+
+    def _disconnect_if_slow(self, session_id):
+        """Disconnect a session that has been over
+        server.maxOutstandingWriteSize for longer than
+        server.slowClientTimeout."""
+        session_info = self._get_session_info(session_id)
+        if session_info is None or session_info.over_write_limit_since is None:
+            return
+
+        timeout = config.get_option("server.slowClientTimeout")
+        if time.monotonic() - session_info.over_write_limit_since < timeout:
+            # The session caught up and then fell behind again. A newer
+            # timer will check on it.
+            return
+
+        LOGGER.warning(
+            "Disconnecting session %s: %s bytes have been waiting to be "
+            "written for over %s seconds.",
+            session_id,
+            session_info.buffered_bytes,
+            timeout,
+        )
+        metrics.Client.get("streamlit_slow_client_disconnects_total").inc()
+        session_info.ws.close()
+        self._close_report_session(session_id)
 
     def stop(self):
         click.secho("  Stopping...", fg="blue")
         self._set_state(State.STOPPING)
         self._must_stop.set()
+        # Wake up _loop_coroutine so that it notices it must stop. (This may
+        # be called from a signal handler, so we don't touch the Event
+        # directly.)
+        self._ioloop.add_callback(self._need_send_data.set)
 
     def _on_stopped(self):
         """Called when our runloop is exiting, to shut down the ioloop.
@@ -540,11 +1076,26 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
         """
         self._ioloop.stop()
 
+    def fill_preheated_session_pool(self):
+        """Add preheated sessions until there are
+        server.preheatedSessionPoolSize of them.
+
+        This is called on startup, and again each time a browser takes a
+        session from the pool, to replace it.
+        """
+        if self._state in (State.STOPPING, State.STOPPED):
+            return
+
+        pool_size = config.get_option("server.preheatedSessionPoolSize")
+        while len(self._preheated_session_ids) < pool_size:
+            self.add_preheated_report_session()
+
     def add_preheated_report_session(self):
         """Register a fake browser with the server and run the script.
 
-        This is used to start running the user's script even before the first
-        browser connects.
+        This is used to start running the user's script even before a
+        browser connects. The session waits in the preheated session pool
+        until a browser takes it.
         """
         session = self._create_or_reuse_report_session(ws=None)
         session.handle_rerun_script_request(is_preheat=True)
@@ -564,16 +1115,10 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
             The newly-created ReportSession for this browser connection.
 
         """
-        if self._preheated_session_id is not None:
-            assert len(self._session_info_by_id) == 1
-            assert ws is not None
-
-            session_id = self._preheated_session_id
-            self._preheated_session_id = None
-
-            session_info = self._session_info_by_id[session_id]
-            session_info.ws = ws
-            session = session_info.session
+        was_preheated = ws is not None and len(self._preheated_session_ids) > 0
+        if was_preheated:
+            session_id = self._preheated_session_ids.popleft()
+            session = self._session_info_by_id[session_id].session
 
             LOGGER.debug(
                 "Reused preheated session for ws %s. Session ID: %s", id(ws), session_id
@@ -585,6 +1130,7 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
                 script_path=self._script_path,
                 command_line=self._command_line,
                 uploaded_file_manager=self._uploaded_file_mgr,
+                message_enqueued_callback=self._enqueued_some_message,
             )
 
             LOGGER.debug(
@@ -595,15 +1141,294 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
                 "session.id '%s' registered multiple times!" % session.id
             )
 
-        self._session_info_by_id[session.id] = SessionInfo(ws, session)
+        session_info = SessionInfo(ws, session)
+        self._session_info_by_id[session.id] = session_info
 
         if ws is None:
-            self._preheated_session_id = session.id
+            self._preheated_session_ids.append(session.id)
         else:
+            session_info.connected_at = time.monotonic()
+            session_info.was_preheated = was_preheated
+            metrics.Client.get("streamlit_preheated_session_requests_total").labels(
+                "hit" if was_preheated else "miss"
+            ).inc()
+
             self._set_state(State.ONE_OR_MORE_BROWSERS_CONNECTED)
+            # Deliver anything the session enqueued before it had a browser.
+            self._mark_session_dirty(session.id)
+            self._start_idle_check(session_info)
 
+            if was_preheated:
+                # Replace the session this browser took, without holding
+                # it up.
+                self._ioloop.add_callback(self.fill_preheated_session_pool)
+
+        metrics.Client.get("streamlit_preheated_sessions").set(
+            len(self._preheated_session_ids)
+        )
         return session
 
+    def _resume_report_session(self, ws, session_id, last_seq):
+        """Reattach a browser that reconnected to the session it had before,
+        and send it the messages it missed.
+
+        Parameters
+        ----------
+        ws : _BrowserWebSocketHandler
+            The browser's new websocket.
+        session_id : str
+            The id of the browser's previous ReportSession.
+        last_seq : int
+            How many of that session's messages the browser received.
+
+        Returns
+        -------
+        ReportSession | None
+            The resumed session, or None if it can't be resumed: it has
+            ended, or the browser missed more messages than we kept.
+
+        """
+        session_info = self._get_session_info(session_id)
+        if session_info is None or session_id in self._preheated_session_ids:
+            return None
+
+        is_hibernated = session_info.session.is_hibernated
+        first_kept_seq = session_info.sent_msg_count - len(session_info.sent_msgs)
+        if not is_hibernated and not (
+            first_kept_seq <= last_seq <= session_info.sent_msg_count
+        ):
+            return None
+
+        if session_info.ws is not None:
+            # The browser's old connection dropped, but we haven't noticed
+            # yet. Its on_close won't detach the session from the new one.
+            session_info.ws.close()
+
+        session_info.ws = ws
+        session_info.detached_since = None
+        session_info.over_write_limit_since = None
+
+        if is_hibernated:
+            # The session released its report, so the browser can't be sent
+            # what it missed. It reruns the app instead, with its widget
+            # values, and starts counting the session's messages again.
+            session_info.sent_msg_count = 0
+            session_info.sent_msgs.clear()
+            session_info.sent_msgs_bytes = 0
+            session_info.pending_msgs.clear()
+            session_info.pending_frames.clear()
+            session_info.skips_unchanged_deltas = (
+                ws.protocol_version >= UNCHANGED_DELTAS_PROTOCOL_VERSION
+            )
+            session_info.sent_deltas = SentDeltaTracker()
+            session_info.unchanged_deltas_path = None
+            session_info.unchanged_deltas_count = 0
+            self._send_session_resumed_event(session_info, False, hibernated=True)
+
+            LOGGER.debug(
+                "Reattached hibernated session %s to ws %s", session_id, id(ws)
+            )
+
+        else:
+            missed_msgs = list(session_info.sent_msgs)[last_seq - first_kept_seq :]
+            self._send_session_resumed_event(session_info, True, missed_msgs)
+
+            LOGGER.debug(
+                "Resumed session %s for ws %s, resending %s messages",
+                session_id,
+                id(ws),
+                len(missed_msgs),
+            )
+
+        self._set_state(State.ONE_OR_MORE_BROWSERS_CONNECTED)
+        # Deliver anything the session enqueued while it was detached.
+        self._mark_session_dirty(session_id)
+        self._start_idle_check(session_info)
+
+        return session_info.session
+
+    def _send_session_resumed_event(
+        self, session_info, resumed, missed_msgs=(), hibernated=False
+    ):
+        """Tell a browser that asked to resume its session whether it did,
+        followed by the serialized messages it missed.
+
+        The event itself isn't counted in session_info.sent_msg_count: the
+        browser doesn't count it either.
+        """
+        if hibernated:
+            result = "hibernated"
+        elif resumed:
+            result = "resumed"
+        else:
+            result = "new_session"
+        metrics.Client.get("streamlit_session_resumes_total").labels(result).inc()
+
+        msg = ForwardMsg()
+        msg.session_event.session_resumed = resumed
+        msg_strs = [serialize_forward_msg(msg)] + list(missed_msgs)
+
+        if self._is_batching_messages(session_info):
+            self._write_message(session_info, serialize_forward_msg_list(msg_strs))
+        else:
+            for msg_str in msg_strs:
+                self._write_message(session_info, msg_str)
+
+    def _detach_report_session(self, session_id, ws):
+        """Called when a session's websocket closes.
+
+        The session is kept for server.sessionResumeGracePeriod seconds, in
+        case its browser reconnects and resumes it, and closed after that.
+
+        Parameters
+        ----------
+        session_id : str
+            The ReportSession's id string.
+        ws : _BrowserWebSocketHandler
+            The websocket that closed.
+        """
+        session_info = self._get_session_info(session_id)
+        if session_info is None or session_info.ws is not ws:
+            # The session was closed, or another websocket resumed it.
+            return
+
+        grace_period = config.get_option("server.sessionResumeGracePeriod")
+        if grace_period <= 0:
+            self._close_report_session(session_id)
+            return
+
+        LOGGER.debug("Detached session %s from ws %s", session_id, id(ws))
+
+        detached_since = time.monotonic()
+        session_info.ws = None
+        session_info.detached_since = detached_since
+        session_info.over_write_limit_since = None
+        self._cancel_idle_check(session_info)
+
+        self._ioloop.call_later(
+            grace_period, self._close_if_still_detached, session_id, detached_since
+        )
+
+        hibernate_timeout = config.get_option(
+            "server.disconnectedSessionHibernateTimeout"
+        )
+        if 0 < hibernate_timeout < grace_period:
+            self._ioloop.call_later(
+                hibernate_timeout,
+                self._hibernate_if_still_detached,
+                session_id,
+                detached_since,
+            )
+
+        if all(info.ws is None for info in self._session_info_by_id.values()):
+            self._set_state(State.NO_BROWSERS_CONNECTED)
+
+    def _close_if_still_detached(self, session_id, detached_since):
+        """Close a session whose browser didn't reconnect within
+        server.sessionResumeGracePeriod."""
+        session_info = self._get_session_info(session_id)
+        if session_info is not None and session_info.detached_since == detached_since:
+            LOGGER.debug("Session %s wasn't resumed. Closing it.", session_id)
+            self._close_report_session(session_id)
+
+    def _hibernate_if_still_detached(self, session_id, detached_since):
+        """Hibernate a session whose browser didn't reconnect within
+        server.disconnectedSessionHibernateTimeout."""
+        session_info = self._get_session_info(session_id)
+        if session_info is None or session_info.detached_since != detached_since:
+            return
+
+        if not self._hibernate_report_session(session_info):
+            # Its script is still running. Try again later.
+            self._ioloop.call_later(
+                config.get_option("server.disconnectedSessionHibernateTimeout"),
+                self._hibernate_if_still_detached,
+                session_id,
+                detached_since,
+            )
+
+    def _start_idle_check(self, session_info):
+        """Hibernate a connected session each time it's been idle for
+        server.idleSessionHibernateTimeout."""
+        self._cancel_idle_check(session_info)
+        timeout = config.get_option("server.idleSessionHibernateTimeout")
+        if timeout > 0:
+            session_info.idle_check = self._ioloop.call_later(
+                timeout, self._hibernate_if_idle, session_info.session.id
+            )
+
+    def _cancel_idle_check(self, session_info):
+        if session_info.idle_check is not None:
+            self._ioloop.remove_timeout(session_info.idle_check)
+            session_info.idle_check = None
+
+    def _hibernate_if_idle(self, session_id):
+        session_info = self._get_session_info(session_id)
+        if session_info is None or session_info.ws is None:
+            return
+
+        timeout = config.get_option("server.idleSessionHibernateTimeout")
+        idle_for = time.monotonic() - session_info.last_active
+        if idle_for >= timeout:
+            # If the session is busy, this is retried after another timeout.
+            self._hibernate_report_session(session_info)
+            delay = timeout
+        else:
+            delay = timeout - idle_for
+
+        session_info.idle_check = self._ioloop.call_later(
+            delay, self._hibernate_if_idle, session_id
+        )
+
+    def _hibernate_report_session(self, session_info):
+        """Release the memory an idle session holds: its report, its media
+        files and the messages kept for its browser to resume with. A
+        browser that resumes it afterwards reruns the app instead.
+
+        A session whose browser is connected keeps its media files, since
+        the browser still shows them.
+
+        Returns
+        -------
+        bool
+            False if the session is busy and can't hibernate now.
+
+        """
+        if session_info.ws is not None and (
+            session_info.pending_msgs
+            or session_info.pending_frames
+            or session_info.is_serializing
+            or session_info.over_write_limit_since is not None
+        ):
+            # Its browser is still being sent messages.
+            return False
+
+        freed_bytes = session_info.session.hibernate(
+            release_media_files=session_info.ws is None
+        )
+        if freed_bytes is None:
+            return False
+
+        if session_info.ws is None:
+            # The messages that were waiting for the browser to reconnect
+            # are part of the report we just released.
+            session_info.pending_msgs.clear()
+            session_info.pending_frames.clear()
+
+        freed_bytes += session_info.sent_msgs_bytes
+        metrics.Client.get("streamlit_session_hibernation_freed_bytes_total").inc(
+            session_info.sent_msgs_bytes
+        )
+        session_info.sent_msgs.clear()
+        session_info.sent_msgs_bytes = 0
+
+        LOGGER.debug(
+            "Hibernated session %s, freeing about %s bytes",
+            session_info.session.id,
+            freed_bytes,
+        )
+        return True
+
     def _close_report_session(self, session_id):
         """Shutdown and remove a ReportSession.
 
@@ -615,12 +1440,22 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
         session_id : str
             The ReportSession's id string.
         """
+        if session_id in self._preheated_session_ids:
+            self._preheated_session_ids.remove(session_id)
+            metrics.Client.get("streamlit_preheated_sessions").set(
+                len(self._preheated_session_ids)
+            )
+
         if session_id in self._session_info_by_id:
             session_info = self._session_info_by_id[session_id]
             del self._session_info_by_id[session_id]
+            self._cancel_idle_check(session_info)
             session_info.session.shutdown()
+            if session_info.buffered_bytes == self._max_session_buffered_bytes:
+                self._update_max_session_buffered_bytes()
+                self._update_buffered_bytes_metrics()
 
-        if len(self._session_info_by_id) == 0:
+        if all(info.ws is None for info in self._session_info_by_id.values()):
             self._set_state(State.NO_BROWSERS_CONNECTED)
 
 
@@ -630,6 +1465,9 @@ class _BrowserWebSocketHandler(tornado.websocket.WebSocketHandler):
     def initialize(self, server):
         self._server = server
         self._session = None
+        # See BATCHED_PROTOCOL_VERSION. Set when the websocket is opened.
+        self.protocol_version = 1
+        self._compressor = None  # type: Optional[AdaptiveCompressor]
         # The XSRF cookie is normally set when xsrf_form_html is used, but in a pure-Javascript application
         # that does not use any regular forms we just need to read the self.xsrf_token manually to set the
         # cookie as a side effect.
@@ -643,12 +1481,45 @@ class _BrowserWebSocketHandler(tornado.websocket.WebSocketHandler):
         return super().check_origin(origin) or is_url_from_allowed_origins(origin)
 
     def open(self):
+        try:
+            self.protocol_version = int(self.get_argument("protocolVersion", "1"))
+        except ValueError:
+            self.protocol_version = 1
+
+        # The connection only has a compressor if the browser asked for
+        # compression, and get_compression_options allowed it. We can only
+        # choose which messages to compress on the Tornado versions that
+        # get_connection_compressor supports: on others, Tornado compresses
+        # them all.
+        compressor = get_connection_compressor(self.ws_connection)
+        if compressor is not None:
+            self._compressor = AdaptiveCompressor(compressor)
+            self.ws_connection._compressor = self._compressor
+
+        # A browser that reconnects says which session it had, and how many
+        # of its messages it received.
+        resume_session_id = self.get_argument("sessionId", None)
+        if resume_session_id is not None:
+            try:
+                last_seq = int(self.get_argument("lastSeq", "0"))
+            except ValueError:
+                last_seq = -1
+            self._session = self._server._resume_report_session(
+                self, resume_session_id, last_seq
+            )
+            if self._session is not None:
+                return
+
         self._session = self._server._create_or_reuse_report_session(self)
 
+        if resume_session_id is not None:
+            session_info = self._server._get_session_info(self._session.id)
+            self._server._send_session_resumed_event(session_info, False)
+
     def on_close(self):
         if not self._session:
             return
-        self._server._close_report_session(self._session.id)
+        self._server._detach_report_session(self._session.id, self)
         self._session = None
 
     def get_compression_options(self):
@@ -660,9 +1531,33 @@ class _BrowserWebSocketHandler(tornado.websocket.WebSocketHandler):
         (See the docstring in the parent class.)
         """
         if config.get_option("server.enableWebsocketCompression"):
-            return {}
+            return {
+                "compression_level": config.get_option(
+                    "server.websocketCompressionLevel"
+                )
+            }
         return None
 
+    def write_message(self, message, binary=False):
+        """Send a message to the browser, compressing it only if
+        AdaptiveCompressor says it's worth it."""
+        if (
+            self._compressor is None
+            or self.ws_connection is None
+            or self._compressor.should_compress(message)
+        ):
+            return super().write_message(message, binary)
+
+        # Tornado compresses every message on a connection that has a
+        # compressor, so hide it while we write this one. (open only set up
+        # self._compressor if get_connection_compressor knows where the
+        # connection keeps it.)
+        self.ws_connection._compressor = None
+        try:
+            return super().write_message(message, binary)
+        finally:
+            self.ws_connection._compressor = self._compressor
+
     @tornado.gen.coroutine
     def on_message(self, payload):
         if not self._session:
@@ -675,6 +1570,7 @@ class _BrowserWebSocketHandler(tornado.websocket.WebSocketHandler):
             msg_type = msg.WhichOneof("type")
 
             LOGGER.debug("Received the following back message:\n%s", msg)
+            self._server._mark_session_active(self._session.id)
 
             if msg_type == "cloud_upload":
                 yield self._session.handle_save_request(self)
@@ -702,6 +1598,22 @@ class _BrowserWebSocketHandler(tornado.websocket.WebSocketHandler):
             self._session.enqueue_exception(e)
 
 
+def _serialize_and_hash_msg_body(msg):
+    """Serialize a ForwardMsg's body and compute its hash.
+
+    This runs on Server._serialization_executor. It doesn't modify msg,
+    which is still referenced by its Report's master queue.
+
+    Returns
+    -------
+    (bytes, str)
+        The message body and its hash.
+
+    """
+    msg_body = serialize_msg_body(msg)
+    return msg_body, hash_msg_body(msg_body)
+
+
 def _set_tornado_log_levels():
     if not config.get_option("global.developmentMode"):
         # Hide logs unless they're super important.
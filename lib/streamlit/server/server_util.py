@@ -20,20 +20,31 @@ from streamlit import config
 from streamlit import net_util
 from streamlit import type_util
 from streamlit import url_util
+from streamlit.forward_msg_cache import encode_field_header
 from streamlit.forward_msg_cache import populate_hash_if_needed
+from streamlit.forward_msg_cache import serialize_msg_body
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsgList
 
 # Largest message that can be sent via the WebSocket connection.
 # (Limit was picked arbitrarily)
 # TODO: Break message in several chunks if too large.
 MESSAGE_SIZE_LIMIT = 50 * 1e6  # 50MB
 
+_FORWARD_MSG_LIST_FIELD_NUMBER = ForwardMsgList.DESCRIPTOR.fields_by_name[
+    "messages"
+].number
 
-def is_cacheable_msg(msg):
+
+def is_cacheable_msg(msg, msg_body=None):
     """True if the given message qualifies for caching.
 
     Parameters
     ----------
     msg : ForwardMsg
+    msg_body : bytes | None
+        The message's serialized body, as returned by serialize_msg_body.
+        If given, its length is used as the message size.
 
     Returns
     -------
@@ -44,10 +55,15 @@ def is_cacheable_msg(msg):
     if msg.WhichOneof("type") in {"ref_hash", "initialize"}:
         # Some message types never get cached
         return False
-    return msg.ByteSize() >= config.get_option("global.minCachedMessageSize")
+    msg_size = len(msg_body) if msg_body is not None else msg.ByteSize()
+    if msg_size > MESSAGE_SIZE_LIMIT:
+        # serialize_forward_msg replaces it with an error, which the cache
+        # mustn't hand out under the original message's hash.
+        return False
+    return msg_size >= config.get_option("global.minCachedMessageSize")
 
 
-def serialize_forward_msg(msg):
+def serialize_forward_msg(msg, msg_body=None):
     """Serialize a ForwardMsg to send to a client.
 
     If the message is too large, it will be converted to an exception message
@@ -57,6 +73,10 @@ def serialize_forward_msg(msg):
     ----------
     msg : ForwardMsg
         The message to serialize
+    msg_body : bytes | None
+        The message's serialized body, as returned by serialize_msg_body.
+        If given, the message is not serialized again; its hash and metadata
+        are just appended to these bytes.
 
     Returns
     -------
@@ -64,10 +84,17 @@ def serialize_forward_msg(msg):
         The serialized byte string to send
 
     """
-    populate_hash_if_needed(msg)
-    msg_str = msg.SerializeToString()
+    if msg_body is None:
+        msg_body = serialize_msg_body(msg)
+    populate_hash_if_needed(msg, msg_body)
 
-    if len(msg_str) > MESSAGE_SIZE_LIMIT:
+    # Parsing concatenated protobufs merges them, so this is equivalent to
+    # msg.SerializeToString().
+    msg_str = msg_body + _serialize_hash_and_metadata(msg)
+
+    # Only the body is checked, as in is_cacheable_msg, so that every
+    # message replaced here went uncached.
+    if len(msg_body) > MESSAGE_SIZE_LIMIT:
         import streamlit.elements.exception as exception
 
         error = RuntimeError(
@@ -81,6 +108,38 @@ def serialize_forward_msg(msg):
     return msg_str
 
 
+def serialize_forward_msg_list(msg_strs):
+    """Pack serialized ForwardMsgs into a serialized ForwardMsgList, to send
+    to a client in a single websocket frame.
+
+    Parameters
+    ----------
+    msg_strs : list of bytes
+        ForwardMsgs, as returned by serialize_forward_msg.
+
+    Returns
+    -------
+    bytes
+
+    """
+    # A repeated message field is just each message's bytes preceded by
+    # the field's tag and the message's length, so the messages don't need
+    # to be serialized again.
+    parts = []
+    for msg_str in msg_strs:
+        parts.append(encode_field_header(_FORWARD_MSG_LIST_FIELD_NUMBER, len(msg_str)))
+        parts.append(msg_str)
+    return b"".join(parts)
+
+
+def _serialize_hash_and_metadata(msg):
+    """Serialize a ForwardMsg that only contains msg's hash and metadata."""
+    header = ForwardMsg()
+    header.hash = msg.hash
+    header.metadata.CopyFrom(msg.metadata)
+    return header.SerializeToString()
+
+
 def is_url_from_allowed_origins(url):
     """Return True if URL is from allowed origins (for CORS purpose).
 
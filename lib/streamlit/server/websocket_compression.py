@@ -0,0 +1,128 @@
+# Copyright 2018-2021 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-message websocket compression decisions."""
+
+import time
+import zlib
+
+import tornado
+
+from streamlit import config
+from streamlit import metrics
+
+# How much of a message we compress to estimate how compressible it is:
+# this many evenly spaced chunks of _SAMPLE_CHUNK_SIZE bytes each.
+_SAMPLE_CHUNKS = 4
+_SAMPLE_CHUNK_SIZE = 1024
+
+# Messages whose sample doesn't compress to less than this fraction of its
+# size are sent uncompressed. This catches payloads that are already
+# compressed, like images and Arrow buffers of random-looking data.
+_MAX_COMPRESSED_RATIO = 0.9
+
+# The Tornado versions, from inclusive to exclusive, whose websocket
+# connections keep their permessage-deflate compressor where
+# _BrowserWebSocketHandler expects it. That isn't part of Tornado's public
+# API, so on other versions every message is compressed, as Tornado does by
+# default.
+_SUPPORTED_TORNADO_VERSIONS = ((5, 0), (7, 0))
+
+
+class AdaptiveCompressor(object):
+    """Wraps a websocket connection's permessage-deflate compressor, and
+    decides which messages are worth compressing.
+
+    permessage-deflate lets each message be sent compressed or not, but
+    tornado compresses every message on a connection that has a compressor.
+    See _BrowserWebSocketHandler.write_message for how messages are sent
+    uncompressed.
+    """
+
+    def __init__(self, compressor):
+        """Constructor.
+
+        Parameters
+        ----------
+        compressor : tornado.websocket._PerMessageDeflateCompressor
+            The connection's compressor.
+
+        """
+        self._compressor = compressor
+
+    def should_compress(self, data):
+        """True if the given message should be compressed.
+
+        Parameters
+        ----------
+        data : bytes
+            The serialized message.
+
+        Returns
+        -------
+        bool
+
+        """
+        if len(data) < config.get_option("server.websocketCompressionMinSize"):
+            metrics.Client.get(
+                "streamlit_websocket_uncompressed_messages_total"
+            ).labels("small").inc()
+            return False
+
+        sample = _get_sample(data)
+        if len(zlib.compress(sample, 1)) >= len(sample) * _MAX_COMPRESSED_RATIO:
+            metrics.Client.get(
+                "streamlit_websocket_uncompressed_messages_total"
+            ).labels("incompressible").inc()
+            return False
+
+        return True
+
+    def compress(self, data):
+        """Compress a message, keeping track of the time spent and bytes
+        saved."""
+        start = time.perf_counter()
+        compressed = self._compressor.compress(data)
+        metrics.Client.get("streamlit_websocket_compression_seconds_total").inc(
+            time.perf_counter() - start
+        )
+        metrics.Client.get("streamlit_websocket_compression_saved_bytes_total").inc(
+            len(data) - len(compressed)
+        )
+        return compressed
+
+
+def get_connection_compressor(ws_connection):
+    """Return a websocket connection's permessage-deflate compressor, for
+    an AdaptiveCompressor to wrap.
+
+    Returns None if the connection doesn't compress messages, or if this
+    version of Tornado isn't in _SUPPORTED_TORNADO_VERSIONS.
+    """
+    min_version, max_version = _SUPPORTED_TORNADO_VERSIONS
+    if not min_version <= tornado.version_info[:2] < max_version:
+        return None
+    return getattr(ws_connection, "_compressor", None)
+
+
+def _get_sample(data):
+    """Return up to _SAMPLE_CHUNKS evenly spaced chunks of data."""
+    if len(data) <= _SAMPLE_CHUNKS * _SAMPLE_CHUNK_SIZE:
+        return data
+
+    stride = len(data) // _SAMPLE_CHUNKS
+    return b"".join(
+        data[i * stride : i * stride + _SAMPLE_CHUNK_SIZE]
+        for i in range(_SAMPLE_CHUNKS)
+    )
@@ -22,6 +22,7 @@ from streamlit import config
 from streamlit import env_util
 from streamlit import file_util
 from streamlit.folder_black_list import FolderBlackList
+from streamlit.script_cache import script_cache
 
 from streamlit.logger import get_logger
 
@@ -97,6 +98,9 @@ class LocalSourcesWatcher(object):
             LOGGER.error("Received event for non-watched file: %s", filepath)
             return
 
+        if filepath == self._report.script_path:
+            script_cache.invalidate(filepath)
+
         # Workaround:
         # Delete all watched modules so we can guarantee changes to the
         # updated module are reflected on reload.
@@ -18,6 +18,7 @@ import pandas as pd
 
 from streamlit.report_thread import get_report_ctx
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import streamlit.elements.data_frame as data_frame
 from tests import testutil
 
@@ -86,6 +87,49 @@ class DeltaGeneratorAddRowsTest(testutil.DeltaGeneratorTestCase):
                 df_proto.data.cols[0].int64s.data,
             )
 
+    def test_max_rows(self):
+        """add_rows with max_rows keeps the last max_rows rows."""
+        for method in self._get_unnamed_data_methods():
+            el = method(DATAFRAME)
+            el.add_rows(NEW_ROWS, max_rows=4)
+
+            df_proto = data_frame._get_data_frame(self.get_delta_from_queue())
+            self.assertEqual([2, 3, 4, 5], df_proto.data.cols[0].int64s.data)
+            self.assertEqual([20, 30, 40, 50], df_proto.data.cols[1].int64s.data)
+            self.assertEqual(1, df_proto.index.range_index.start)
+            self.assertEqual(5, df_proto.index.range_index.stop)
+
+            # The browser truncates an add_rows delta that's sent on its own.
+            self.report_queue.clear()
+            el.add_rows(NEW_ROWS, max_rows=4)
+            self.assertEqual(4, self.get_delta_from_queue().add_rows.max_rows)
+
+            get_report_ctx().reset()
+            self.report_queue.clear()
+
+    def test_max_rows_that_melt_dataframes(self):
+        """Charts created with max_rows keep the last max_rows rows of the
+        original data."""
+        for method in [st.line_chart, st.bar_chart, st.area_chart]:
+            el = method(DATAFRAME, max_rows=3)
+            el.add_rows(NEW_ROWS)
+
+            df_proto = data_frame._get_data_frame(self.get_delta_from_queue())
+            # Melted data has the index, then the column name, then the value.
+            self.assertEqual([2, 2, 3, 3, 4, 4], df_proto.data.cols[0].int64s.data)
+            self.assertEqual(
+                ["a", "b", "a", "b", "a", "b"], df_proto.data.cols[1].strings.data
+            )
+            self.assertEqual([3, 30, 4, 40, 5, 50], df_proto.data.cols[2].int64s.data)
+
+            get_report_ctx().reset()
+            self.report_queue.clear()
+
+    def test_invalid_max_rows(self):
+        el = st.dataframe(DATAFRAME)
+        with self.assertRaises(StreamlitAPIException):
+            el.add_rows(NEW_ROWS, max_rows=0)
+
     def test_simple_add_rows(self):
         """Test plain old add_rows."""
         all_methods = self._get_unnamed_data_methods() + self._get_named_data_methods()
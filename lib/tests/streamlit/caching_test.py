@@ -14,13 +14,23 @@
 
 """st.caching unit tests."""
 from unittest.mock import patch, Mock
+import importlib.util
+import os
+import sys
+import tempfile
 import threading
+import time
+import traceback
 import unittest
 import types
 
+import numpy as np
+import pandas as pd
+
 from streamlit import caching
 from streamlit import hashing
 from streamlit.elements import exception
+from streamlit.errors import StreamlitAPIException
 from streamlit.proto.Exception_pb2 import Exception as ExceptionProto
 from tests import testutil
 import streamlit as st
@@ -91,6 +101,65 @@ class CacheTest(testutil.DeltaGeneratorTestCase):
 
         self.assertEqual(r, r2)
 
+    @patch.object(st, "exception")
+    def test_mutate_dataframe_return(self, exception):
+        """Cached DataFrames should be read-only, and have their changes
+        detected without being hashed again."""
+
+        @st.cache
+        def f():
+            return pd.DataFrame({"a": np.arange(5), "b": list("abcde")})
+
+        df = f()
+        with self.assertRaises(ValueError):
+            df.iloc[0, 0] = 12
+
+        with patch("pandas.util.hash_pandas_object") as hash_df:
+            self.assertIs(df, f())
+        hash_df.assert_not_called()
+        exception.assert_not_called()
+
+        df["c"] = 0
+        f()
+        exception.assert_called()
+
+    @patch.object(st, "exception")
+    def test_mutate_array_return(self, exception):
+        @st.cache
+        def f():
+            return np.zeros(10)
+
+        arr = f()
+        self.assertFalse(arr.flags.writeable)
+        f()
+        exception.assert_not_called()
+
+        arr.flags.writeable = True
+        arr[0] = 1
+        f()
+        exception.assert_called()
+
+    @patch(
+        "streamlit.caching.config.get_option",
+        side_effect=testutil.build_mock_config_get_option(
+            {"client.strictCacheMutationCheck": True}
+        ),
+    )
+    @patch.object(st, "exception")
+    def test_strict_mutation_check(self, exception, _):
+        """With client.strictCacheMutationCheck, cached arrays should stay
+        writable, and be hashed on every hit."""
+
+        @st.cache
+        def f():
+            return np.zeros(10)
+
+        arr = f()
+        self.assertTrue(arr.flags.writeable)
+        arr[0] = 1
+        f()
+        exception.assert_called()
+
     @patch.object(st, "exception")
     def test_mutate_args(self, exception):
         @st.cache
@@ -205,6 +274,132 @@ class CacheTest(testutil.DeltaGeneratorTestCase):
         # The other thread should not have modified the main thread
         self.assertEqual(1, get_counter())
 
+    def _call_concurrently(self, func, num_threads):
+        """Call func in num_threads threads at once, and return each
+        thread's result or exception."""
+        results = []
+
+        def call_func():
+            try:
+                results.append(func())
+            except Exception as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=call_func) for _ in range(num_threads)]
+        threads[0].start()
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_misses(self):
+        """Concurrent misses for the same value should call the function
+        once, and share its value."""
+        calls = []
+
+        @st.cache(show_spinner=False)
+        def f(x):
+            calls.append(x)
+            # Give the other threads time to miss the cache too.
+            time.sleep(0.5)
+            return [x]
+
+        results = self._call_concurrently(lambda: f(1), 5)
+        self.assertEqual([1], calls)
+        self.assertEqual([[1]] * 5, results)
+        # The waiting threads get the very object that was cached.
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_concurrent_misses_fail_together(self):
+        """If the function raises, every thread waiting for it should get
+        the exception, and the next call should try again."""
+        calls = []
+
+        @st.cache(show_spinner=False)
+        def f(x):
+            calls.append(x)
+            time.sleep(0.5)
+            raise ValueError("failed")
+
+        results = self._call_concurrently(lambda: f(1), 5)
+        self.assertEqual([1], calls)
+        self.assertEqual(5, len(results))
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+        with self.assertRaises(ValueError):
+            f(1)
+        self.assertEqual([1, 1], calls)
+
+    def test_concurrent_misses_get_clean_tracebacks(self):
+        """Each waiting thread should raise its own copy of the exception,
+        with a traceback that doesn't pile up other threads' frames."""
+
+        @st.cache(show_spinner=False)
+        def f(x):
+            time.sleep(0.5)
+            raise ValueError("failed")
+
+        def call_f_in_waiter_a():
+            return f(1)
+
+        def call_f_in_waiter_b():
+            return f(1)
+
+        errors = {}
+
+        def call(name, func):
+            try:
+                func()
+            except ValueError as e:
+                errors[name] = e
+
+        threads = [
+            threading.Thread(target=call, args=("owner", lambda: f(1))),
+            threading.Thread(target=call, args=("a", call_f_in_waiter_a)),
+            threading.Thread(target=call, args=("b", call_f_in_waiter_b)),
+        ]
+        threads[0].start()
+        # Let the owner start computing before the waiters miss.
+        time.sleep(0.1)
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual({"owner", "a", "b"}, set(errors))
+        self.assertEqual(3, len({id(e) for e in errors.values()}))
+        for e in errors.values():
+            self.assertEqual(("failed",), e.args)
+
+        def frame_names(e):
+            return [frame.name for frame in traceback.extract_tb(e.__traceback__)]
+
+        self.assertIn("call_f_in_waiter_a", frame_names(errors["a"]))
+        self.assertNotIn("call_f_in_waiter_b", frame_names(errors["a"]))
+        self.assertIn("call_f_in_waiter_b", frame_names(errors["b"]))
+        self.assertNotIn("call_f_in_waiter_a", frame_names(errors["b"]))
+        for name in ("a", "b"):
+            # The waiters still see where the function failed, once.
+            self.assertEqual(1, frame_names(errors[name]).count("f"))
+        self.assertNotIn("call_f_in_waiter_a", frame_names(errors["owner"]))
+        self.assertNotIn("call_f_in_waiter_b", frame_names(errors["owner"]))
+
+    def test_recursive_miss(self):
+        """A function that calls itself with the same arguments shouldn't
+        wait for itself."""
+        depth = []
+
+        @st.cache(show_spinner=False)
+        def f(x):
+            depth.append(x)
+            if len(depth) < 3:
+                return f(x)
+            return x
+
+        self.assertEqual(1, f(1))
+        self.assertEqual([1, 1, 1], depth)
+
     def test_max_size(self):
         """The oldest object should be evicted when maxsize is reached."""
         # Create 2 cached functions to test that they don't interfere
@@ -275,6 +470,85 @@ class CacheTest(testutil.DeltaGeneratorTestCase):
             f(ii)
         self.assertEqual([], called_values)
 
+    def test_max_bytes(self):
+        """The least recently used values should be evicted when max_bytes
+        is reached."""
+        called_values = []
+
+        @st.cache(max_bytes=2500)
+        def f(x):
+            called_values.append(x)
+            return np.zeros(1000, dtype=np.uint8)
+
+        f(0), f(1)
+        # Use 0 again, so that 1 is the least recently used value, and is
+        # evicted to make room for 2.
+        f(0), f(2)
+        self.assertEqual([0, 1, 2], called_values)
+
+        f(0), f(2)
+        self.assertEqual([0, 1, 2], called_values)
+        f(1)
+        self.assertEqual([0, 1, 2, 1], called_values)
+
+    @patch(
+        "streamlit.caching.config.get_option",
+        side_effect=testutil.build_mock_config_get_option(
+            {"global.cacheMaxBytes": 2500}
+        ),
+    )
+    def test_global_max_bytes(self, _):
+        """global.cacheMaxBytes should evict the least recently used values
+        of all cached functions."""
+        foo_vals = []
+
+        @st.cache
+        def foo(x):
+            foo_vals.append(x)
+            return np.zeros(1000, dtype=np.uint8)
+
+        bar_vals = []
+
+        @st.cache
+        def bar(x):
+            bar_vals.append(x)
+            return np.zeros(1000, dtype=np.uint8)
+
+        foo(0), bar(0), foo(0)
+        # bar(0) is the least recently used value.
+        foo(1)
+        foo(0), foo(1)
+        self.assertEqual([0, 1], foo_vals)
+        bar(0)
+        self.assertEqual([0, 0], bar_vals)
+
+    def test_get_value_size(self):
+        df = pd.DataFrame({"a": np.zeros(100, dtype=np.int64)})
+        self.assertEqual(df.memory_usage(index=True).sum(), caching._get_value_size(df))
+
+        arr = np.zeros(1000, dtype=np.uint8)
+        self.assertEqual(1000, caching._get_value_size(arr))
+
+        # Containers are walked into, and shared objects are counted once.
+        self.assertLess(2000, caching._get_value_size([arr, {"b": arr.copy()}]))
+        self.assertGreater(3000, caching._get_value_size([arr, arr, {"b": arr}]))
+
+    @patch("streamlit.caching._VALUE_SIZE_MAX_DEPTH", 2)
+    @patch("streamlit.caching._VALUE_SIZE_MAX_SAMPLES", 10)
+    def test_get_value_size_is_bounded(self):
+        # Only a sample of a large container's elements is looked at, and
+        # the others are assumed to be the same size.
+        arrs = [np.zeros(1000, dtype=np.uint8) for _ in range(99)]
+        arrs.append(np.zeros(1000000, dtype=np.uint8))
+        self.assertEqual(
+            sys.getsizeof(arrs) + 100 * 1000, caching._get_value_size(arrs)
+        )
+
+        # Values nested too deep aren't looked at.
+        arr = np.zeros(1000, dtype=np.uint8)
+        self.assertLess(1000, caching._get_value_size([[arr]]))
+        self.assertGreater(1000, caching._get_value_size([[[arr]]]))
+
     @patch("streamlit.caching._TTLCACHE_TIMER")
     def test_ttl(self, timer_patch):
         """Entries should expire after the given ttl."""
@@ -315,6 +589,46 @@ class CacheTest(testutil.DeltaGeneratorTestCase):
         self.assertEqual([0, 0], foo_vals)
         self.assertEqual([0], bar_vals)
 
+    @patch("streamlit.caching._TTLCACHE_TIMER")
+    def test_background_refresh(self, timer_patch):
+        """With refresh="background", stale entries should be returned
+        while they're recomputed in the background."""
+        refreshing = threading.Event()
+        finish_refresh = threading.Event()
+        calls = []
+
+        @st.cache(ttl=1, refresh="background")
+        def foo(x):
+            calls.append(x)
+            if len(calls) > 1:
+                refreshing.set()
+                finish_refresh.wait(5)
+            return len(calls)
+
+        timer_patch.return_value = 0
+        self.assertEqual(1, foo(0))
+
+        # Advance our timer enough for the value to be stale. It's still
+        # returned, and is refreshed once.
+        timer_patch.return_value = 1.5
+        self.assertEqual(1, foo(0))
+        self.assertTrue(refreshing.wait(5))
+        self.assertEqual(1, foo(0))
+        finish_refresh.set()
+
+        deadline = time.monotonic() + 5
+        while foo(0) != 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(2, foo(0))
+        self.assertEqual([0, 0], calls)
+
+    def test_invalid_refresh(self):
+        with self.assertRaises(StreamlitAPIException):
+
+            @st.cache(refresh="always")
+            def foo():
+                return 42
+
     def test_clear_cache(self):
         """Clear cache should do its thing."""
         foo_vals = []
@@ -452,6 +766,105 @@ class CachingObjectTest(unittest.TestCase):
         exception.assert_called()
 
 
+class DiskCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tempdir = tempfile.TemporaryDirectory()
+        patcher = patch(
+            "streamlit.caching.file_util.get_streamlit_file_path",
+            side_effect=lambda *path: os.path.join(self._tempdir.name, *path),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._tempdir.cleanup)
+
+    def _get_cache_files(self):
+        return sorted(os.listdir(os.path.join(self._tempdir.name, "cache")))
+
+    def test_pickle(self):
+        caching._write_to_disk_cache("key", {"a": [1, 2]})
+        self.assertEqual(["key.pickle"], self._get_cache_files())
+        self.assertEqual({"a": [1, 2]}, caching._read_from_disk_cache("key"))
+
+    def test_ndarray(self):
+        """Arrays should be stored as .npy files, and memory-mapped."""
+        arr = np.arange(100.0)
+        caching._write_to_disk_cache("key", arr)
+        self.assertEqual(["key.npy"], self._get_cache_files())
+
+        value = caching._read_from_disk_cache("key", allow_output_mutation=False)
+        self.assertIsInstance(value, np.memmap)
+        np.testing.assert_array_equal(arr, value)
+        self.assertFalse(value.flags.writeable)
+
+        # Mutable values are mapped copy-on-write.
+        value = caching._read_from_disk_cache("key", allow_output_mutation=True)
+        value[0] = 12
+        np.testing.assert_array_equal(arr, caching._read_from_disk_cache("key"))
+
+        # Object arrays can't be mapped, so they're pickled.
+        caching._write_to_disk_cache("key", np.array([[1], "a"], dtype=object))
+        self.assertEqual(["key.pickle"], self._get_cache_files())
+
+    @unittest.skipUnless(
+        importlib.util.find_spec("pyarrow"), "DataFrames are pickled without pyarrow"
+    )
+    def test_dataframe(self):
+        """DataFrames should be stored as Arrow files, and memory-mapped."""
+        df = pd.DataFrame(
+            {"a": np.arange(100.0), "b": ["x"] * 100}, index=np.arange(100) * 2
+        )
+        caching._write_to_disk_cache("key", df)
+        self.assertEqual(["key.arrow"], self._get_cache_files())
+
+        value = caching._read_from_disk_cache("key", allow_output_mutation=False)
+        pd.testing.assert_frame_equal(df, value)
+        with self.assertRaises(ValueError):
+            value.iloc[0, 0] = 12
+
+        value = caching._read_from_disk_cache("key", allow_output_mutation=True)
+        value.iloc[0, 0] = 12
+
+        # DataFrames that Arrow can't store are pickled.
+        caching._write_to_disk_cache("key", pd.DataFrame({"a": [1, "b"]}))
+        self.assertEqual(["key.pickle"], self._get_cache_files())
+
+    @patch.object(st, "exception")
+    def test_persisted_array_is_fingerprinted(self, exception):
+        """Arrays read back from the disk cache are memmaps, which should be
+        fingerprinted on a hit rather than hashed."""
+
+        @st.cache(persist=True, show_spinner=False)
+        def f():
+            return np.arange(1000.0)
+
+        f()
+        caching._clear_mem_cache()
+        arr = f()
+        self.assertIsInstance(arr, np.memmap)
+
+        # Hashing a memmap would reduce it, and read its whole mapping.
+        with patch.object(np.memmap, "__reduce__", side_effect=AssertionError):
+            self.assertIs(arr, f())
+        exception.assert_not_called()
+
+    def test_missing_key(self):
+        with self.assertRaises(caching.CacheKeyNotFoundError):
+            caching._read_from_disk_cache("key")
+
+    def test_persist(self):
+        calls = []
+
+        @st.cache(persist=True, show_spinner=False)
+        def f():
+            calls.append(1)
+            return np.arange(10)
+
+        np.testing.assert_array_equal(np.arange(10), f())
+        caching._clear_mem_cache()
+        np.testing.assert_array_equal(np.arange(10), f())
+        self.assertEqual([1], calls)
+
+
 class CacheErrorsTest(testutil.DeltaGeneratorTestCase):
     """Make sure user-visible error messages look correct.
 
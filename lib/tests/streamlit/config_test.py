@@ -274,6 +274,7 @@ class ConfigTest(unittest.TestCase):
                 "browser.serverAddress",
                 "browser.serverPort",
                 "client.caching",
+                "client.strictCacheMutationCheck",
                 "client.displayEnabled",
                 "deprecation.showfileUploaderEncoding",
                 "deprecation.showPyplotGlobalUse",
@@ -282,6 +283,11 @@ class ConfigTest(unittest.TestCase):
                 "global.disableWatchdogWarning",
                 "global.logLevel",
                 "global.maxCachedMessageAge",
+                "global.maxReportMemory",
+                "global.cacheMaxBytes",
+                "global.messageCacheDir",
+                "global.messageCacheMaxSizeMB",
+                "global.messageCacheStore",
                 "global.minCachedMessageSize",
                 "global.metrics",
                 "global.sharingMode",
@@ -292,6 +298,8 @@ class ConfigTest(unittest.TestCase):
                 "logger.messageFormat",
                 "runner.magicEnabled",
                 "runner.installTracer",
+                "runner.asyncInterrupts",
+                "runner.processPoolSize",
                 "runner.fixMatplotlib",
                 "mapbox.token",
                 "s3.accessKeyId",
@@ -305,6 +313,8 @@ class ConfigTest(unittest.TestCase):
                 "server.enableCORS",
                 "server.cookieSecret",
                 "server.enableWebsocketCompression",
+                "server.websocketCompressionLevel",
+                "server.websocketCompressionMinSize",
                 "server.enableXsrfProtection",
                 "server.fileWatcherType",
                 "server.folderWatchBlacklist",
@@ -315,6 +325,13 @@ class ConfigTest(unittest.TestCase):
                 "server.port",
                 "server.runOnSave",
                 "server.maxUploadSize",
+                "server.maxOutstandingWriteSize",
+                "server.slowClientTimeout",
+                "server.sessionResumeGracePeriod",
+                "server.maxResumeBufferSize",
+                "server.preheatedSessionPoolSize",
+                "server.idleSessionHibernateTimeout",
+                "server.disconnectedSessionHibernateTimeout",
             ]
         )
         keys = sorted(config._config_options.keys())
@@ -680,3 +697,6 @@ class ConfigLoadingTest(unittest.TestCase):
 
     def test_upload_file_default_values(self):
         self.assertEqual(200, config.get_option("server.maxUploadSize"))
+
+    def test_preheated_session_pool_default_value(self):
+        self.assertEqual(1, config.get_option("server.preheatedSessionPoolSize"))
@@ -330,6 +330,30 @@ class DataFrameProtoTest(unittest.TestCase):
         err_msg = "Dataframes have incompatible shapes"
         self.assertEqual(err_msg, str(e.value))
 
+    def test_failed_add_rows_leaves_delta_untouched(self):
+        """add_rows checks that it can concatenate every column before it
+        changes anything."""
+        ints = AnyArray()
+        ints.int64s.data.extend([1, 2])
+        doubles = AnyArray()
+        doubles.doubles.data.extend([1.0, 2.0])
+
+        dt1 = Delta()
+        dt1.new_element.data_frame.data.cols.extend([ints, ints])
+        dt1.new_element.data_frame.index.plain_index.data.int64s.data.extend([0, 1])
+
+        dt2 = Delta()
+        dt2.new_element.data_frame.data.cols.extend([ints, doubles])
+        dt2.new_element.data_frame.index.plain_index.data.int64s.data.extend([2, 3])
+
+        original = Delta()
+        original.CopyFrom(dt1)
+
+        with pytest.raises(ValueError):
+            data_frame.add_rows(dt1, dt2)
+
+        self.assertEqual(original, dt1)
+
     def test_concat_index(self):
         """Test streamlit.data_frame._concat_index."""
         # Empty
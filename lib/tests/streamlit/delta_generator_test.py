@@ -164,7 +164,7 @@ class DeltaGeneratorTest(testutil.DeltaGeneratorTestCase):
                 st.empty().add_rows,
                 "streamlit.delta_generator",
                 "add_rows",
-                "(data=None, **kwargs)",
+                "(data=None, max_rows=None, **kwargs)",
             ),
             (st.write, "streamlit.delta_generator", "write", "(*args, **kwargs)"),
         ]
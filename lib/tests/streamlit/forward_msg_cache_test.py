@@ -22,6 +22,7 @@ from streamlit import report_session
 from streamlit.forward_msg_cache import ForwardMsgCache
 from streamlit.forward_msg_cache import create_reference_msg
 from streamlit.forward_msg_cache import populate_hash_if_needed
+from streamlit.forward_msg_cache import serialize_msg_body
 from streamlit.elements import data_frame
 from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
 
@@ -33,6 +34,13 @@ def _create_dataframe_msg(df, id=1):
     return msg
 
 
+def _create_markdown_msg(body):
+    msg = ForwardMsg()
+    msg.metadata.delta_path[:] = [RootContainer.MAIN, 0]
+    msg.delta.new_element.markdown.body = body
+    return msg
+
+
 def _create_mock_session():
     return MagicMock(report_session)
 
@@ -55,6 +63,41 @@ class ForwardMsgCacheTest(unittest.TestCase):
         msg2 = _create_dataframe_msg([1, 2, 3], 2)
         self.assertEqual(populate_hash_if_needed(msg1), populate_hash_if_needed(msg2))
 
+    def test_serialize_msg_body(self):
+        """Test that the body excludes the hash and metadata, and leaves the
+        message untouched."""
+        msg = _create_dataframe_msg([1, 2, 3], 34)
+        populate_hash_if_needed(msg)
+        orig_msg = ForwardMsg()
+        orig_msg.CopyFrom(msg)
+
+        body = ForwardMsg()
+        body.ParseFromString(serialize_msg_body(msg))
+        self.assertEqual("", body.hash)
+        self.assertFalse(body.HasField("metadata"))
+        self.assertEqual(msg.delta, body.delta)
+        self.assertEqual(orig_msg, msg)
+
+    def test_serialize_scalar_msg_body(self):
+        """Test the body of a message whose payload isn't a message."""
+        msg = ForwardMsg()
+        msg.report_finished = ForwardMsg.FINISHED_SUCCESSFULLY
+        msg.metadata.cacheable = True
+
+        body = ForwardMsg()
+        body.ParseFromString(serialize_msg_body(msg))
+        self.assertFalse(body.HasField("metadata"))
+        self.assertEqual(ForwardMsg.FINISHED_SUCCESSFULLY, body.report_finished)
+
+    def test_msg_hash_from_body(self):
+        """Test that a precomputed body produces the same hash."""
+        msg1 = _create_dataframe_msg([1, 2, 3])
+        msg2 = _create_dataframe_msg([1, 2, 3])
+        self.assertEqual(
+            populate_hash_if_needed(msg1),
+            populate_hash_if_needed(msg2, serialize_msg_body(msg2)),
+        )
+
     def test_reference_msg(self):
         """Test creation of 'reference' ForwardMsgs"""
         msg = _create_dataframe_msg([1, 2, 3], 34)
@@ -136,3 +179,56 @@ class ForwardMsgCacheTest(unittest.TestCase):
         runcount2 += 2
         cache.remove_expired_session_entries(session2, runcount2)
         self.assertIsNone(cache.get_message(msg_hash))
+
+    def test_lru_eviction(self):
+        """Test that the least recently referenced messages are evicted
+        when the cache is over its size limit."""
+        config._set_option("global.messageCacheMaxSizeMB", 1, "test")
+
+        cache = ForwardMsgCache()
+        session = _create_mock_session()
+        msg1 = _create_markdown_msg("1" * 400 * 1024)
+        msg2 = _create_markdown_msg("2" * 400 * 1024)
+        msg3 = _create_markdown_msg("3" * 400 * 1024)
+
+        cache.add_message(msg1, session, 0)
+        cache.add_message(msg2, session, 0)
+        # Referencing msg1 again makes msg2 the least recently referenced.
+        cache.add_message(msg1, session, 0)
+        cache.add_message(msg3, session, 0)
+
+        self.assertIsNotNone(cache.get_message(msg1.hash))
+        self.assertIsNone(cache.get_message(msg2.hash))
+        self.assertIsNotNone(cache.get_message(msg3.hash))
+
+        # The session's reference to msg2 is gone, so it'll be sent in full.
+        self.assertFalse(cache.has_message_reference(msg2, session, 0))
+
+    def test_stats(self):
+        """Test MessageCache.get_stats"""
+        config._set_option("global.messageCacheMaxSizeMB", 1, "test")
+
+        cache = ForwardMsgCache()
+        session = _create_mock_session()
+        msg1 = _create_markdown_msg("1" * 600 * 1024)
+        msg2 = _create_markdown_msg("2" * 600 * 1024)
+
+        cache.add_message(msg1, session, 0)
+        self.assertTrue(cache.has_message_reference(msg1, session, 0))
+        self.assertFalse(cache.has_message_reference(msg2, session, 0))
+        cache.add_message(msg2, session, 0)
+
+        self.assertEqual(
+            {
+                "entries": 1,
+                "bytes": len(serialize_msg_body(msg2)),
+                "hits": 1,
+                "misses": 1,
+                "hit_rate": 0.5,
+                "evictions": 1,
+            },
+            cache.get_stats(),
+        )
+
+        cache.clear()
+        self.assertEqual(0, cache.get_stats()["bytes"])
@@ -0,0 +1,151 @@
+# Copyright 2018-2021 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for ForwardMsgStore"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from streamlit import config, RootContainer
+from streamlit import report_session
+from streamlit.forward_msg_cache import ForwardMsgCache
+from streamlit.forward_msg_cache import populate_hash_if_needed
+from streamlit.forward_msg_cache import serialize_msg_body
+from streamlit.forward_msg_store import FileForwardMsgStore
+from streamlit.forward_msg_store import MemoryForwardMsgStore
+from streamlit.forward_msg_store import create_forward_msg_store
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+
+def _create_markdown_msg(body):
+    msg = ForwardMsg()
+    msg.metadata.delta_path[:] = [RootContainer.MAIN, 0]
+    msg.metadata.cacheable = True
+    msg.delta.new_element.markdown.body = body
+    populate_hash_if_needed(msg)
+    return msg
+
+
+def _create_file_store(directory, pid):
+    """Create a FileForwardMsgStore that thinks it's in process `pid`."""
+    with patch("streamlit.forward_msg_store.os.getpid", return_value=pid), patch(
+        "streamlit.forward_msg_store._is_process_running", return_value=True
+    ):
+        return FileForwardMsgStore(directory)
+
+
+class MemoryForwardMsgStoreTest(unittest.TestCase):
+    def test_add_get_remove(self):
+        store = MemoryForwardMsgStore()
+        msg = _create_markdown_msg("hi")
+
+        self.assertIsNone(store.get(msg.hash))
+        store.add(msg, serialize_msg_body(msg))
+        self.assertEqual(msg, store.get(msg.hash))
+        store.remove(msg.hash)
+        self.assertIsNone(store.get(msg.hash))
+
+
+class FileForwardMsgStoreTest(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._dir = self._temp_dir.name
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_add_get_remove(self):
+        store = _create_file_store(self._dir, 1)
+        msg = _create_markdown_msg("hi")
+
+        self.assertIsNone(store.get(msg.hash))
+        store.add(msg, serialize_msg_body(msg))
+        self.assertEqual(msg, store.get(msg.hash))
+        store.remove(msg.hash)
+        self.assertIsNone(store.get(msg.hash))
+
+    def test_shared_between_processes(self):
+        """Messages added in one process can be read in another, and are
+        stored once."""
+        store1 = _create_file_store(self._dir, 1)
+        store2 = _create_file_store(self._dir, 2)
+        msg = _create_markdown_msg("hi")
+
+        store1.add(msg, serialize_msg_body(msg))
+        self.assertEqual(msg, store2.get(msg.hash))
+
+        store2.add(msg, serialize_msg_body(msg))
+        path1 = os.path.join(self._dir, "%s.1" % msg.hash)
+        path2 = os.path.join(self._dir, "%s.2" % msg.hash)
+        self.assertTrue(os.path.samefile(path1, path2))
+
+        # The message is kept until every process has removed it.
+        store1.remove(msg.hash)
+        self.assertEqual(msg, store1.get(msg.hash))
+        store2.remove(msg.hash)
+        self.assertIsNone(store1.get(msg.hash))
+
+    def test_invalid_hash(self):
+        """Hashes that aren't hex digests never touch the filesystem."""
+        store = _create_file_store(self._dir, 1)
+        self.assertIsNone(store.get("../../etc/passwd"))
+        self.assertIsNone(store.get("*"))
+
+    def test_remove_stale_links(self):
+        """Links left behind by processes that exited are removed."""
+        store = _create_file_store(self._dir, 1)
+        msg = _create_markdown_msg("hi")
+        store.add(msg, serialize_msg_body(msg))
+
+        with patch(
+            "streamlit.forward_msg_store._is_process_running", return_value=False
+        ):
+            FileForwardMsgStore(self._dir)
+
+        self.assertIsNone(store.get(msg.hash))
+
+    def test_cache_serves_siblings_messages(self):
+        """A ForwardMsgCache can return messages that a sibling cached."""
+        cache1 = ForwardMsgCache(_create_file_store(self._dir, 1))
+        cache2 = ForwardMsgCache(_create_file_store(self._dir, 2))
+        msg = _create_markdown_msg("hi")
+
+        cache1.add_message(msg, MagicMock(report_session), 0)
+        self.assertEqual(msg, cache2.get_message(msg.hash))
+
+        cache1.clear()
+        self.assertIsNone(cache2.get_message(msg.hash))
+
+
+class CreateForwardMsgStoreTest(unittest.TestCase):
+    def test_memory(self):
+        config._set_option("global.messageCacheStore", "memory", "test")
+        self.assertIsInstance(create_forward_msg_store(), MemoryForwardMsgStore)
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config._set_option("global.messageCacheStore", "file", "test")
+            config._set_option("global.messageCacheDir", temp_dir, "test")
+            store = create_forward_msg_store()
+            config._set_option("global.messageCacheStore", "memory", "test")
+
+        self.assertIsInstance(store, FileForwardMsgStore)
+
+    def test_unsupported(self):
+        config._set_option("global.messageCacheStore", "nope", "test")
+        with self.assertRaises(RuntimeError):
+            create_forward_msg_store()
+        config._set_option("global.messageCacheStore", "memory", "test")
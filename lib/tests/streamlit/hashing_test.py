@@ -53,6 +53,7 @@ from streamlit.hashing import UserHashError
 from streamlit.hashing import _CodeHasher
 from streamlit.hashing import _NP_SIZE_LARGE
 from streamlit.hashing import _PANDAS_ROWS_LARGE
+from streamlit.script_runner import StopException
 from streamlit.type_util import is_type, get_fqn_type
 from streamlit.uploaded_file_manager import UploadedFile, UploadedFileRec
 import streamlit as st
@@ -226,6 +227,19 @@ class HashTest(unittest.TestCase):
             self.assertNotEqual(re.search(r"a bug in `.+` near line `\d+`", exc), None)
             self.assertEqual(exc.find(code_msg) >= 0, True)
 
+    def test_script_control_exceptions_are_not_wrapped(self):
+        """Stopping the script while it's hashing isn't a hashing error."""
+
+        class C(object):
+            def __reduce__(self):
+                raise StopException()
+
+        with self.assertRaises(StopException):
+            get_hash(C())
+
+        with self.assertRaises(StopException):
+            get_hash(1, hash_funcs={int: C.__reduce__})
+
     def test_hash_funcs_acceptable_keys(self):
         class C(object):
             def __init__(self):
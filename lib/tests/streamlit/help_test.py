@@ -94,7 +94,9 @@ class StHelpTest(testutil.DeltaGeneratorTestCase):
                 "suppress_st_warning=False, "
                 "hash_funcs=None, "
                 "max_entries=None, "
-                "ttl=None)"
+                "ttl=None, "
+                "max_bytes=None, "
+                "refresh=None)"
             ),
         )
         self.assertTrue(ds.doc_string.startswith("Function decorator to"))
@@ -106,6 +106,7 @@ class MetricsTest(unittest.TestCase):
             config.set_option("global.metrics", False)
             client = streamlit.metrics.Client.get_current()
             client._metrics = {}
+            num_builtin_metrics = len(client._raw_metrics)
 
             # yapf: disable
             client._raw_metrics = [
@@ -125,8 +126,8 @@ class MetricsTest(unittest.TestCase):
             client.get("unittest_gauge").set(42)
             client.get("unittest_gauge").dec()
 
-            calls = [
-                call(),  # Constructor
+            calls = [call()] * num_builtin_metrics  # Constructor
+            calls += [
                 call(),  # unittest_counter
                 call(),  # unittest_counter_labels
                 call(),  # unittest_gauge
@@ -207,6 +207,90 @@ class ReportQueueTest(unittest.TestCase):
         self.assertEqual(col0, [0, 1, 2, 3, 4, 5])
         self.assertEqual(col1, [10, 11, 12, 13, 14, 15])
 
+    def test_add_rows_in_place(self):
+        """Many add_rows are appended to a single message, and never change
+        a message that was enqueued or handed out."""
+        rq = ReportQueue()
+
+        df_msg = copy.deepcopy(DF_DELTA_MSG)
+        df_msg.metadata.delta_path[:] = make_delta_path(RootContainer.MAIN, (), 0)
+        add_rows_msg = copy.deepcopy(ADD_ROWS_MSG)
+        add_rows_msg.metadata.delta_path[:] = make_delta_path(RootContainer.MAIN, (), 0)
+
+        rq.enqueue(df_msg)
+        for _ in range(3):
+            rq.enqueue(add_rows_msg)
+
+        queue = list(rq)
+        self.assertEqual(1, len(queue))
+        col0 = queue[0].delta.new_element.data_frame.data.cols[0].int64s.data
+        self.assertEqual([0, 1, 2] + [3, 4, 5] * 3, col0)
+
+        # Iterating hands the message out, so the next add_rows composes a
+        # new one.
+        rq.enqueue(add_rows_msg)
+        self.assertEqual([0, 1, 2] + [3, 4, 5] * 3, col0)
+        col0 = rq.flush()[0].delta.new_element.data_frame.data.cols[0].int64s.data
+        self.assertEqual([0, 1, 2] + [3, 4, 5] * 4, col0)
+
+        self.assertEqual(DF_DELTA_MSG.delta, df_msg.delta)
+        self.assertEqual(ADD_ROWS_MSG.delta, add_rows_msg.delta)
+
+    def test_spill(self):
+        """Messages over max_size are spilled to disk, and read back when
+        they're needed."""
+        rq = ReportQueue(max_size=100)
+        msgs = []
+        for i in range(10):
+            msg = ForwardMsg()
+            msg.delta.new_element.text.body = "text %s" % i * 10
+            msg.metadata.delta_path[:] = make_delta_path(RootContainer.MAIN, (), i)
+            msgs.append(msg)
+            rq.enqueue(msg)
+
+        stats = rq.get_stats()
+        self.assertGreaterEqual(100, stats["bytes"])
+        self.assertLess(0, stats["spilled_bytes"])
+        self.assertEqual(msgs, list(rq))
+
+        # Composing with a spilled message reads it back.
+        add_rows_msg = copy.deepcopy(ADD_ROWS_MSG)
+        add_rows_msg.metadata.delta_path[:] = make_delta_path(RootContainer.MAIN, (), 0)
+        df_msg = copy.deepcopy(DF_DELTA_MSG)
+        df_msg.metadata.delta_path[:] = make_delta_path(RootContainer.MAIN, (), 0)
+        rq.enqueue(df_msg)
+        rq.enqueue(add_rows_msg)
+
+        queue = rq.flush()
+        self.assertEqual(msgs[1:], queue[1:])
+        col0 = queue[0].delta.new_element.data_frame.data.cols[0].int64s.data
+        self.assertEqual([0, 1, 2, 3, 4, 5], col0)
+        self.assertEqual({"bytes": 0, "spilled_bytes": 0}, rq.get_stats())
+
+    def test_spill_skips_unspillable_messages(self):
+        """Messages that can't be spilled aren't looked at again on every
+        enqueue, until they're handed out."""
+        rq = ReportQueue(max_size=100)
+        for i in range(10):
+            # Composing with a previous message makes the queue own it.
+            for body in ["a", "text %s" % i * 10]:
+                msg = ForwardMsg()
+                msg.delta.new_element.text.body = body
+                msg.metadata.delta_path[:] = make_delta_path(RootContainer.MAIN, (), i)
+                rq.enqueue(msg)
+        self.assertLess(100, rq.get_stats()["bytes"])
+        self.assertEqual(10, rq._spill_cursor)
+
+        # Only the new message is looked at, and spilled.
+        rq.enqueue(NEW_REPORT_MSG)
+        self.assertEqual(11, rq._spill_cursor)
+        self.assertLess(0, rq.get_stats()["spilled_bytes"])
+
+        # Once they're handed out, they're spilled.
+        rq.get_initial_msg()
+        rq.enqueue(NEW_REPORT_MSG)
+        self.assertGreaterEqual(100, rq.get_stats()["bytes"])
+
     def test_multiple_containers(self):
         """Deltas should only be coalesced if they're in the same container"""
         rq = ReportQueue()
@@ -27,6 +27,7 @@ from streamlit.report_thread import get_report_ctx
 from streamlit.script_runner import ScriptRunner
 from streamlit.uploaded_file_manager import UploadedFileManager
 from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.NewReport_pb2 import NewReport
 from streamlit.proto.StaticManifest_pb2 import StaticManifest
 from streamlit.errors import StreamlitAPIException
 from streamlit.widgets import Widgets
@@ -137,6 +138,70 @@ class ReportSessionTest(unittest.TestCase):
         self.assertEqual(ReportSessionState.SHUTDOWN_REQUESTED, rs._state)
         file_mgr.remove_session_files.assert_called_once_with(rs.id)
 
+    @patch("streamlit.report_session.LocalSourcesWatcher")
+    @patch("streamlit.report_session.media_file_manager")
+    def test_hibernate(self, media_file_manager, _1):
+        """A hibernated session releases its report and media files, and
+        runs its script with the widget values it had."""
+        media_file_manager.del_expired_files.return_value = 10
+        rs = ReportSession(None, "", "", UploadedFileManager())
+        rs._client_state.query_string = "foo=bar"
+        rs._report.enqueue(ForwardMsg(new_report=NewReport(report_id="report")))
+        msg = ForwardMsg()
+        msg.metadata.delta_path[:] = [0, 0]
+        msg.delta.new_element.markdown.body = "hi"
+        rs._report.enqueue(msg)
+        queued_bytes = rs.get_master_queue_stats()["bytes"]
+
+        self.assertFalse(rs.is_hibernated)
+        self.assertLess(10, rs.hibernate())
+        self.assertTrue(rs.is_hibernated)
+        # Only the report's initial message is kept.
+        self.assertLess(rs.get_master_queue_stats()["bytes"], queued_bytes)
+        media_file_manager.clear_session_files.assert_called_once_with(rs.id)
+
+        # Hibernating again frees nothing.
+        self.assertEqual(0, rs.hibernate())
+
+        with patch("streamlit.report_session.ScriptRunner") as script_runner:
+            rs.request_rerun()
+        self.assertFalse(rs.is_hibernated)
+        self.assertEqual(
+            "foo=bar", script_runner.call_args[1]["client_state"].query_string
+        )
+
+    @patch("streamlit.report_session.LocalSourcesWatcher")
+    @patch("streamlit.report_session.media_file_manager")
+    def test_hibernate_keeping_media_files(self, media_file_manager, _1):
+        """A session whose browser still shows its media files can
+        hibernate without releasing them."""
+        rs = ReportSession(None, "", "", UploadedFileManager())
+        rs.hibernate(release_media_files=False)
+        self.assertTrue(rs.is_hibernated)
+        media_file_manager.clear_session_files.assert_not_called()
+        media_file_manager.del_expired_files.assert_not_called()
+
+    @patch("streamlit.report_session.LocalSourcesWatcher")
+    def test_hibernate_while_running(self, _1):
+        """A session can't hibernate while its script is running."""
+        rs = ReportSession(None, "", "", UploadedFileManager())
+        rs._state = ReportSessionState.REPORT_IS_RUNNING
+
+        self.assertIsNone(rs.hibernate())
+        self.assertFalse(rs.is_hibernated)
+
+    @patch("streamlit.report_session.LocalSourcesWatcher")
+    def test_enqueue_calls_message_enqueued_callback(self, _1):
+        """The Server is notified each time a message is enqueued."""
+        callback = MagicMock()
+        rs = ReportSession(None, "", "", UploadedFileManager(), callback)
+
+        rs.enqueue(ForwardMsg())
+        callback.assert_called_once_with(rs.id)
+
+        rs.enqueue(ForwardMsg())
+        self.assertEqual(2, callback.call_count)
+
     @patch("streamlit.report_session.LocalSourcesWatcher")
     def test_unique_id(self, _1):
         """Each ReportSession should have a unique ID"""
@@ -0,0 +1,74 @@
+# Copyright 2018-2021 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""ScriptCache unit tests"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from streamlit.script_cache import ScriptCache
+
+
+class ScriptCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = ScriptCache()
+        fd, self.script_path = tempfile.mkstemp(suffix=".py")
+        os.close(fd)
+        self._write_script("x = 1\n")
+
+    def tearDown(self):
+        os.remove(self.script_path)
+
+    def _write_script(self, body):
+        with open(self.script_path, "w") as f:
+            f.write(body)
+
+    def test_code_is_reused(self):
+        code = self.cache.get_code(self.script_path, True)
+        self.assertIs(code, self.cache.get_code(self.script_path, True))
+
+        # Magic changes the code, so it's cached separately.
+        self.assertIsNot(code, self.cache.get_code(self.script_path, False))
+
+    def test_changed_script_is_recompiled(self):
+        code = self.cache.get_code(self.script_path, True)
+        self._write_script("x = 12\n")
+
+        new_code = self.cache.get_code(self.script_path, True)
+        self.assertIsNot(code, new_code)
+        self.assertIn(12, new_code.co_consts)
+
+    def test_invalidate(self):
+        """An edit that keeps the script's mtime and size is picked up once
+        the file watcher invalidates the script."""
+        stat = os.stat(self.script_path)
+        code = self.cache.get_code(self.script_path, True)
+
+        self._write_script("x = 2\n")
+        os.utime(self.script_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertIs(code, self.cache.get_code(self.script_path, True))
+
+        self.cache.invalidate(self.script_path)
+        self.assertIn(2, self.cache.get_code(self.script_path, True).co_consts)
+
+    def test_compile_error_is_not_cached(self):
+        with mock.patch(
+            "streamlit.script_cache._compile_script", side_effect=SyntaxError
+        ) as compile_script:
+            for _ in range(2):
+                with self.assertRaises(SyntaxError):
+                    self.cache.get_code(self.script_path, True)
+        self.assertEqual(2, compile_script.call_count)
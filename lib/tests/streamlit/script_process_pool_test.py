@@ -0,0 +1,272 @@
+# Copyright 2018-2021 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""ScriptProcessPool unit tests"""
+
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+from streamlit import script_process_pool
+from streamlit.media_file_manager import MediaFileManager
+from streamlit.media_file_manager import media_file_manager
+from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.proto.WidgetStates_pb2 import WidgetStates
+from streamlit.report import Report
+from streamlit.script_process_pool import ProcessScriptRunner
+from streamlit.script_process_pool import ScriptProcessPool
+from streamlit.script_request_queue import RerunData
+from streamlit.script_request_queue import ScriptRequest
+from streamlit.script_request_queue import ScriptRequestQueue
+from streamlit.script_runner import ScriptRunnerEvent
+from streamlit.uploaded_file_manager import UploadedFileManager
+from streamlit.uploaded_file_manager import UploadedFileRec
+
+
+def _get_script_path(script_name):
+    return os.path.join(
+        os.path.dirname(__file__), "scriptrunner", "test_data", script_name
+    )
+
+
+class _TestProcessScriptRunner(ProcessScriptRunner):
+    def __init__(self, script_name, uploaded_file_mgr=None):
+        self.forward_msgs = []
+        self.events = []
+        self.shutdown = threading.Event()
+        self.script_request_queue = ScriptRequestQueue()
+
+        super(_TestProcessScriptRunner, self).__init__(
+            session_id="test session id",
+            report=Report(_get_script_path(script_name), "test command line"),
+            enqueue_forward_msg=self.forward_msgs.append,
+            client_state=ClientState(),
+            request_queue=self.script_request_queue,
+            uploaded_file_mgr=uploaded_file_mgr,
+        )
+
+        def record_event(event, **kwargs):
+            self.events.append(event)
+            if event == ScriptRunnerEvent.SHUTDOWN:
+                self.shutdown.set()
+
+        self.on_event.connect(record_event, weak=False)
+
+    def enqueue(self, request, data=None):
+        self.script_request_queue.enqueue(request, data)
+        self.request_interrupt()
+
+    def text_deltas(self):
+        return [
+            msg.delta.new_element.text.body
+            for msg in self.forward_msgs
+            if msg.delta.new_element.HasField("text")
+        ]
+
+
+class ScriptProcessPoolTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = ScriptProcessPool(1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    def setUp(self):
+        patcher = mock.patch(
+            "streamlit.script_process_pool.get_script_process_pool",
+            return_value=self.pool,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("streamlit.script_process_pool._pool", self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_run_script(self):
+        """The script runs in the worker process, and can use media and
+        uploaded files."""
+        uploaded_file_mgr = UploadedFileManager()
+        scriptrunner = _TestProcessScriptRunner(
+            "process_pool_script.py", uploaded_file_mgr
+        )
+        with mock.patch.object(
+            uploaded_file_mgr,
+            "get_files",
+            return_value=[UploadedFileRec("id", "name", "type", b"uploaded")],
+        ) as get_files:
+            scriptrunner.enqueue(ScriptRequest.RERUN, RerunData())
+            scriptrunner.start()
+            self.assertTrue(scriptrunner.shutdown.wait(30))
+        get_files.assert_called_once()
+        self.assertEqual("test session id", get_files.call_args[0][0])
+
+        self.assertEqual(
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+            scriptrunner.events,
+        )
+        pid_text, uploaded_text = scriptrunner.text_deltas()
+        self.assertTrue(pid_text.startswith("pid "))
+        self.assertNotEqual("pid %s" % os.getpid(), pid_text)
+        self.assertEqual("uploaded", uploaded_text)
+
+        # The server process can serve the script's media file.
+        audio_url = [
+            msg.delta.new_element.audio.url
+            for msg in scriptrunner.forward_msgs
+            if msg.delta.new_element.HasField("audio")
+        ][0]
+        media_file = media_file_manager.get(os.path.basename(audio_url))
+        self.assertEqual(b"audio bytes", media_file.content)
+        media_file_manager.clear_session_files("test session id")
+        media_file_manager.del_expired_files()
+
+    def test_stop_script(self):
+        """Requests are passed on to the worker process, which interrupts
+        its script."""
+        scriptrunner = _TestProcessScriptRunner("infinite_loop.py")
+        scriptrunner.enqueue(ScriptRequest.RERUN, RerunData())
+        scriptrunner.start()
+
+        time.sleep(0.5)
+        scriptrunner.enqueue(ScriptRequest.STOP)
+        self.assertTrue(scriptrunner.shutdown.wait(30))
+        self.assertEqual(
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+            scriptrunner.events[-3:],
+        )
+
+    def test_worker_replaced_after_error(self):
+        """If handling a message from the worker fails, the session gets
+        the error, and the worker process is replaced."""
+        scriptrunner = _TestProcessScriptRunner("process_pool_script.py")
+        error = RuntimeError("handler failed")
+
+        def fail_on_start(event, **kwargs):
+            if event == ScriptRunnerEvent.SCRIPT_STARTED:
+                raise error
+
+        scriptrunner.on_event.connect(fail_on_start, weak=False)
+        exceptions = []
+        scriptrunner.on_event.connect(
+            lambda event, exception=None, **kwargs: exceptions.append(exception),
+            weak=False,
+        )
+        scriptrunner.enqueue(ScriptRequest.RERUN, RerunData())
+        scriptrunner.start()
+        self.assertTrue(scriptrunner.shutdown.wait(30))
+        # (Whether the other handlers saw SCRIPT_STARTED depends on the
+        # order blinker calls them in.)
+        self.assertEqual(
+            [
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+            scriptrunner.events[-2:],
+        )
+        self.assertIn(error, exceptions)
+
+        # The pool still runs scripts.
+        scriptrunner = _TestProcessScriptRunner("process_pool_script.py")
+        scriptrunner.enqueue(ScriptRequest.RERUN, RerunData())
+        scriptrunner.start()
+        self.assertTrue(scriptrunner.shutdown.wait(30))
+        self.assertEqual(ScriptRunnerEvent.SHUTDOWN, scriptrunner.events[-1])
+        self.assertIn(
+            ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS, scriptrunner.events
+        )
+        media_file_manager.clear_session_files("test session id")
+        media_file_manager.del_expired_files()
+
+    def test_close_session(self):
+        """Every worker process is told that the session was closed."""
+        worker = self.pool._workers[0]
+        with mock.patch.object(worker, "send") as send:
+            script_process_pool.close_worker_session("test session id")
+        send.assert_called_once_with(("session_closed", "test session id"))
+
+
+class _FakeConnection(object):
+    """The worker process's end of the Pipe, fed with messages from the
+    server."""
+
+    def __init__(self, msgs):
+        self._msgs = list(msgs)
+        self.sent = []
+
+    def recv(self):
+        if not self._msgs:
+            raise EOFError()
+        return self._msgs.pop(0)
+
+    def send(self, msg):
+        self.sent.append(msg)
+
+
+class WorkerMainTest(unittest.TestCase):
+    def test_session_closed(self):
+        """A worker drops a closed session's media files, without echoing
+        the change back to the server."""
+        worker_media_file_manager = MediaFileManager()
+        with mock.patch(
+            "streamlit.script_process_pool.media_file_manager",
+            worker_media_file_manager,
+        ):
+            worker_media_file_manager.add(
+                b"audio bytes", "audio/wav", "coord", session_id="closed"
+            )
+            worker_media_file_manager.add(
+                b"other bytes", "audio/wav", "coord", session_id="open"
+            )
+
+            conn = _FakeConnection([("session_closed", "closed")])
+            script_process_pool._worker_main(conn, {})
+
+        self.assertEqual(
+            ["open"], list(worker_media_file_manager._files_by_session_and_coord)
+        )
+        self.assertEqual(1, len(worker_media_file_manager._files_by_id))
+        self.assertEqual([], conn.sent)
+
+
+class SerializeRequestTest(unittest.TestCase):
+    def test_round_trip(self):
+        widget_states = WidgetStates()
+        widget_states.widgets.add().id = "widget"
+
+        request, data = script_process_pool._deserialize_request(
+            script_process_pool._serialize_request(
+                ScriptRequest.RERUN, RerunData("a=b", widget_states)
+            )
+        )
+        self.assertEqual(ScriptRequest.RERUN, request)
+        self.assertEqual("a=b", data.query_string)
+        self.assertEqual(widget_states, data.widget_states)
+
+        request, data = script_process_pool._deserialize_request(
+            script_process_pool._serialize_request(ScriptRequest.STOP, None)
+        )
+        self.assertEqual(ScriptRequest.STOP, request)
+        self.assertIsNone(data)
@@ -18,6 +18,7 @@ import os
 import sys
 import time
 import unittest
+from unittest.mock import patch
 
 from parameterized import parameterized
 from tornado.testing import AsyncTestCase
@@ -32,6 +33,7 @@ from streamlit.script_request_queue import ScriptRequest
 from streamlit.script_request_queue import ScriptRequestQueue
 from streamlit.script_runner import ScriptRunner
 from streamlit.script_runner import ScriptRunnerEvent
+from tests import testutil
 
 text_utf = "complete! 👨‍🎤"
 text_no_encoding = text_utf
@@ -184,6 +186,52 @@ class ScriptRunnerTest(AsyncTestCase):
         )
         self._assert_text_deltas(scriptrunner, ["loop_forever"])
 
+    @patch(
+        "streamlit.script_runner.config.get_option",
+        side_effect=testutil.build_mock_config_get_option(
+            {"runner.asyncInterrupts": True}
+        ),
+    )
+    def test_interrupt_busy_script(self, _):
+        """With runner.asyncInterrupts, a script that doesn't send anything
+        is stopped or rerun as soon as it's asked to."""
+        scriptrunner = TestScriptRunner("busy_loop.py")
+        scriptrunner.enqueue_rerun()
+        scriptrunner.start()
+
+        time.sleep(0.1)
+        scriptrunner.enqueue_rerun()
+        scriptrunner.request_interrupt()
+        time.sleep(0.1)
+        scriptrunner.enqueue_stop()
+        scriptrunner.request_interrupt()
+        scriptrunner.join(timeout=5)
+
+        self.assertFalse(scriptrunner._script_thread.is_alive())
+        self._assert_no_exceptions(scriptrunner)
+        self._assert_events(
+            scriptrunner,
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+        )
+        self._assert_text_deltas(scriptrunner, ["busy_loop"])
+
+    def test_interrupt_after_script_finished(self):
+        """An interrupt that comes too late does nothing."""
+        scriptrunner = TestScriptRunner("good_script.py")
+        scriptrunner.enqueue_rerun()
+        scriptrunner.start()
+        scriptrunner.join()
+
+        scriptrunner.request_interrupt()
+        self._assert_no_exceptions(scriptrunner)
+        self._assert_text_deltas(scriptrunner, [text_utf])
+
     def test_shutdown(self):
         """Test that we can shutdown while a script is running."""
         scriptrunner = TestScriptRunner("infinite_loop.py")
@@ -465,10 +513,10 @@ class TestScriptRunner(ScriptRunner):
         self.report_queue.clear()
         super(TestScriptRunner, self)._run_script(rerun_data)
 
-    def join(self):
+    def join(self, timeout=None):
         """Joins the run thread, if it was started"""
         if self._script_thread is not None:
-            self._script_thread.join()
+            self._script_thread.join(timeout)
 
     def clear_deltas(self):
         """Clear all delta messages from our ReportQueue"""
@@ -0,0 +1,23 @@
+# Copyright 2018-2021 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A script for ScriptProcessPoolTest that uses media and uploaded files"""
+
+import os
+import streamlit as st
+
+st.text("pid %s" % os.getpid())
+st.audio(b"audio bytes", format="audio/wav")
+uploaded_file = st.file_uploader("upload")
+st.text(uploaded_file.read().decode() if uploaded_file is not None else "no file")
@@ -0,0 +1,160 @@
+# Copyright 2018-2021 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""SentDeltaTracker unit tests"""
+
+import unittest
+
+from streamlit.forward_msg_cache import populate_hash_if_needed
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.server.sent_delta_tracker import SentDeltaTracker
+
+
+def _create_text_msg(delta_path, body="text"):
+    msg = ForwardMsg()
+    msg.metadata.delta_path[:] = delta_path
+    msg.delta.new_element.text.body = body
+    populate_hash_if_needed(msg)
+    return msg
+
+
+def _create_block_msg(delta_path, allow_empty=False):
+    msg = ForwardMsg()
+    msg.metadata.delta_path[:] = delta_path
+    msg.delta.add_block.allow_empty = allow_empty
+    populate_hash_if_needed(msg)
+    return msg
+
+
+def _create_add_rows_msg(delta_path):
+    msg = ForwardMsg()
+    msg.metadata.delta_path[:] = delta_path
+    msg.delta.add_rows.name = "rows"
+    populate_hash_if_needed(msg)
+    return msg
+
+
+def _create_new_report_msg():
+    msg = ForwardMsg()
+    msg.new_report.report_id = "report"
+    return msg
+
+
+def _create_report_finished_msg(status=ForwardMsg.FINISHED_SUCCESSFULLY):
+    msg = ForwardMsg()
+    msg.report_finished = status
+    return msg
+
+
+class SentDeltaTrackerTest(unittest.TestCase):
+    def _run(self, tracker, msgs, status=ForwardMsg.FINISHED_SUCCESSFULLY):
+        """Send a script run's messages, as the server would. Return which
+        of them were kept instead of being sent."""
+        kept = []
+        tracker.on_msg_sent(_create_new_report_msg())
+        for msg in msgs:
+            if tracker.keep_if_unchanged(msg):
+                kept.append(msg)
+            else:
+                tracker.on_msg_sent(msg)
+        tracker.on_msg_sent(_create_report_finished_msg(status))
+        return kept
+
+    def test_unchanged_elements_are_kept(self):
+        tracker = SentDeltaTracker()
+        self._run(tracker, [_create_text_msg([0, 0]), _create_text_msg([0, 1])])
+
+        changed = _create_text_msg([0, 1], "changed")
+        kept = self._run(tracker, [_create_text_msg([0, 0]), changed])
+        self.assertEqual([_create_text_msg([0, 0])], kept)
+
+        kept = self._run(tracker, [_create_text_msg([0, 0]), changed])
+        self.assertEqual([_create_text_msg([0, 0]), changed], kept)
+
+    def test_changed_dimensions_are_sent(self):
+        tracker = SentDeltaTracker()
+        self._run(tracker, [_create_text_msg([0, 0])])
+
+        msg = _create_text_msg([0, 0])
+        msg.metadata.element_dimension_spec.width = 100
+        self.assertEqual([], self._run(tracker, [msg]))
+
+    def test_untouched_elements_are_forgotten(self):
+        """The browser removes the elements a successful run didn't touch."""
+        tracker = SentDeltaTracker()
+        self._run(tracker, [_create_text_msg([0, 0]), _create_text_msg([0, 1])])
+        self._run(tracker, [_create_text_msg([0, 0])])
+
+        kept = self._run(tracker, [_create_text_msg([0, 0]), _create_text_msg([0, 1])])
+        self.assertEqual([_create_text_msg([0, 0])], kept)
+
+    def test_failed_run_keeps_elements(self):
+        """The browser keeps every element if the script didn't compile."""
+        tracker = SentDeltaTracker()
+        self._run(tracker, [_create_text_msg([0, 0])])
+        self._run(tracker, [], ForwardMsg.FINISHED_WITH_COMPILE_ERROR)
+
+        kept = self._run(tracker, [_create_text_msg([0, 0])])
+        self.assertEqual([_create_text_msg([0, 0])], kept)
+
+    def test_add_rows_forgets_element(self):
+        tracker = SentDeltaTracker()
+        self._run(tracker, [_create_text_msg([0, 0]), _create_add_rows_msg([0, 0])])
+
+        self.assertEqual([], self._run(tracker, [_create_text_msg([0, 0])]))
+
+    def test_element_replacing_block_forgets_children(self):
+        tracker = SentDeltaTracker()
+        self._run(tracker, [_create_block_msg([0, 0]), _create_text_msg([0, 0, 0])])
+
+        tracker.on_msg_sent(_create_new_report_msg())
+        tracker.on_msg_sent(_create_text_msg([0, 0]))
+        tracker.on_msg_sent(_create_block_msg([0, 0]))
+        self.assertFalse(tracker.keep_if_unchanged(_create_text_msg([0, 0, 0])))
+
+    def test_block_replacing_block_keeps_children(self):
+        tracker = SentDeltaTracker()
+        self._run(tracker, [_create_block_msg([0, 0]), _create_text_msg([0, 0, 0])])
+
+        kept = self._run(
+            tracker,
+            [_create_block_msg([0, 0], allow_empty=True), _create_text_msg([0, 0, 0])],
+        )
+        self.assertEqual([_create_text_msg([0, 0, 0])], kept)
+
+    def test_empty_blocks_are_forgotten(self):
+        """The browser removes blocks that a run left without children,
+        unless they allow_empty."""
+        tracker = SentDeltaTracker()
+        self._run(
+            tracker,
+            [
+                _create_block_msg([0, 0]),
+                _create_block_msg([0, 0, 0]),
+                _create_text_msg([0, 0, 0, 0]),
+                _create_block_msg([0, 1], allow_empty=True),
+                _create_text_msg([0, 1, 0]),
+            ],
+        )
+        self._run(tracker, [_create_block_msg([0, 0]), _create_block_msg([0, 1], True)])
+
+        kept = self._run(
+            tracker,
+            [
+                _create_block_msg([0, 0]),
+                _create_block_msg([0, 0, 0]),
+                _create_block_msg([0, 1], allow_empty=True),
+            ],
+        )
+        self.assertEqual([_create_block_msg([0, 1], allow_empty=True)], kept)
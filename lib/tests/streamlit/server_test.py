@@ -14,6 +14,7 @@
 
 """Server.py unit tests"""
 import os
+import time
 from unittest import mock
 from unittest.mock import MagicMock, patch
 import unittest
@@ -24,6 +25,7 @@ import tornado.web
 import tornado.websocket
 import errno
 from tornado import gen
+from tornado.concurrent import Future
 
 import streamlit.server.server
 from streamlit import config, RootContainer
@@ -31,10 +33,15 @@ from streamlit.cursor import make_delta_path
 from streamlit.report_session import ReportSession
 from streamlit.uploaded_file_manager import UploadedFileRec
 from streamlit.server.server import MAX_PORT_SEARCH_RETRIES
+from streamlit.server.server import BATCHED_PROTOCOL_VERSION
+from streamlit.server.server import SEND_TURN_BYTE_BUDGET
+from streamlit.server.server import UNCHANGED_DELTAS_PROTOCOL_VERSION
 from streamlit.forward_msg_cache import ForwardMsgCache
 from streamlit.forward_msg_cache import populate_hash_if_needed
+from streamlit.forward_msg_cache import serialize_msg_body
 from streamlit.elements import data_frame
 from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsgList
 from streamlit.server.server import State
 from streamlit.server.server import start_listening
 from streamlit.server.server import RetriesExceeded
@@ -45,12 +52,19 @@ from streamlit.server.routes import MetricsHandler
 from streamlit.server.server_util import is_cacheable_msg
 from streamlit.server.server_util import is_url_from_allowed_origins
 from streamlit.server.server_util import serialize_forward_msg
+from streamlit.server.server_util import serialize_forward_msg_list
+from streamlit.server.websocket_compression import AdaptiveCompressor
 from tests.server_test_case import ServerTestCase
 
 from streamlit.logger import get_logger
 
 LOGGER = get_logger(__name__)
 
+# Captured before any test changes it.
+DEFAULT_PREHEATED_SESSION_POOL_SIZE = config.get_option(
+    "server.preheatedSessionPoolSize"
+)
+
 
 def _create_dataframe_msg(df, id=1) -> ForwardMsg:
     msg = ForwardMsg()
@@ -59,6 +73,13 @@ def _create_dataframe_msg(df, id=1) -> ForwardMsg:
     return msg
 
 
+def _create_markdown_msg(body) -> ForwardMsg:
+    msg = ForwardMsg()
+    msg.metadata.delta_path[:] = make_delta_path(RootContainer.MAIN, (), 0)
+    msg.delta.new_element.markdown.body = body
+    return msg
+
+
 def _create_report_finished_msg(status) -> ForwardMsg:
     msg = ForwardMsg()
     msg.report_finished = status
@@ -68,6 +89,15 @@ def _create_report_finished_msg(status) -> ForwardMsg:
 class ServerTest(ServerTestCase):
     _next_report_id = 0
 
+    @tornado.gen.coroutine
+    def _send_messages(self, session_info, *msgs):
+        """Send messages to a session's browser through
+        _send_queued_messages, as if the session had enqueued them."""
+        session_info.session.flush_browser_queue.return_value = list(msgs)
+        self.server._dirty_session_ids.add(session_info.session.id)
+        yield self.server._send_queued_messages()
+        session_info.session.flush_browser_queue.return_value = []
+
     @tornado.testing.gen_test
     def test_start_stop(self):
         """Test that we can start and stop the server."""
@@ -78,17 +108,22 @@ class ServerTest(ServerTestCase):
             yield self.ws_connect()
             self.assertEqual(State.ONE_OR_MORE_BROWSERS_CONNECTED, self.server._state)
 
-            self.server.stop()
-            self.assertEqual(State.STOPPING, self.server._state)
+            with patch.object(
+                self.server._serialization_executor, "shutdown"
+            ) as shutdown_executor:
+                self.server.stop()
+                self.assertEqual(State.STOPPING, self.server._state)
 
-            yield gen.sleep(0.1)
+                yield gen.sleep(0.1)
             self.assertEqual(State.STOPPED, self.server._state)
+            shutdown_executor.assert_called_once_with(wait=False)
 
     @tornado.testing.gen_test
     def test_websocket_connect(self):
         """Test that we can connect to the server via websocket."""
 
         with self._patch_report_session():
+            config._set_option("server.sessionResumeGracePeriod", 0, "test")
             yield self.start_server_loop()
 
             self.assertFalse(self.server.browser_is_connected)
@@ -146,6 +181,645 @@ class ServerTest(ServerTestCase):
             yield gen.sleep(0.1)
             self.assertFalse(self.server.browser_is_connected)
 
+    @tornado.testing.gen_test
+    def test_preheated_session_pool(self):
+        """Browsers get preheated sessions, oldest first, and the pool is
+        refilled as they do."""
+        with self._patch_report_session():
+            config._set_option("server.preheatedSessionPoolSize", 2, "test")
+            yield self.start_server_loop()
+
+            self.server.fill_preheated_session_pool()
+            preheated_ids = list(self.server._preheated_session_ids)
+            self.assertEqual(2, len(preheated_ids))
+            for session_id in preheated_ids:
+                session_info = self.server._get_session_info(session_id)
+                self.assertIsNone(session_info.ws)
+                session_info.session.handle_rerun_script_request.assert_called_once_with(
+                    is_preheat=True
+                )
+            self.assertFalse(self.server.browser_is_connected)
+
+            yield self.ws_connect()
+            self.assertTrue(self.server.browser_is_connected)
+            session_info = self.server._get_session_info(preheated_ids[0])
+            self.assertIsNotNone(session_info.ws)
+            self.assertTrue(session_info.was_preheated)
+
+            # The pool was refilled.
+            yield gen.sleep(0.1)
+            self.assertEqual(3, len(self.server._session_info_by_id))
+            self.assertEqual(2, len(self.server._preheated_session_ids))
+            self.assertEqual(preheated_ids[1], self.server._preheated_session_ids[0])
+
+    @tornado.testing.gen_test
+    def test_preheated_session_pool_default(self):
+        """By default, one session is preheated for the first browser."""
+        with self._patch_report_session():
+            config._set_option(
+                "server.preheatedSessionPoolSize",
+                DEFAULT_PREHEATED_SESSION_POOL_SIZE,
+                "test",
+            )
+            yield self.start_server_loop()
+
+            self.server.fill_preheated_session_pool()
+            self.assertEqual(1, len(self.server._preheated_session_ids))
+
+            yield self.ws_connect()
+            session_info = list(self.server._session_info_by_id.values())[0]
+            self.assertTrue(session_info.was_preheated)
+
+    @tornado.testing.gen_test
+    def test_preheated_session_pool_disabled(self):
+        """With server.preheatedSessionPoolSize=0, sessions are only created
+        for browsers."""
+        with self._patch_report_session():
+            config._set_option("server.preheatedSessionPoolSize", 0, "test")
+            yield self.start_server_loop()
+
+            self.server.fill_preheated_session_pool()
+            self.assertEqual(0, len(self.server._session_info_by_id))
+
+            yield self.ws_connect()
+            yield gen.sleep(0.1)
+            self.assertEqual(1, len(self.server._session_info_by_id))
+            session_info = list(self.server._session_info_by_id.values())[0]
+            self.assertFalse(session_info.was_preheated)
+
+    @tornado.testing.gen_test
+    def test_session_kept_after_disconnect(self):
+        """A session outlives its websocket for
+        server.sessionResumeGracePeriod."""
+        with self._patch_report_session():
+            config._set_option("server.sessionResumeGracePeriod", 30, "test")
+            yield self.start_server_loop()
+            ws_client = yield self.ws_connect()
+            session_info = list(self.server._session_info_by_id.values())[0]
+            session_id = session_info.session.id
+
+            ws_client.close()
+            yield gen.sleep(0.1)
+            self.assertFalse(self.server.browser_is_connected)
+            self.assertIs(session_info, self.server._get_session_info(session_id))
+            self.assertIsNone(session_info.ws)
+            session_info.session.shutdown.assert_not_called()
+
+            # The grace period is over.
+            self.server._close_if_still_detached(
+                session_id, session_info.detached_since
+            )
+            self.assertIsNone(self.server._get_session_info(session_id))
+            session_info.session.shutdown.assert_called_once()
+
+    @tornado.testing.gen_test
+    def test_resume_session(self):
+        """A browser that reconnects with its session id is sent only the
+        messages it missed."""
+        with self._patch_report_session():
+            config._set_option("server.sessionResumeGracePeriod", 30, "test")
+            yield self.start_server_loop()
+            url = self.get_ws_url("/stream") + "?protocolVersion=%s" % (
+                BATCHED_PROTOCOL_VERSION
+            )
+            ws_client = yield tornado.websocket.websocket_connect(url)
+            session_info = list(self.server._session_info_by_id.values())[0]
+            session_id = session_info.session.id
+
+            msgs = [_create_markdown_msg(str(i)) for i in range(3)]
+            session_info.session.flush_browser_queue.return_value = msgs
+            self.server._enqueued_some_message(session_id)
+            yield ws_client.read_message()
+            session_info.session.flush_browser_queue.return_value = []
+
+            # The browser only got to handle the first message.
+            ws_client.close()
+            yield gen.sleep(0.1)
+            ws_client = yield tornado.websocket.websocket_connect(
+                url + "&sessionId=%s&lastSeq=1" % session_id
+            )
+
+            data = yield ws_client.read_message()
+            received = ForwardMsgList()
+            received.ParseFromString(data)
+            self.assertTrue(received.messages[0].session_event.session_resumed)
+            self.assertEqual(msgs[1:], list(received.messages[1:]))
+
+            self.assertEqual(1, len(self.server._session_info_by_id))
+            self.assertIs(session_info, self.server._get_session_info(session_id))
+            self.assertIsNotNone(session_info.ws)
+            self.assertTrue(self.server.browser_is_connected)
+            session_info.session.shutdown.assert_not_called()
+            session_info.session.handle_rerun_script_request.assert_not_called()
+
+    @tornado.testing.gen_test
+    def test_hibernate_disconnected_session(self):
+        """A session hibernates server.disconnectedSessionHibernateTimeout
+        after its browser disconnects. A browser that then reconnects
+        reruns the app instead of being sent what it missed."""
+        with self._patch_report_session():
+            config._set_option("server.sessionResumeGracePeriod", 30, "test")
+            config._set_option("server.disconnectedSessionHibernateTimeout", 5, "test")
+            yield self.start_server_loop()
+            url = self.get_ws_url("/stream")
+            ws_client = yield tornado.websocket.websocket_connect(url)
+            session_info = list(self.server._session_info_by_id.values())[0]
+            session_id = session_info.session.id
+
+            session_info.session.flush_browser_queue.return_value = [
+                _create_markdown_msg("hi")
+            ]
+            self.server._enqueued_some_message(session_id)
+            yield ws_client.read_message()
+            session_info.session.flush_browser_queue.return_value = []
+
+            ws_client.close()
+            yield gen.sleep(0.1)
+            session_info.session.hibernate.assert_not_called()
+
+            session_info.session.hibernate.return_value = 100
+            self.server._hibernate_if_still_detached(
+                session_id, session_info.detached_since
+            )
+            session_info.session.hibernate.assert_called_once_with(
+                release_media_files=True
+            )
+            self.assertEqual(0, len(session_info.sent_msgs))
+            self.assertEqual(0, session_info.sent_msgs_bytes)
+            session_info.session.is_hibernated = True
+
+            ws_client = yield tornado.websocket.websocket_connect(
+                url + "?sessionId=%s&lastSeq=0" % session_id
+            )
+            received = yield self.read_forward_msg(ws_client)
+            self.assertFalse(received.session_event.session_resumed)
+            self.assertIs(session_info, self.server._get_session_info(session_id))
+            self.assertIsNotNone(session_info.ws)
+            self.assertEqual(0, session_info.sent_msg_count)
+            session_info.session.shutdown.assert_not_called()
+
+    @tornado.testing.gen_test
+    def test_hibernate_idle_session(self):
+        """A connected session hibernates once it's been idle for
+        server.idleSessionHibernateTimeout."""
+        with self._patch_report_session():
+            config._set_option("server.idleSessionHibernateTimeout", 5, "test")
+            yield self.start_server_loop()
+            yield self.ws_connect()
+            session_info = list(self.server._session_info_by_id.values())[0]
+            session_id = session_info.session.id
+            yield gen.sleep(0.1)
+            self.assertIsNotNone(session_info.idle_check)
+
+            self.server._hibernate_if_idle(session_id)
+            session_info.session.hibernate.assert_not_called()
+
+            session_info.last_active -= 5
+            self.server._hibernate_if_idle(session_id)
+            # Its browser still shows its media files.
+            session_info.session.hibernate.assert_called_once_with(
+                release_media_files=False
+            )
+
+            # Its browser sent a message.
+            session_info.session.hibernate.reset_mock()
+            self.server._mark_session_active(session_id)
+            self.server._hibernate_if_idle(session_id)
+            session_info.session.hibernate.assert_not_called()
+
+    @tornado.testing.gen_test
+    def test_resume_unknown_session(self):
+        """A browser whose session can't be resumed gets a new one."""
+        with self._patch_report_session():
+            yield self.start_server_loop()
+            ws_client = yield tornado.websocket.websocket_connect(
+                self.get_ws_url("/stream") + "?sessionId=no_such_session&lastSeq=3"
+            )
+
+            received = yield self.read_forward_msg(ws_client)
+            self.assertFalse(received.session_event.session_resumed)
+            self.assertEqual(
+                "session_resumed", received.session_event.WhichOneof("type")
+            )
+            self.assertEqual(1, len(self.server._session_info_by_id))
+
+    @tornado.testing.gen_test
+    def test_only_dirty_sessions_are_flushed(self):
+        """Only sessions that have enqueued messages should be flushed."""
+        with self._patch_report_session():
+            yield self.start_server_loop()
+
+            ws_client1 = yield self.ws_connect()
+            yield self.ws_connect()
+            session_info1, session_info2 = list(
+                self.server._session_info_by_id.values()
+            )
+
+            # Let the server handle the initial flush of each new session.
+            yield gen.sleep(0.05)
+            session_info1.session.flush_browser_queue.reset_mock()
+            session_info2.session.flush_browser_queue.reset_mock()
+
+            msg = _create_dataframe_msg([1, 2, 3])
+            session_info1.session.flush_browser_queue.return_value = [msg]
+            self.server._enqueued_some_message(session_info1.session.id)
+
+            received = yield self.read_forward_msg(ws_client1)
+            self.assertEqual(msg.delta, received.delta)
+            session_info1.session.flush_browser_queue.assert_called_once()
+            session_info2.session.flush_browser_queue.assert_not_called()
+
+    @tornado.testing.gen_test
+    def test_idle_server_does_not_flush(self):
+        """An idle server should not poll its sessions."""
+        with self._patch_report_session():
+            yield self.start_server_loop()
+            yield self.ws_connect()
+            session_info = list(self.server._session_info_by_id.values())[0]
+
+            yield gen.sleep(0.05)
+            session_info.session.flush_browser_queue.reset_mock()
+
+            yield gen.sleep(0.1)
+            session_info.session.flush_browser_queue.assert_not_called()
+
+    @tornado.testing.gen_test
+    def test_buffered_bytes(self):
+        """Written bytes are tracked until the websocket flushes them."""
+        with self._patch_report_session():
+            yield self.start_server_loop()
+            ws_client = yield self.ws_connect()
+            session_info = list(self.server._session_info_by_id.values())[0]
+
+            msg = _create_dataframe_msg([1, 2, 3])
+            self.server._write_message(
+                session_info, self.server._serialize_message(session_info, msg)
+            )
+            self.assertLess(0, session_info.buffered_bytes)
+            self.assertEqual(
+                session_info.buffered_bytes,
+                self.server.get_debug()["sessions"][session_info.session.id][
+                    "buffered_bytes"
+                ],
+            )
+
+            self.assertEqual(session_info.buffered_bytes, self.server._buffered_bytes)
+            self.assertEqual(
+                session_info.buffered_bytes, self.server._max_session_buffered_bytes
+            )
+
+            yield self.read_forward_msg(ws_client)
+            self.assertEqual(0, session_info.buffered_bytes)
+            self.assertEqual(0, self.server._buffered_bytes)
+            self.assertEqual(0, self.server._max_session_buffered_bytes)
+
+    @tornado.testing.gen_test
+    def test_max_session_buffered_bytes(self):
+        """Only the total and the max of the sessions' buffered bytes are
+        tracked for metrics."""
+        with self._patch_report_session():
+            yield self.start_server_loop()
+            yield self.ws_connect()
+            yield self.ws_connect()
+            info1, info2 = list(self.server._session_info_by_id.values())
+
+            self.server._add_buffered_bytes(info1, 100)
+            self.server._add_buffered_bytes(info2, 50)
+            self.assertEqual(150, self.server._buffered_bytes)
+            self.assertEqual(100, self.server._max_session_buffered_bytes)
+
+            self.server._add_buffered_bytes(info1, -100)
+            self.assertEqual(50, self.server._buffered_bytes)
+            self.assertEqual(50, self.server._max_session_buffered_bytes)
+
+            self.server._close_report_session(info2.session.id)
+            self.assertEqual(0, self.server._max_session_buffered_bytes)
+
+    @tornado.testing.gen_test
+    def test_over_write_limit_holds_back_messages(self):
+        """A session that's over its write limit isn't flushed until its
+        websocket drains."""
+        with self._patch_report_session():
+            config._set_option("server.maxOutstandingWriteSize", 1, "test")
+            yield self.start_server_loop()
+            ws_client = yield self.ws_connect()
+            session_info = list(self.server._session_info_by_id.values())[0]
+
+            yield gen.sleep(0.05)
+            session_info.session.flush_browser_queue.reset_mock()
+
+            # Pretend 2MB are stuck in the websocket's buffer.
+            stuck_bytes = 2 * 1024 * 1024
+            session_info.buffered_bytes = stuck_bytes
+            self.server._enqueued_some_message(session_info.session.id)
+            yield gen.sleep(0.05)
+            session_info.session.flush_browser_queue.assert_not_called()
+            self.assertIsNotNone(session_info.over_write_limit_since)
+
+            # Once the buffer drains, the held back messages are sent.
+            msg = _create_dataframe_msg([1, 2, 3])
+            session_info.session.flush_browser_queue.return_value = [msg]
+            written = Future()  # type: Future[None]
+            written.set_result(None)
+            self.server._on_message_written(session_info, stuck_bytes, written)
+
+            received = yield self.read_forward_msg(ws_client)
+            self.assertEqual(msg.delta, received.delta)
+            self.assertIsNone(session_info.over_write_limit_since)
+
+    @tornado.testing.gen_test
+    def test_slow_client_disconnect(self):
+        """A session that stays over its write limit is disconnected."""
+        with self._patch_report_session():
+            config._set_option("server.slowClientTimeout", 10, "test")
+            yield self.start_server_loop()
+            yield self.ws_connect()
+            session_info = list(self.server._session_info_by_id.values())[0]
+            session_id = session_info.session.id
+
+            # Over the limit, but not for long enough.
+            session_info.over_write_limit_since = time.monotonic() - 5
+            self.server._disconnect_if_slow(session_id)
+            self.assertIsNotNone(self.server._get_session_info(session_id))
+
+            session_info.over_write_limit_since = time.monotonic() - 10
+            self.server._disconnect_if_slow(session_id)
+            self.assertIsNone(self.server._get_session_info(session_id))
+            session_info.session.shutdown.assert_called_once()
+
+    @tornado.testing.gen_test
+    def test_small_messages_go_first(self):
+        """Sessions take turns, and sessions with small messages don't wait
+        behind bulk payloads."""
+        with self._patch_report_session():
+            yield self.ws_connect()
+            yield self.ws_connect()
+            heavy_info, light_info = list(self.server._session_info_by_id.values())
+
+            heavy_msgs = [
+                _create_markdown_msg(str(i) * SEND_TURN_BYTE_BUDGET) for i in range(3)
+            ]
+            light_msgs = [_create_markdown_msg("light %s" % i) for i in range(2)]
+            heavy_info.session.flush_browser_queue.return_value = heavy_msgs
+            light_info.session.flush_browser_queue.return_value = light_msgs
+
+            written = []
+            self.server._write_message = lambda session_info, msg_str: written.append(
+                session_info
+            )
+
+            self.server._dirty_session_ids = {
+                heavy_info.session.id,
+                light_info.session.id,
+            }
+            yield self.server._send_queued_messages()
+
+            # The light session sends everything in its first turn. The
+            # heavy session's budget only lets it send one message per turn.
+            self.assertEqual(
+                [light_info, light_info, heavy_info, heavy_info, heavy_info],
+                written,
+            )
+
+    @tornado.testing.gen_test
+    def test_sessions_take_turns(self):
+        """A session with a lot of bulk messages doesn't starve another one
+        that also has bulk messages."""
+        with self._patch_report_session():
+            yield self.ws_connect()
+            yield self.ws_connect()
+            info1, info2 = list(self.server._session_info_by_id.values())
+
+            info1.session.flush_browser_queue.return_value = [
+                _create_markdown_msg("a%s" % i * SEND_TURN_BYTE_BUDGET)
+                for i in range(3)
+            ]
+            info2.session.flush_browser_queue.return_value = [
+                _create_markdown_msg("b%s" % i * SEND_TURN_BYTE_BUDGET)
+                for i in range(2)
+            ]
+
+            written = []
+            self.server._write_message = lambda session_info, msg_str: written.append(
+                session_info
+            )
+
+            self.server._dirty_session_ids = {info1.session.id, info2.session.id}
+            yield self.server._send_queued_messages()
+
+            self.assertEqual(5, len(written))
+            self.assertEqual({info1, info2}, set(written[0:2]))
+            self.assertEqual({info1, info2}, set(written[2:4]))
+            self.assertEqual(info1, written[4])
+
+    @tornado.testing.gen_test
+    def test_large_messages_are_serialized_on_thread_pool(self):
+        """Large messages are serialized off the IOLoop, and still go out
+        in order."""
+        with self._patch_report_session(), patch(
+            "streamlit.server.server.THREADED_SERIALIZATION_MIN_SIZE", 1000
+        ):
+            yield self.ws_connect()
+            session_info = list(self.server._session_info_by_id.values())[0]
+
+            large_msg = _create_markdown_msg("a" * 2000)
+            small_msg = _create_markdown_msg("b")
+            session_info.session.flush_browser_queue.side_effect = [
+                [large_msg, small_msg],
+                [],
+            ]
+
+            written = []
+            self.server._write_message = lambda session_info, msg_str: written.append(
+                msg_str
+            )
+
+            self.server._dirty_session_ids = {session_info.session.id}
+            yield self.server._send_queued_messages()
+
+            # Nothing goes out until the large message is serialized.
+            self.assertEqual([], written)
+            self.assertTrue(session_info.is_serializing)
+
+            while not self.server._dirty_session_ids:
+                yield gen.sleep(0.01)
+            yield self.server._send_queued_messages()
+
+            self.assertFalse(session_info.is_serializing)
+            self.assertEqual(2, len(written))
+            for msg, msg_str in zip([large_msg, small_msg], written):
+                received = ForwardMsg()
+                received.ParseFromString(msg_str)
+                self.assertEqual(msg, received)
+            self.assertEqual(
+                populate_hash_if_needed(_create_markdown_msg("a" * 2000)),
+                large_msg.hash,
+            )
+
+    @tornado.testing.gen_test
+    def test_failed_serialization_closes_session(self):
+        """A session whose message can't be serialized on the thread pool
+        is closed."""
+        with self._patch_report_session(), patch(
+            "streamlit.server.server.THREADED_SERIALIZATION_MIN_SIZE", 1000
+        ), patch(
+            "streamlit.server.server._serialize_and_hash_msg_body",
+            side_effect=RuntimeError("boom"),
+        ):
+            yield self.ws_connect()
+            session_info = list(self.server._session_info_by_id.values())[0]
+            session_id = session_info.session.id
+
+            session_info.session.flush_browser_queue.side_effect = [
+                [_create_markdown_msg("a" * 2000)],
+                [],
+            ]
+            self.server._dirty_session_ids = {session_id}
+            yield self.server._send_queued_messages()
+
+            while self.server._get_session_info(session_id) is not None:
+                yield gen.sleep(0.01)
+            self.assertFalse(session_info.is_serializing)
+            session_info.session.shutdown.assert_called_once()
+
+    @tornado.testing.gen_test
+    def test_batched_messages(self):
+        """Browsers that speak BATCHED_PROTOCOL_VERSION get all the messages
+        from a turn in a single ForwardMsgList frame."""
+        with self._patch_report_session():
+            yield self.start_server_loop()
+            ws_client = yield tornado.websocket.websocket_connect(
+                self.get_ws_url("/stream")
+                + "?protocolVersion=%s" % BATCHED_PROTOCOL_VERSION
+            )
+            session_info = list(self.server._session_info_by_id.values())[0]
+
+            msgs = [_create_markdown_msg(str(i)) for i in range(3)]
+            session_info.session.flush_browser_queue.return_value = msgs
+            self.server._enqueued_some_message(session_info.session.id)
+
+            data = yield ws_client.read_message()
+            received = ForwardMsgList()
+            received.ParseFromString(data)
+            self.assertEqual(msgs, list(received.messages))
+
+    @tornado.testing.gen_test
+    def test_batches_respect_turn_budget(self):
+        """A batch holds at most SEND_TURN_BYTE_BUDGET bytes, unless it's a
+        single message."""
+        with self._patch_report_session():
+            yield tornado.websocket.websocket_connect(
+                self.get_ws_url("/stream")
+                + "?protocolVersion=%s" % BATCHED_PROTOCOL_VERSION
+            )
+            session_info = list(self.server._session_info_by_id.values())[0]
+
+            session_info.session.flush_browser_queue.return_value = [
+                _create_markdown_msg("a"),
+                _create_markdown_msg("b"),
+                _create_markdown_msg("c" * SEND_TURN_BYTE_BUDGET),
+                _create_markdown_msg("d"),
+            ]
+
+            written = []
+            self.server._write_message = lambda session_info, msg_str: written.append(
+                msg_str
+            )
+
+            self.server._dirty_session_ids = {session_info.session.id}
+            yield self.server._send_queued_messages()
+
+            batches = []
+            for msg_str in written:
+                batch = ForwardMsgList()
+                batch.ParseFromString(msg_str)
+                batches.append(
+                    [msg.delta.new_element.markdown.body[0] for msg in batch.messages]
+                )
+            self.assertEqual([["a", "b"], ["c"], ["d"]], batches)
+
+    @tornado.testing.gen_test
+    def test_unchanged_deltas_are_skipped(self):
+        """Browsers that speak UNCHANGED_DELTAS_PROTOCOL_VERSION are told to
+        keep the elements a rerun didn't change, in a single Delta."""
+        with self._patch_report_session():
+            yield tornado.websocket.websocket_connect(
+                self.get_ws_url("/stream")
+                + "?protocolVersion=%s" % UNCHANGED_DELTAS_PROTOCOL_VERSION
+            )
+            session_info = list(self.server._session_info_by_id.values())[0]
+
+            written = []
+            self.server._write_message = lambda session_info, msg_str: written.append(
+                msg_str
+            )
+
+            def run_script(bodies):
+                new_report_msg = ForwardMsg()
+                new_report_msg.new_report.report_id = "report"
+                msgs = [new_report_msg]
+                for index, body in enumerate(bodies):
+                    msg = _create_markdown_msg(body)
+                    msg.metadata.delta_path[-1] = index
+                    msgs.append(msg)
+                msgs.append(
+                    _create_report_finished_msg(ForwardMsg.FINISHED_SUCCESSFULLY)
+                )
+
+                del written[:]
+                session_info.session.flush_browser_queue.return_value = msgs
+                self.server._dirty_session_ids = {session_info.session.id}
+                return self.server._send_queued_messages()
+
+            yield run_script(["a", "b", "c", "d"])
+            received = ForwardMsgList()
+            received.ParseFromString(written[0])
+            self.assertEqual(6, len(received.messages))
+
+            yield run_script(["a", "b", "C", "d"])
+            received = ForwardMsgList()
+            received.ParseFromString(written[0])
+            msgs = list(received.messages)
+            self.assertEqual(
+                ["new_report", "delta", "delta", "delta", "report_finished"],
+                [msg.WhichOneof("type") for msg in msgs],
+            )
+            self.assertEqual(2, msgs[1].delta.unchanged_count)
+            self.assertEqual([RootContainer.MAIN, 0], msgs[1].metadata.delta_path)
+            self.assertEqual("C", msgs[2].delta.new_element.markdown.body)
+            self.assertEqual(1, msgs[3].delta.unchanged_count)
+            self.assertEqual([RootContainer.MAIN, 3], msgs[3].metadata.delta_path)
+
+    @tornado.testing.gen_test
+    def test_unchanged_deltas_are_sent_to_old_browsers(self):
+        """Browsers that don't speak UNCHANGED_DELTAS_PROTOCOL_VERSION get
+        every element on every run."""
+        with self._patch_report_session():
+            yield tornado.websocket.websocket_connect(
+                self.get_ws_url("/stream")
+                + "?protocolVersion=%s" % BATCHED_PROTOCOL_VERSION
+            )
+            session_info = list(self.server._session_info_by_id.values())[0]
+
+            written = []
+            self.server._write_message = lambda session_info, msg_str: written.append(
+                msg_str
+            )
+
+            for _ in range(2):
+                del written[:]
+                session_info.session.flush_browser_queue.return_value = [
+                    _create_markdown_msg("a")
+                ]
+                self.server._dirty_session_ids = {session_info.session.id}
+                yield self.server._send_queued_messages()
+
+                received = ForwardMsgList()
+                received.ParseFromString(written[0])
+                self.assertEqual(
+                    "a", received.messages[0].delta.new_element.markdown.body
+                )
+
     @tornado.testing.gen_test
     def test_websocket_compression(self):
         with self._patch_report_session():
@@ -161,6 +835,55 @@ class ServerTest(ServerTestCase):
             extensions = ws_client.headers.get("Sec-Websocket-Extensions")
             self.assertIn("permessage-deflate", extensions)
 
+    @tornado.testing.gen_test
+    def test_adaptive_websocket_compression(self):
+        """Only messages that are worth compressing get compressed, and
+        the browser can read them all."""
+        with self._patch_report_session():
+            yield self.start_server_loop()
+            ws_client = yield tornado.websocket.websocket_connect(
+                self.get_ws_url("/stream"), compression_options={}
+            )
+            session_info = list(self.server._session_info_by_id.values())[0]
+            adaptive_compressor = session_info.ws._compressor
+            self.assertIsInstance(adaptive_compressor, AdaptiveCompressor)
+            compress = MagicMock(wraps=adaptive_compressor._compressor.compress)
+            adaptive_compressor._compressor.compress = compress
+
+            small_msg = _create_markdown_msg("a")
+            large_msg = _create_markdown_msg("a" * 10000)
+            for msg in [small_msg, large_msg]:
+                yield self._send_messages(session_info, msg)
+                received = yield self.read_forward_msg(ws_client)
+                self.assertEqual(msg.delta, received.delta)
+
+            self.assertEqual(1, compress.call_count)
+
+    @tornado.testing.gen_test
+    def test_adaptive_websocket_compression_unsupported_tornado(self):
+        """On Tornado versions that adaptive compression doesn't support,
+        Tornado compresses every message itself."""
+        with self._patch_report_session(), patch(
+            "streamlit.server.websocket_compression.tornado.version_info",
+            (7, 0, 0, 0),
+        ):
+            yield self.start_server_loop()
+            ws_client = yield tornado.websocket.websocket_connect(
+                self.get_ws_url("/stream"), compression_options={}
+            )
+            session_info = list(self.server._session_info_by_id.values())[0]
+            self.assertIsNone(session_info.ws._compressor)
+            compressor = session_info.ws.ws_connection._compressor
+            self.assertNotIsInstance(compressor, AdaptiveCompressor)
+            compress = MagicMock(wraps=compressor.compress)
+            compressor.compress = compress
+
+            msg = _create_markdown_msg("a")
+            yield self._send_messages(session_info, msg)
+            received = yield self.read_forward_msg(ws_client)
+            self.assertEqual(msg.delta, received.delta)
+            self.assertEqual(1, compress.call_count)
+
     @tornado.testing.gen_test
     def test_websocket_compression_disabled(self):
         with self._patch_report_session():
@@ -188,10 +911,10 @@ class ServerTest(ServerTestCase):
             session_info = list(self.server._session_info_by_id.values())[0]
 
             # Create a message and ensure its hash is unset; we're testing
-            # that _send_message adds the hash before it goes out.
+            # that the server adds the hash before it goes out.
             msg = _create_dataframe_msg([1, 2, 3])
             msg.ClearField("hash")
-            self.server._send_message(session_info, msg)
+            yield self._send_messages(session_info, msg)
 
             received = yield self.read_forward_msg(ws_client)
             self.assertEqual(populate_hash_if_needed(msg), received.hash)
@@ -210,14 +933,14 @@ class ServerTest(ServerTestCase):
 
             config._set_option("global.minCachedMessageSize", 0, "test")
             cacheable_msg = _create_dataframe_msg([1, 2, 3])
-            self.server._send_message(session_info, cacheable_msg)
+            yield self._send_messages(session_info, cacheable_msg)
             received = yield self.read_forward_msg(ws_client)
             self.assertTrue(cacheable_msg.metadata.cacheable)
             self.assertTrue(received.metadata.cacheable)
 
             config._set_option("global.minCachedMessageSize", 1000, "test")
             cacheable_msg = _create_dataframe_msg([4, 5, 6])
-            self.server._send_message(session_info, cacheable_msg)
+            yield self._send_messages(session_info, cacheable_msg)
             received = yield self.read_forward_msg(ws_client)
             self.assertFalse(cacheable_msg.metadata.cacheable)
             self.assertFalse(received.metadata.cacheable)
@@ -237,7 +960,7 @@ class ServerTest(ServerTestCase):
             msg1 = _create_dataframe_msg([1, 2, 3], 1)
 
             # Send the message, and read it back. It will not have been cached.
-            self.server._send_message(session_info, msg1)
+            yield self._send_messages(session_info, msg1)
             uncached = yield self.read_forward_msg(ws_client)
             self.assertEqual("delta", uncached.WhichOneof("type"))
 
@@ -245,7 +968,7 @@ class ServerTest(ServerTestCase):
 
             # Send an equivalent message. This time, it should be cached,
             # and a "hash_reference" message should be received instead.
-            self.server._send_message(session_info, msg2)
+            yield self._send_messages(session_info, msg2)
             cached = yield self.read_forward_msg(ws_client)
             self.assertEqual("ref_hash", cached.WhichOneof("type"))
             # We should have the *hash* of msg1 and msg2:
@@ -254,6 +977,25 @@ class ServerTest(ServerTestCase):
             # And the same *metadata* as msg2:
             self.assertEqual(msg2.metadata, cached.metadata)
 
+    @tornado.testing.gen_test
+    def test_oversized_forwardmsg_is_not_cached(self):
+        """A message that's replaced by an error for being too large isn't
+        cached, so its hash can't be used to fetch the original."""
+        with self._patch_report_session(), patch(
+            "streamlit.server.server_util.MESSAGE_SIZE_LIMIT", 20000
+        ):
+            yield self.start_server_loop()
+            ws_client = yield self.ws_connect()
+            session_info = list(self.server._session_info_by_id.values())[0]
+
+            # Big enough to be cached, if it weren't too large.
+            msg = _create_markdown_msg("a" * 30000)
+            yield self._send_messages(session_info, msg)
+            received = yield self.read_forward_msg(ws_client)
+            self.assertTrue(received.delta.new_element.HasField("exception"))
+            self.assertFalse(received.metadata.cacheable)
+            self.assertIsNone(self.server._message_cache.get_message(msg.hash))
+
     @tornado.testing.gen_test
     def test_cache_clearing(self):
         """Test that report_run_count is incremented when a report
@@ -277,13 +1019,13 @@ class ServerTest(ServerTestCase):
                     else ForwardMsg.FINISHED_WITH_COMPILE_ERROR
                 )
                 finish_msg = _create_report_finished_msg(status)
-                self.server._send_message(session, finish_msg)
+                self.server._serialize_message(session, finish_msg)
 
             def is_data_msg_cached():
                 return self.server._message_cache.get_message(data_msg.hash) is not None
 
             def send_data_msg():
-                self.server._send_message(session, data_msg)
+                self.server._serialize_message(session, data_msg)
 
             # Send a cacheable message. It should be cached.
             send_data_msg()
@@ -419,6 +1161,7 @@ class ServerTest(ServerTestCase):
 
         mock_session = mock.MagicMock(ReportSession, autospec=True, *args, **kwargs)
         type(mock_session).id = mock_id
+        mock_session.is_hibernated = False
         return mock_session
 
     def _patch_report_session(self):
@@ -478,6 +1221,40 @@ class ServerUtilsTest(unittest.TestCase):
         config._set_option("global.minCachedMessageSize", 1000, "test")
         self.assertFalse(is_cacheable_msg(_create_dataframe_msg([1, 2, 3])))
 
+    def test_serialize_forward_msg_list(self):
+        """Test that serialize_forward_msg_list packs serialized messages
+        into a ForwardMsgList."""
+        msgs = [_create_markdown_msg("a"), _create_dataframe_msg([1, 2, 3])]
+        msg_list = ForwardMsgList()
+        msg_list.ParseFromString(
+            serialize_forward_msg_list([serialize_forward_msg(msg) for msg in msgs])
+        )
+        self.assertEqual(msgs, list(msg_list.messages))
+
+    def test_serialize_forward_msg_with_body(self):
+        """Appending the hash and metadata to the body should produce the
+        same message as serializing it whole."""
+        msg = _create_dataframe_msg([1, 2, 3])
+        msg.metadata.cacheable = True
+
+        deserialized_msg = ForwardMsg()
+        deserialized_msg.ParseFromString(
+            serialize_forward_msg(msg, serialize_msg_body(msg))
+        )
+
+        self.assertNotEqual("", msg.hash)
+        self.assertEqual(msg, deserialized_msg)
+
+    def test_should_cache_msg_from_body(self):
+        """The body's length is used as the message size."""
+        msg = _create_dataframe_msg([1, 2, 3])
+        config._set_option("global.minCachedMessageSize", 0, "test")
+        self.assertTrue(is_cacheable_msg(msg, b""))
+
+        config._set_option("global.minCachedMessageSize", 1000, "test")
+        self.assertFalse(is_cacheable_msg(msg, b"x" * 999))
+        self.assertTrue(is_cacheable_msg(msg, b"x" * 1000))
+
     def test_should_limit_msg_size(self):
         # Set up a 60MB ForwardMsg string
         large_msg = _create_dataframe_msg([1, 2, 3])
@@ -190,6 +190,19 @@ class LocalSourcesWatcherTest(unittest.TestCase):
             self.assertNotIn("NESTED_MODULE_CHILD", sys.modules)
             self.assertNotIn("NESTED_MODULE_PARENT", sys.modules)
 
+    @patch("streamlit.watcher.local_sources_watcher.FileWatcher")
+    @patch("streamlit.watcher.local_sources_watcher.script_cache")
+    def test_script_change_invalidates_script_cache(self, script_cache, fob, _):
+        lso = local_sources_watcher.LocalSourcesWatcher(REPORT, NOOP_CALLBACK)
+
+        sys.modules["DUMMY_MODULE_1"] = DUMMY_MODULE_1
+        lso.update_watched_modules()
+        lso.on_file_changed(DUMMY_MODULE_1_FILE)
+        script_cache.invalidate.assert_not_called()
+
+        lso.on_file_changed(REPORT_PATH)
+        script_cache.invalidate.assert_called_once_with(REPORT_PATH)
+
     @patch("streamlit.watcher.local_sources_watcher.FileWatcher")
     def test_config_blacklist(self, fob, _):
         """Test server.folderWatchBlacklist"""
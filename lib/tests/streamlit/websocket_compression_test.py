@@ -0,0 +1,62 @@
+# Copyright 2018-2021 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""websocket_compression unit tests"""
+
+import json
+import os
+import unittest
+import zlib
+from unittest.mock import MagicMock
+
+from streamlit import config
+from streamlit.server.websocket_compression import AdaptiveCompressor
+
+
+def _create_compressor():
+    mock_compressor = MagicMock()
+    mock_compressor.compress.side_effect = lambda data: zlib.compress(data)
+    return AdaptiveCompressor(mock_compressor)
+
+
+class AdaptiveCompressorTest(unittest.TestCase):
+    def setUp(self):
+        config._set_option("server.websocketCompressionMinSize", 1024, "test")
+
+    def test_small_messages_are_not_compressed(self):
+        compressor = _create_compressor()
+        self.assertFalse(compressor.should_compress(b"a" * 1023))
+        self.assertTrue(compressor.should_compress(b"a" * 1024))
+
+    def test_min_size_is_configurable(self):
+        config._set_option("server.websocketCompressionMinSize", 10, "test")
+        self.assertTrue(_create_compressor().should_compress(b"a" * 100))
+
+    def test_incompressible_messages_are_not_compressed(self):
+        compressor = _create_compressor()
+        self.assertFalse(compressor.should_compress(os.urandom(100 * 1024)))
+
+    def test_compressible_messages_are_compressed(self):
+        spec = json.dumps({"data": [{"x": i, "y": i * 2} for i in range(2000)]})
+        self.assertTrue(_create_compressor().should_compress(spec.encode("utf-8")))
+
+    def test_compressible_data_after_incompressible_data(self):
+        """The whole message is sampled, not just its start."""
+        data = os.urandom(4 * 1024) + b"a" * 100 * 1024
+        self.assertTrue(_create_compressor().should_compress(data))
+
+    def test_compress(self):
+        compressor = _create_compressor()
+        data = b"a" * 2048
+        self.assertEqual(data, zlib.decompress(compressor.compress(data)))
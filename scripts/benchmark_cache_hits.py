@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# Copyright 2018-2021 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmarks the cost of an st.cache hit on a function that returns a large
+DataFrame, with each way of checking that the cached value wasn't mutated:
+
+- "none": allow_output_mutation=True. Nothing is checked.
+- "fast": the default. The DataFrame is read-only, and only its data
+  buffers are fingerprinted.
+- "strict": client.strictCacheMutationCheck. The DataFrame is hashed again.
+"""
+
+import statistics
+import time
+
+import click
+import numpy as np
+import pandas as pd
+
+import streamlit as st
+from streamlit import config
+
+MODES = {
+    "none": (True, False),
+    "fast": (False, False),
+    "strict": (False, True),
+}
+
+
+def _make_dataframe(rows, columns):
+    data = {"col%d" % i: np.random.rand(rows) for i in range(columns)}
+    data["label"] = np.random.choice(["a", "b", "c"], rows)
+    return pd.DataFrame(data)
+
+
+def _measure_hits(mode, df, hits):
+    allow_output_mutation, strict = MODES[mode]
+    config.set_option("client.strictCacheMutationCheck", strict)
+
+    @st.cache(allow_output_mutation=allow_output_mutation, show_spinner=False)
+    def load(mode):
+        return df.copy()
+
+    load(mode)
+
+    durations = []
+    for _ in range(hits):
+        start = time.perf_counter()
+        load(mode)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+@click.command()
+@click.option("--rows", default=1000000, help="Rows in the cached DataFrame.")
+@click.option("--columns", default=10, help="Float columns in the DataFrame.")
+@click.option("--hits", default=20, help="Cache hits to measure per mode.")
+def main(rows, columns, hits):
+    df = _make_dataframe(rows, columns)
+    click.echo(
+        "DataFrame: %d rows, %d columns, %.1f MB"
+        % (rows, columns + 1, df.memory_usage(index=True).sum() / 1e6)
+    )
+
+    for mode in MODES:
+        durations = _measure_hits(mode, df, hits)
+        click.echo(
+            "%-6s  hit median: %9.3f ms   max: %9.3f ms"
+            % (
+                mode,
+                statistics.median(durations) * 1000,
+                max(durations) * 1000,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# Copyright 2018-2021 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmarks how ScriptRunner stops a running script, in each of its modes:
+
+- "delta": neither runner.installTracer nor runner.asyncInterrupts. The
+  script notices a request the next time it enqueues a ForwardMsg.
+- "tracer": runner.installTracer. A trace function checks for requests
+  before every line of the script.
+- "async": runner.asyncInterrupts. The request raises an exception in the
+  script thread.
+
+And measures:
+
+- Throughput: how long a script that runs a pure-Python loop takes to
+  finish, which is what the tracer slows down.
+- Stop latency: the time between a stop being requested and the script
+  stopping, for a script that computes without sending anything for
+  --delta-interval seconds at a time.
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+import click
+
+from streamlit import config
+from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.report import Report
+from streamlit.script_request_queue import RerunData
+from streamlit.script_request_queue import ScriptRequest
+from streamlit.script_request_queue import ScriptRequestQueue
+from streamlit.script_runner import ScriptRunner
+from streamlit.script_runner import ScriptRunnerEvent
+
+THROUGHPUT_SCRIPT = """
+import streamlit as st
+
+total = 0
+for i in range({iterations}):
+    total += i * i
+st.text(str(total))
+"""
+
+LATENCY_SCRIPT = """
+import time
+import streamlit as st
+
+while True:
+    st.text("still computing")
+    start = time.time()
+    while time.time() - start < {delta_interval}:
+        pass
+"""
+
+MODES = {
+    "delta": {"runner.installTracer": False, "runner.asyncInterrupts": False},
+    "tracer": {"runner.installTracer": True, "runner.asyncInterrupts": False},
+    "async": {"runner.installTracer": False, "runner.asyncInterrupts": True},
+}
+
+
+class _BenchmarkScriptRunner(ScriptRunner):
+    """A ScriptRunner that enqueues its messages the way ReportSession
+    does, and records when its script runs stop."""
+
+    def __init__(self, script_path):
+        self.report = Report(script_path, "benchmark")
+        self.script_stopped = threading.Event()
+
+        def enqueue(msg):
+            self.report.enqueue(msg)
+            if not config.get_option("runner.installTracer"):
+                self.maybe_handle_execution_control_request()
+
+        super(_BenchmarkScriptRunner, self).__init__(
+            session_id="benchmark",
+            report=self.report,
+            enqueue_forward_msg=enqueue,
+            client_state=ClientState(),
+            request_queue=ScriptRequestQueue(),
+        )
+
+        def on_event(event, **kwargs):
+            if event == ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS:
+                self.script_stopped.set()
+
+        self.on_event.connect(on_event, weak=False)
+
+    def request(self, request, data=None):
+        """Enqueue a request the way ReportSession does."""
+        self._request_queue.enqueue(request, data)
+        self.request_interrupt()
+
+
+def _write_script(tmpdir, name, body):
+    script_path = os.path.join(tmpdir, name)
+    with open(script_path, "w") as f:
+        f.write(body)
+    return script_path
+
+
+def _measure_throughput(script_path, runs):
+    durations = []
+    for _ in range(runs):
+        runner = _BenchmarkScriptRunner(script_path)
+        start = time.perf_counter()
+        runner.request(ScriptRequest.RERUN, RerunData())
+        runner.start()
+        runner.script_stopped.wait()
+        durations.append(time.perf_counter() - start)
+        runner._script_thread.join()
+    return min(durations)
+
+
+def _measure_stop_latency(script_path, stops, delta_interval):
+    latencies = []
+    for _ in range(stops):
+        runner = _BenchmarkScriptRunner(script_path)
+        runner.request(ScriptRequest.RERUN, RerunData())
+        runner.start()
+
+        # Stop the script at a random point of its computation.
+        time.sleep(0.05 + random.random() * delta_interval)
+        start = time.perf_counter()
+        runner.request(ScriptRequest.STOP)
+        runner.script_stopped.wait()
+        latencies.append(time.perf_counter() - start)
+        runner._script_thread.join()
+    return latencies
+
+
+@click.command()
+@click.option(
+    "--iterations",
+    default=3000000,
+    help="Number of iterations of the throughput script's loop.",
+)
+@click.option("--runs", default=3, help="Throughput runs per mode (best is kept).")
+@click.option("--stops", default=10, help="Stop latency measurements per mode.")
+@click.option(
+    "--delta-interval",
+    default=1.0,
+    help="Seconds the latency script computes between deltas.",
+)
+@click.option(
+    "--mode",
+    type=click.Choice(list(MODES) + ["all"]),
+    default="all",
+    help="Which interruption mode to benchmark.",
+)
+def main(iterations, runs, stops, delta_interval, mode):
+    modes = list(MODES) if mode == "all" else [mode]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        throughput_script = _write_script(
+            tmpdir, "throughput.py", THROUGHPUT_SCRIPT.format(iterations=iterations)
+        )
+        latency_script = _write_script(
+            tmpdir, "latency.py", LATENCY_SCRIPT.format(delta_interval=delta_interval)
+        )
+
+        for name in modes:
+            for key, value in MODES[name].items():
+                config.set_option(key, value)
+
+            duration = _measure_throughput(throughput_script, runs)
+            latencies = _measure_stop_latency(latency_script, stops, delta_interval)
+
+            click.secho("%s mode" % name, bold=True)
+            click.echo(
+                "  throughput:          %7.0f iterations/ms (%.2f s)"
+                % (iterations / duration / 1000, duration)
+            )
+            click.echo(
+                "  stop latency median: %7.2f ms"
+                % (statistics.median(latencies) * 1000)
+            )
+            click.echo("  stop latency max:    %7.2f ms" % (max(latencies) * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+# Copyright 2018-2021 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Load-tests the Server with many simulated browsers.
+
+Starts a Server in-process on a test script, and connects a number of
+websocket clients to it. Each client repeatedly sends a rerun_script
+BackMsg, like a browser does when a widget changes, and reads the resulting
+ForwardMsgs until the report finishes. This measures:
+
+- Connect time: how long the websocket handshake takes.
+- First delta: the time between sending rerun_script and receiving the
+  first delta of the new run.
+- Report finished: the time between sending rerun_script and receiving
+  report_finished.
+- Throughput: ForwardMsgs and reruns per second, over every client.
+- RSS: the server process's resident memory before the clients connect and
+  after they've finished, and the cost per session.
+
+The clients run in separate processes, so that reading messages doesn't
+compete with the server for the GIL. The script runs for real, so this
+exercises ScriptRunner, ReportQueue, the send loop and the ForwardMsgCache
+together. Pass --json-output to save the results, e.g. to compare them
+between commits.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+import click
+import tornado.gen
+import tornado.httpserver
+import tornado.ioloop
+import tornado.netutil
+import tornado.websocket
+
+from streamlit import config
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsgList
+from streamlit.server.server import BATCHED_PROTOCOL_VERSION
+from streamlit.server.server import Server
+
+# A small app with a mix of cheap elements and a DataFrame that's large
+# enough to be cached, so that reruns are served from the ForwardMsgCache.
+SCRIPT = """
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+st.title("Load test")
+for i in range(20):
+    st.write("Line %s" % i)
+
+np.random.seed(0)
+st.dataframe(pd.DataFrame(np.random.randn(500, 5), columns=list("abcde")))
+st.slider("Slider", 0, 100, 50)
+"""
+
+
+def _get_rss():
+    """Return this process's resident set size, in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # Not Linux. Fall back to the peak RSS, which is close enough when
+        # memory only grows during a run.
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS, and kilobytes everywhere else.
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    index = max(int(len(values) * percent / 100) - 1, 0)
+    return values[index]
+
+
+@tornado.gen.coroutine
+def _rerun(client, num_reruns, stats):
+    """Rerun the script num_reruns times, waiting for each run to finish."""
+    back_msg = BackMsg()
+    back_msg.rerun_script.SetInParent()
+    payload = back_msg.SerializeToString()
+
+    for _ in range(num_reruns):
+        sent_at = time.perf_counter()
+        yield client.write_message(payload, binary=True)
+
+        first_delta_at = None
+        finished = False
+        while not finished:
+            data = yield client.read_message()
+            if data is None:
+                raise RuntimeError("The server closed the connection")
+
+            msg_list = ForwardMsgList()
+            msg_list.ParseFromString(data)
+            stats["messages"] += len(msg_list.messages)
+
+            for msg in msg_list.messages:
+                msg_type = msg.WhichOneof("type")
+                if msg_type == "delta" and first_delta_at is None:
+                    first_delta_at = time.perf_counter()
+                    stats["first_delta"].append(first_delta_at - sent_at)
+                elif msg_type == "report_finished":
+                    stats["report_finished"].append(time.perf_counter() - sent_at)
+                    finished = True
+
+
+def _run_clients(url, num_clients, num_reruns, start_event, results):
+    """Connect num_clients clients, and rerun the script with each of them
+    once start_event is set. Runs in its own process."""
+
+    @tornado.gen.coroutine
+    def run():
+        clients = []
+        connect_times = []
+        for _ in range(num_clients):
+            start = time.perf_counter()
+            clients.append((yield tornado.websocket.websocket_connect(url)))
+            connect_times.append(time.perf_counter() - start)
+        results.put(("connected", connect_times))
+
+        while not start_event.is_set():
+            yield tornado.gen.sleep(0.01)
+
+        stats = {"first_delta": [], "report_finished": [], "messages": 0}
+        start = time.time()
+        yield [_rerun(client, num_reruns, stats) for client in clients]
+        stats["start"] = start
+        stats["end"] = time.time()
+        results.put(("finished", stats))
+
+        for client in clients:
+            client.close()
+
+    tornado.ioloop.IOLoop().run_sync(run)
+
+
+@tornado.gen.coroutine
+def _get_results(results, kind, count):
+    """Wait for count results of the given kind from the client processes."""
+    values = []
+    while len(values) < count:
+        try:
+            result_kind, value = results.get_nowait()
+        except queue.Empty:
+            yield tornado.gen.sleep(0.01)
+            continue
+        assert result_kind == kind
+        values.append(value)
+    raise tornado.gen.Return(values)
+
+
+@tornado.gen.coroutine
+def _run_benchmark(ioloop, script_path, num_sessions, num_reruns, num_processes):
+    Server._singleton = None
+    server = Server(ioloop, script_path, "benchmark")
+    server._on_stopped = lambda: None
+
+    sockets = tornado.netutil.bind_sockets(0, "127.0.0.1")
+    port = sockets[0].getsockname()[1]
+    http_server = tornado.httpserver.HTTPServer(server._create_app())
+    http_server.add_sockets(sockets)
+
+    started = tornado.gen.Future()
+    ioloop.spawn_callback(server._loop_coroutine, lambda _: started.set_result(None))
+    yield started
+
+    rss_before = _get_rss()
+
+    url = "ws://127.0.0.1:%s/stream?protocolVersion=%s" % (
+        port,
+        BATCHED_PROTOCOL_VERSION,
+    )
+    start_event = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = []
+    for i in range(num_processes):
+        # Spread the sessions as evenly as possible.
+        num_clients = num_sessions // num_processes
+        if i < num_sessions % num_processes:
+            num_clients += 1
+        if num_clients == 0:
+            continue
+
+        process = multiprocessing.Process(
+            target=_run_clients,
+            args=(url, num_clients, num_reruns, start_event, results),
+        )
+        process.start()
+        processes.append(process)
+
+    connect_times = yield _get_results(results, "connected", len(processes))
+    start_event.set()
+    all_stats = yield _get_results(results, "finished", len(processes))
+    rss_after = _get_rss()
+
+    for process in processes:
+        process.join()
+    cache_stats = server._message_cache.get_stats()
+    server.stop()
+    http_server.stop()
+    yield tornado.gen.sleep(0.1)
+
+    connect_times = [t for times in connect_times for t in times]
+    first_delta = [t for stats in all_stats for t in stats["first_delta"]]
+    report_finished = [t for stats in all_stats for t in stats["report_finished"]]
+    duration = max(s["end"] for s in all_stats) - min(s["start"] for s in all_stats)
+
+    raise tornado.gen.Return(
+        {
+            "sessions": num_sessions,
+            "reruns_per_session": num_reruns,
+            "connect_median": statistics.median(connect_times),
+            "connect_p99": _percentile(connect_times, 99),
+            "first_delta_median": statistics.median(first_delta),
+            "first_delta_p99": _percentile(first_delta, 99),
+            "report_finished_median": statistics.median(report_finished),
+            "report_finished_p99": _percentile(report_finished, 99),
+            "messages_per_second": sum(s["messages"] for s in all_stats) / duration,
+            "reruns_per_second": len(report_finished) / duration,
+            "rss_before": rss_before,
+            "rss_after": rss_after,
+            "rss_per_session": (rss_after - rss_before) / num_sessions,
+            "message_cache_hit_rate": cache_stats["hit_rate"],
+        }
+    )
+
+
+@click.command()
+@click.option("--sessions", default=50, help="Number of simulated browsers.")
+@click.option("--reruns", default=10, help="Number of reruns per browser.")
+@click.option(
+    "--processes",
+    default=min(4, multiprocessing.cpu_count()),
+    help="Number of processes to run the browsers in.",
+)
+@click.option(
+    "--script",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Script to run, instead of the built-in test app.",
+)
+@click.option(
+    "--json-output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Also write the results to this file, as JSON.",
+)
+def main(sessions, reruns, processes, script, json_output):
+    logging.getLogger("tornado.access").setLevel(logging.ERROR)
+    # Every session would otherwise watch the script's files for changes,
+    # which isn't what's being measured.
+    config._set_option("server.fileWatcherType", "none", "benchmark")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if script is None:
+            script = os.path.join(tmpdir, "benchmark_app.py")
+            with open(script, "w") as f:
+                f.write(SCRIPT)
+
+        ioloop = tornado.ioloop.IOLoop()
+        result = ioloop.run_sync(
+            lambda: _run_benchmark(ioloop, script, sessions, reruns, processes)
+        )
+        ioloop.close(all_fds=True)
+
+    click.secho("%s sessions, %s reruns each" % (sessions, reruns), bold=True)
+    click.echo(
+        "  connect:         median %7.2f ms   p99 %7.2f ms"
+        % (result["connect_median"] * 1000, result["connect_p99"] * 1000)
+    )
+    click.echo(
+        "  first delta:     median %7.2f ms   p99 %7.2f ms"
+        % (result["first_delta_median"] * 1000, result["first_delta_p99"] * 1000)
+    )
+    click.echo(
+        "  report finished: median %7.2f ms   p99 %7.2f ms"
+        % (
+            result["report_finished_median"] * 1000,
+            result["report_finished_p99"] * 1000,
+        )
+    )
+    click.echo("  messages/s:      %9.1f" % result["messages_per_second"])
+    click.echo("  reruns/s:        %9.1f" % result["reruns_per_second"])
+    click.echo(
+        "  RSS:             %7.1f MB -> %7.1f MB (%.1f KB per session)"
+        % (
+            result["rss_before"] / 1e6,
+            result["rss_after"] / 1e6,
+            result["rss_per_session"] / 1e3,
+        )
+    )
+    click.echo("  cache hit rate:  %9.2f" % result["message_cache_hit_rate"])
+
+    if json_output is not None:
+        with open(json_output, "w") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
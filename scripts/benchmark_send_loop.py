@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+# Copyright 2018-2021 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmarks the Server's ForwardMsg send loop.
+
+Starts a Server in-process, connects a number of idle websocket clients, and
+measures:
+
+- Idle CPU: the CPU time the process uses while every session is idle.
+- Delta latency: the time between a script thread calling
+  ReportSession.enqueue() and the message arriving at the websocket client.
+  With --heavy-mb, another session streams messages of that size the whole
+  time, to see how much a heavy session slows down everyone else.
+- IOLoop lag: during the latency test, how late a 1ms timer on the IOLoop
+  fires. This is how long the IOLoop was blocked, e.g. serializing a large
+  message.
+
+The "polling" mode runs the same measurements against a send loop that wakes
+up every 10ms and flushes every session, which is how the Server used to
+work, so the two can be compared on the same machine.
+"""
+
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+import click
+import numpy as np
+import pandas as pd
+import tornado.gen
+import tornado.httpserver
+import tornado.ioloop
+import tornado.netutil
+import tornado.websocket
+
+from streamlit.elements import data_frame
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.server.server import Server
+from streamlit.server.server import State
+
+SCRIPT = "import streamlit as st\n"
+
+
+class PollingServer(Server):
+    """A Server whose send loop polls every session every 10ms."""
+
+    @tornado.gen.coroutine
+    def _loop_coroutine(self, on_started=None):
+        self._set_state(State.WAITING_FOR_FIRST_BROWSER)
+        if on_started is not None:
+            on_started(self)
+
+        while not self._must_stop.is_set():
+            if self._state == State.ONE_OR_MORE_BROWSERS_CONNECTED:
+                for session_info in list(self._session_info_by_id.values()):
+                    if session_info.ws is None:
+                        continue
+                    for msg in session_info.session.flush_browser_queue():
+                        self._send_message(session_info, msg)
+                        yield
+                    yield
+            yield tornado.gen.sleep(0.01)
+
+        self._set_state(State.STOPPED)
+
+    def _send_message(self, session_info, msg):
+        """Serialize a message and write it to a session's websocket right
+        away, as the Server used to."""
+        msg_str = self._serialize_message(session_info, msg)
+        self._remember_sent_msgs(session_info, [msg_str])
+        self._write_message(session_info, msg_str)
+
+
+def _create_delta_msg(index):
+    msg = ForwardMsg()
+    msg.metadata.delta_path[:] = [0, index]
+    # The send timestamp travels inside the message itself.
+    msg.delta.new_element.text.body = repr(time.perf_counter())
+    return msg
+
+
+def _create_heavy_msg_factory(heavy_mb, heavy_kind):
+    """Return a function that creates a unique message of about heavy_mb
+    megabytes, given an index."""
+    if heavy_kind == "markdown":
+        payload = "x" * int(heavy_mb * 1e6)
+
+        def create_markdown_msg(index):
+            msg = ForwardMsg()
+            msg.metadata.delta_path[:] = [0, 0]
+            msg.delta.new_element.markdown.body = "%s %s" % (index, payload)
+            return msg
+
+        return create_markdown_msg
+
+    # A DataFrame has many small protobuf fields, which are much more
+    # expensive to serialize than one big string.
+    num_rows = int(heavy_mb * 1e6 / 40)
+    df = pd.DataFrame(np.random.randn(num_rows, 4), columns=list("abcd"))
+    template = ForwardMsg()
+    template.metadata.delta_path[:] = [0, 0]
+    data_frame.marshall_data_frame(df, template.delta.new_element.data_frame)
+
+    def create_dataframe_msg(index):
+        msg = ForwardMsg()
+        msg.CopyFrom(template)
+        msg.delta.new_element.data_frame.index.plain_index.data.strings.data[:] = [
+            str(index)
+        ]
+        return msg
+
+    return create_dataframe_msg
+
+
+def _stream_heavy_msgs(session, heavy_mb, heavy_kind, stop_event):
+    """Enqueue large messages into a session until stop_event is set."""
+    create_msg = _create_heavy_msg_factory(heavy_mb, heavy_kind)
+    index = 0
+    while not stop_event.is_set():
+        # Make each message unique, so it isn't replaced by a cache reference.
+        session.enqueue(create_msg(index))
+        index += 1
+        time.sleep(0.05)
+
+
+def _drain(url):
+    """Read and discard every message sent to a new websocket client.
+
+    This runs in its own process, so that reading the heavy session's
+    messages doesn't compete with the server for the GIL.
+    """
+
+    @tornado.gen.coroutine
+    def read_all():
+        client = yield tornado.websocket.websocket_connect(url)
+        while True:
+            data = yield client.read_message()
+            if data is None:
+                break
+
+    tornado.ioloop.IOLoop().run_sync(read_all)
+
+
+@tornado.gen.coroutine
+def _measure_ioloop_lag(lags, stop_event):
+    """Append how late each of a series of 1ms sleeps wakes up to lags."""
+    while not stop_event.is_set():
+        start = time.perf_counter()
+        yield tornado.gen.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+@tornado.gen.coroutine
+def _run_benchmark(
+    server_cls,
+    ioloop,
+    script_path,
+    num_sessions,
+    idle_secs,
+    deltas,
+    heavy_mb,
+    heavy_kind,
+):
+    Server._singleton = None
+    server = server_cls(ioloop, script_path, "benchmark")
+    server._on_stopped = lambda: None
+
+    sockets = tornado.netutil.bind_sockets(0, "127.0.0.1")
+    port = sockets[0].getsockname()[1]
+    http_server = tornado.httpserver.HTTPServer(server._create_app())
+    http_server.add_sockets(sockets)
+
+    started = tornado.gen.Future()
+    ioloop.spawn_callback(server._loop_coroutine, lambda _: started.set_result(None))
+    yield started
+
+    url = "ws://127.0.0.1:%s/stream" % port
+    clients = []
+    for _ in range(num_sessions):
+        clients.append((yield tornado.websocket.websocket_connect(url)))
+
+    # Idle CPU: every session is connected, and nothing is happening.
+    yield tornado.gen.sleep(0.5)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    yield tornado.gen.sleep(idle_secs)
+    idle_cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+
+    session_infos = list(server._session_info_by_id.values())
+
+    stop_heavy = threading.Event()
+    if heavy_mb > 0:
+        drain_process = multiprocessing.Process(target=_drain, args=(url,))
+        drain_process.start()
+        while len(server._session_info_by_id) == len(session_infos):
+            yield tornado.gen.sleep(0.01)
+        heavy_session_info = list(server._session_info_by_id.values())[-1]
+        threading.Thread(
+            target=_stream_heavy_msgs,
+            args=(heavy_session_info.session, heavy_mb, heavy_kind, stop_heavy),
+        ).start()
+
+    # Delta latency: enqueue from a separate thread, as a ScriptRunner would.
+    session = session_infos[0].session
+    client = clients[0]
+    latencies = []
+    lags = []
+    ioloop.spawn_callback(_measure_ioloop_lag, lags, stop_heavy)
+    for i in range(deltas):
+        # Randomize the send time so that we don't line up with a polling
+        # interval.
+        yield tornado.gen.sleep(random.uniform(0, 0.02))
+        threading.Thread(target=lambda: session.enqueue(_create_delta_msg(i))).start()
+        data = yield client.read_message()
+        received = ForwardMsg()
+        received.ParseFromString(data)
+        sent_at = float(received.delta.new_element.text.body)
+        latencies.append(time.perf_counter() - sent_at)
+
+    stop_heavy.set()
+    for client in clients:
+        client.close()
+    if heavy_mb > 0:
+        heavy_session_info.ws.close()
+        drain_process.join()
+    server.stop()
+    http_server.stop()
+    yield tornado.gen.sleep(0.1)
+
+    latencies.sort()
+    raise tornado.gen.Return(
+        {
+            "idle_cpu": idle_cpu,
+            "median": statistics.median(latencies),
+            "p99": latencies[int(len(latencies) * 0.99) - 1],
+            "max": latencies[-1],
+            "max_lag": max(lags),
+        }
+    )
+
+
+@click.command()
+@click.option("--sessions", default=200, help="Number of idle websocket clients.")
+@click.option("--idle-seconds", default=5.0, help="How long to measure idle CPU.")
+@click.option("--deltas", default=200, help="Number of deltas to time.")
+@click.option(
+    "--heavy-mb",
+    default=0.0,
+    help="Size of the messages another session streams during the latency test.",
+)
+@click.option(
+    "--heavy-kind",
+    type=click.Choice(["markdown", "dataframe"]),
+    default="markdown",
+    help="What kind of messages the heavy session streams.",
+)
+@click.option(
+    "--mode",
+    type=click.Choice(["event", "polling", "both"]),
+    default="both",
+    help="Which send loop to benchmark.",
+)
+def main(sessions, idle_seconds, deltas, heavy_mb, heavy_kind, mode):
+    modes = ["event", "polling"] if mode == "both" else [mode]
+    logging.getLogger("tornado.access").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        script_path = os.path.join(tmpdir, "benchmark_app.py")
+        with open(script_path, "w") as f:
+            f.write(SCRIPT)
+
+        for name in modes:
+            server_cls = PollingServer if name == "polling" else Server
+            ioloop = tornado.ioloop.IOLoop()
+            result = ioloop.run_sync(
+                lambda: _run_benchmark(
+                    server_cls,
+                    ioloop,
+                    script_path,
+                    sessions,
+                    idle_seconds,
+                    deltas,
+                    heavy_mb,
+                    heavy_kind,
+                ),
+                timeout=idle_seconds + deltas + 60,
+            )
+            ioloop.close(all_fds=True)
+
+            click.secho("%s loop (%s sessions)" % (name, sessions), bold=True)
+            click.echo(
+                "  idle CPU:       %5.1f%% of one core" % (result["idle_cpu"] * 100)
+            )
+            click.echo("  latency median: %7.2f ms" % (result["median"] * 1000))
+            click.echo("  latency p99:    %7.2f ms" % (result["p99"] * 1000))
+            click.echo("  latency max:    %7.2f ms" % (result["max"] * 1000))
+            click.echo("  IOLoop lag max: %7.2f ms" % (result["max_lag"] * 1000))
+
+
+if __name__ == "__main__":
+    main()